@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+
+from ..models import MaturityAssessmentRequest, MaturityAssessmentResponse
+from ..services.assessment_service import AssessmentService
+
+router = APIRouter(prefix="/api/privacy/assessments", tags=["privacy-assessment"])
+
+
+@router.get("/model", response_model=dict)
+def get_maturity_model():
+    """Bewertete Controls mit Soll-Reifegrad, Gewicht, Domäne und Gruppe."""
+    model = AssessmentService().model()
+    return {
+        "scale": list(range(model.scale[0], model.scale[1] + 1)),
+        "items": [
+            {
+                "id": ctrl_id,
+                "target": model.targets[i],
+                "weight": round(model.weights[i], 4),
+                "domain": model.domains[model.domain_index[i]],
+                "groupId": model.groups[model.group_index[i]],
+            }
+            for i, ctrl_id in enumerate(model.control_ids)
+        ],
+    }
+
+
+@router.post("/score", response_model=MaturityAssessmentResponse)
+def score_assessments(body: MaturityAssessmentRequest):
+    """
+    Bulk-Scoring: je Organisation Lücken zum Soll-Reifegrad, Aggregate je
+    Reifegrad-Domäne/Gruppe und risikogewichteter Score (0–100).
+    Nicht bewertete Controls fließen nicht in die Mittelwerte ein.
+    """
+    if not body.assessments:
+        raise HTTPException(status_code=400, detail="No assessments given")
+    try:
+        return AssessmentService().score(body.assessments, include_controls=body.includeControls)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"{e.filename} not found – check config.py and data/ path",
+        )
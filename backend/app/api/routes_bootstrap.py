@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Request
+
+from ..services.bootstrap_service import BootstrapService
+from ..services.response_cache import cached_body_response
+
+router = APIRouter(prefix="/api/bootstrap", tags=["bootstrap"])
+
+
+@router.get("")
+def get_bootstrap(request: Request):
+    """
+    Start-Daten des Frontends in einer (komprimierten) Antwort: je Katalog
+    und für das SDM→Security-Mapping ein BootstrapCatalog mit Summaries,
+    Gruppenbaum, Facetten und Revisions-Token – ersetzt die einzelnen
+    Listen-Aufrufe beim Laden.
+    """
+    service = BootstrapService()
+    revisions = service.revisions()
+    # frozenset der Dokumente: Schreiben eines davon entfernt den Eintrag
+    key = (frozenset(revisions), request.url.path, (), service.token(revisions))
+    return cached_body_response(request, key, lambda: service.build(revisions))
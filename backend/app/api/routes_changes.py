@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..models import DeltaSyncResponse
+from ..services.change_log import change_log
+from ..services.delta_sync_service import DeltaSyncService
+
+router = APIRouter(prefix="/api/changes", tags=["changes"])
+
+
+@router.get("", response_model=dict)
+def get_change_log_status():
+    """Aktuelle Revision und Umfang des Änderungsprotokolls je Dokument."""
+    return {"epoch": change_log.epoch, "documents": change_log.status()}
+
+
+@router.get("/{name}", response_model=DeltaSyncResponse)
+def get_changes(
+    name: str,
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = None,
+    includeNested: bool = False,
+):
+    """
+    Änderungen an der Liste von {name} seit Revision `since` (aus einer
+    früheren Antwort, zusammen mit deren `epoch`). Ohne `since`, bei anderer
+    Epoche oder gekürztem Protokoll kommt die vollständige Liste (full=true).
+    Die Epoche gehört zum Worker-Prozess: Deltas nur bei einem Worker.
+    `includeNested` muss zur gespiegelten Listen-Route passen (SDM-Katalog).
+    """
+    service = DeltaSyncService()
+    try:
+        return service.changes(name, since=since, epoch=epoch, include_nested=includeNested)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
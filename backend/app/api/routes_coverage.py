@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+
+from ..models import CoverageReport
+from ..services.coverage_service import CoverageService
+
+router = APIRouter(prefix="/api/coverage", tags=["coverage"])
+
+
+@router.get("", response_model=CoverageReport)
+def get_coverage():
+    """
+    Abdeckungs-/Lückenanalyse SDM ↔ BSI/ISO 27001/ISO 27701/Resilience:
+    Abdeckung je Standard, je SDM-Gewährleistungsziel und je SDM-Baustein,
+    Referenzzähler je Ziel-Control sowie nicht referenzierte SEC-Controls.
+    """
+    try:
+        return CoverageService().report()
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"{e.filename} not found – check config.py and data/ path",
+        )
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..services.duplicate_service import DuplicateService
+
+router = APIRouter(prefix="/api/duplicates", tags=["duplicates"])
+
+
+@router.get("", response_model=dict)
+def find_duplicates(
+    threshold: float = Query(0.8, ge=0.1, le=1.0),
+    catalogs: Optional[str] = None,
+    partNames: Optional[str] = None,
+    minWords: Optional[int] = Query(None, ge=1),
+):
+    """
+    Cluster nahezu gleicher Prosa über alle (oder die kommagetrennt
+    angegebenen) Kataloge, optional beschränkt auf bestimmte Part-Namen
+    (z.B. "typical-measures,assessment-question").
+    """
+    service = DuplicateService()
+    try:
+        return service.find_clusters(
+            threshold=threshold,
+            catalogs=[c.strip() for c in catalogs.split(",") if c.strip()] if catalogs else None,
+            part_names={p.strip() for p in partNames.split(",") if p.strip()} if partNames else None,
+            min_words=minWords,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,97 @@
+from typing import Dict, Literal
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..services.catalog_registry import registry
+from ..services.file_service import FileService
+from ..services.reference_catalog_service import ReferenceCatalogService
+from ..services import export_service
+from ..config import settings
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+ExportFormat = Literal["csv", "xlsx"]
+
+
+def _load_json(name: str) -> Dict:
+    fs = FileService()
+    try:
+        return fs.load_json(name)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=500,
+            detail=f"{name}.json not found – check config.py and data/ path",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _streaming_response(fmt: str, filename: str, columns, rows, delimiter: str = ",") -> StreamingResponse:
+    if len(delimiter) != 1:
+        raise HTTPException(status_code=400, detail="delimiter must be a single character")
+    try:
+        chunks, media_type = export_service.stream_table(
+            fmt, columns, rows, sheet_name=filename, delimiter=delimiter
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/mapping")
+def export_mapping(
+    format: ExportFormat = "csv",
+    includeCatalogProps: bool = True,
+    delimiter: str = ",",
+):
+    """
+    Exportiert die Mapping-Matrix SDM ↔ Security-Controls/BSI/ISO 27001/ISO 27701
+    als CSV oder XLSX (eine Zeile pro Verknüpfung). Optional inkl. der
+    related-mapping-Props aus sdm_privacy_catalog.json.
+    """
+    mapping = _load_json(settings.SDM_MAPPING_NAME)
+    catalog = _load_json(settings.SDM_PRIVACY_CATALOG_NAME) if includeCatalogProps else None
+
+    rows = export_service.iter_mapping_rows(mapping, catalog)
+    return _streaming_response(
+        format, "sdm_mapping_matrix", export_service.MAPPING_COLUMNS, rows, delimiter
+    )
+
+
+@router.get("/{name}/controls")
+def export_catalog_controls(
+    name: str,
+    format: ExportFormat = "csv",
+    delimiter: str = ",",
+):
+    """
+    Exportiert alle Controls eines Katalogs (inkl. verschachtelter Controls)
+    mit einer Spalte pro Prop-Name. Große Kataloge (registry.is_large) kommen
+    aus dem Streaming-Index, ohne das Dokument zu parsen.
+    """
+    try:
+        large = registry.is_large(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if large:
+        try:
+            index = ReferenceCatalogService(name).index()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        columns = export_service.reference_control_columns(index)
+        rows = export_service.iter_reference_control_rows(index, columns)
+        return _streaming_response(format, name, columns, rows, delimiter)
+
+    data = _load_json(name)
+    if "catalog" not in data:
+        raise HTTPException(status_code=400, detail=f"{name} is not an OSCAL catalog")
+
+    columns = export_service.control_columns(data)
+    rows = export_service.iter_control_rows(data, columns)
+    return _streaming_response(format, name, columns, rows, delimiter)
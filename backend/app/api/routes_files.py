@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from ..models import FileContent, SaveRequest, SaveResponse
+from ..services import cbor_encoder
 from ..services.file_service import FileService
+from ..services.response_cache import cached_body_response, response_cache
 
 router = APIRouter(prefix="/api", tags=["files"])
 
@@ -17,6 +19,26 @@ def get_file(name: str):
     return FileContent(name=name, content=content)
 
 
+@router.get("/files/{name}/snapshot")
+def get_file_snapshot(name: str, request: Request):
+    """
+    Geparstes Dokument als CBOR (application/cbor) – kompakter Bulk-Download
+    für Clients; pro Revision einmal kodiert und gecacht.
+    """
+    fs = FileService()
+    try:
+        fs.require_core(name)
+        revision = fs.revision(name)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    def build():
+        data = cbor_encoder.dumps(fs.load_json(name))
+        return response_cache.body(data, media_type="application/cbor")
+
+    return cached_body_response(request, (name, request.url.path, (), revision), build)
+
+
 
 class FileDiffRequest(BaseModel):
     updated: str  # neue JSON-Version als String
@@ -30,6 +52,11 @@ def diff_file(name: str, req: FileDiffRequest):
     Die Datei wird dabei NICHT überschrieben.
     """
     fs = FileService()
+    try:
+        fs.require_core(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
     try:
         diff = fs.diff_current_and_new(name, req.updated)
     except FileNotFoundError:
@@ -38,7 +65,7 @@ def diff_file(name: str, req: FileDiffRequest):
             detail="File not found – prüfe Dateinamen und config.py",
         )
     except ValueError as e:
-        # z.B. unknown file name oder ungültiges JSON
+        # z.B. ungültiges JSON
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
@@ -52,13 +79,25 @@ def diff_file(name: str, req: FileDiffRequest):
 @router.post("/save", response_model=SaveResponse)
 def save_file(req: SaveRequest):
     fs = FileService()
+    try:
+        fs.require_core(req.name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    old_content = fs.read_text(req.name)
-    diff = fs.diff(old_content, req.content)
+    try:
+        diff = fs.diff_current_and_new(req.name, req.content)
+    except ValueError as e:
+        # ungültiges JSON
+        raise HTTPException(status_code=400, detail=str(e))
 
     if req.previewOnly:
         return SaveResponse(mode="preview", written=False, diff=diff)
 
+    # inhaltlich unverändert (z.B. nur Formatierung) → nichts schreiben
+    summary = diff.summary
+    if not (summary.added or summary.changed or summary.removed):
+        return SaveResponse(mode="saved", written=False, diff=diff)
+
     # TODO: optional: Validation-Service vor Schreiben aufrufen
     fs.write_text(req.name, req.content)
     # TODO: optional: GitService.commit(...)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException
+
+from ..config import settings
+from ..models import HistoryEntrySummary, HistoryState
+from ..services.history_service import HistoryConflict, current_user, history
+
+router = APIRouter(prefix="/api/history", tags=["history"])
+
+
+def _user() -> str:
+    """Verlauf nur mit Benutzer-Header (sonst teilen sich alle Clients einen)."""
+    user = current_user.get()
+    if user is None:
+        raise HTTPException(status_code=400, detail=f"Header {settings.HISTORY_USER_HEADER} is required")
+    return user
+
+
+@router.get("", response_model=HistoryState)
+def get_history():
+    """Undo-/Redo-Verlauf des aktuellen Benutzers (Header X-Workbench-User, Pflicht)."""
+    return history.state(_user())
+
+
+@router.post("/undo", response_model=HistoryEntrySummary)
+def undo_last_change():
+    """Macht die letzte eigene Änderung rückgängig (409 bei Konflikt)."""
+    try:
+        return history.undo(_user())
+    except HistoryConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/redo", response_model=HistoryEntrySummary)
+def redo_last_change():
+    """Stellt die zuletzt rückgängig gemachte Änderung wieder her."""
+    try:
+        return history.redo(_user())
+    except HistoryConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("", response_model=dict)
+def clear_history():
+    user = _user()
+    history.clear(user)
+    return {"cleared": user}
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+
+from ..config import settings
+from ..services.edit_journal import journal
+from ..services.transaction_log import transaction_log
+
+router = APIRouter(prefix="/api/journal", tags=["journal"])
+
+
+@router.get("", response_model=dict)
+def get_journal_status():
+    """
+    Zustand des Write-Behind-Journals: je Dokument letzte Sequenznummer,
+    zuletzt geschriebene Sequenz und offene Records; dazu das Ergebnis der
+    Recovery beim Start (inkl. abgeschlossener Transaktionen).
+    """
+    return {
+        "enabled": settings.WRITE_BEHIND_ENABLED,
+        "items": journal.status(),
+        "recovered": journal.recovered,
+        "transactions": transaction_log.recovered,
+    }
+
+
+@router.post("/flush", response_model=dict)
+def flush_journal():
+    """Schreibt alle noch offenen Stände sofort auf die Platte."""
+    return {"flushed": journal.flush_all()}
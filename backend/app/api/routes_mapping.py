@@ -1,63 +1,98 @@
-from fastapi import APIRouter, HTTPException
+from contextlib import contextmanager
+from typing import Iterator
 
-from ..models import SdmSecurityMapping, SdmSecurityMappingUpdateRequest
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..models import MappingSuggestionList, SdmSecurityMapping, SdmSecurityMappingUpdateRequest
 from ..services.file_service import FileService
+from ..services.response_cache import cached_json_response, item_etag
 from ..services.mapping_service import MappingService
+from ..services.similarity_service import MappingSuggestionService
 from ..config import settings
 
 router = APIRouter(prefix="/api", tags=["mapping"])
 
 
-@router.get("/mapping", response_model=dict)
-def list_mappings():
-    fs = FileService()
+_NOT_FOUND = "sdm_privacy_to_security.json not found – check config.py and data/ path"
+
+
+def _load_service() -> MappingService:
+    """Lesen über das gecachte Dokument der Registry."""
     try:
-        content = fs.read_text(settings.SDM_MAPPING_NAME)
+        return MappingService(FileService().load_json(settings.SDM_MAPPING_NAME))
     except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_to_security.json not found – check config.py and data/ path",
-        )
+        raise HTTPException(status_code=500, detail=_NOT_FOUND)
 
-    service = MappingService.from_json_str(content)
-    items = service.list_mappings()
-    return {"items": items}
 
-
-@router.get("/mapping/{sdm_control_id}", response_model=SdmSecurityMapping)
-def get_mapping(sdm_control_id: str):
-    fs = FileService()
+@contextmanager
+def _editing_service() -> Iterator[MappingService]:
+    """
+    Bearbeiten unter dem Dokument-Lock auf dem geteilten Stand; der Service
+    baut per Copy-on-Write eine neue Wurzel, die am Ende geschrieben wird.
+    """
     try:
-        content = fs.read_text(settings.SDM_MAPPING_NAME)
+        with FileService().editing(settings.SDM_MAPPING_NAME) as editor:
+            service = MappingService(editor.base)
+            yield service
+            editor.root = service.raw
     except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_to_security.json not found – check config.py and data/ path",
-        )
+        raise HTTPException(status_code=500, detail=_NOT_FOUND)
 
-    service = MappingService.from_json_str(content)
-    mapping = service.get_mapping(sdm_control_id)
-    if not mapping:
-        raise HTTPException(status_code=404, detail="Mapping not found")
-    return mapping
 
+@router.get("/mapping", response_model=dict)
+def list_mappings(request: Request):
+    def build():
+        service = _load_service()
+        return {"items": service.list_mappings()}
 
-@router.put("/mapping/{sdm_control_id}", response_model=SdmSecurityMapping)
-def upsert_mapping(sdm_control_id: str, req: SdmSecurityMappingUpdateRequest):
+    return cached_json_response(request, settings.SDM_MAPPING_NAME, build)
+
+
+@router.get("/mapping/suggestions", response_model=dict)
+def list_mapping_suggestions(
+    k: int = Query(3, ge=1, le=50),
+    includeMapped: bool = False,
+):
     """
-    Legt ein neues Mapping für ein SDM-Control an oder überschreibt das bestehende.
+    Security-Control-Vorschläge für alle SDM-Controls (Prosa-Ähnlichkeit),
+    ohne bereits gemappte Controls.
     """
-    fs = FileService()
+    service = MappingSuggestionService()
+    return {"items": service.suggest(k=k, include_mapped=includeMapped)}
+
+
+@router.get("/mapping/{sdm_control_id}/suggestions", response_model=MappingSuggestionList)
+def get_mapping_suggestions(
+    sdm_control_id: str,
+    k: int = Query(5, ge=1, le=50),
+    includeMapped: bool = False,
+):
+    """Vorschläge für ein SDM- (oder Privacy-)Control."""
+    service = MappingSuggestionService()
     try:
-        content = fs.read_text(settings.SDM_MAPPING_NAME)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_to_security.json not found – check config.py and data/ path",
-        )
+        return service.suggest([sdm_control_id], k=k, include_mapped=includeMapped)[0]
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    service = MappingService.from_json_str(content)
 
+@router.get("/mapping/{sdm_control_id}", response_model=SdmSecurityMapping)
+def get_mapping(sdm_control_id: str, request: Request):
+    def build():
+        service = _load_service()
+        mapping = service.get_mapping(sdm_control_id)
+        if not mapping:
+            raise HTTPException(status_code=404, detail="Mapping not found")
+        return mapping
+
+    etag = item_etag(request, settings.SDM_MAPPING_NAME, sdm_control_id)
+    return cached_json_response(request, settings.SDM_MAPPING_NAME, build, etag=etag)
+
+
+@router.put("/mapping/{sdm_control_id}", response_model=SdmSecurityMapping)
+def upsert_mapping(sdm_control_id: str, req: SdmSecurityMappingUpdateRequest):
+    """
+    Legt ein neues Mapping für ein SDM-Control an oder überschreibt das bestehende.
+    """
     mapping = SdmSecurityMapping(
         sdmControlId=sdm_control_id,
         sdmTitle=req.sdmTitle,
@@ -66,27 +101,15 @@ def upsert_mapping(sdm_control_id: str, req: SdmSecurityMappingUpdateRequest):
         notes=req.notes,
     )
 
-    updated = service.upsert_mapping(mapping)
-    new_content = service.to_json_str()
-    fs.write_text(settings.SDM_MAPPING_NAME, new_content)
+    with _editing_service() as service:
+        updated = service.upsert_mapping(mapping)
 
     return updated
 
 
 @router.delete("/mapping/{sdm_control_id}")
 def delete_mapping(sdm_control_id: str):
-    fs = FileService()
-    try:
-        content = fs.read_text(settings.SDM_MAPPING_NAME)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_to_security.json not found – check config.py and data/ path",
-        )
-
-    service = MappingService.from_json_str(content)
-    service.delete_mapping(sdm_control_id)
-    new_content = service.to_json_str()
-    fs.write_text(settings.SDM_MAPPING_NAME, new_content)
+    with _editing_service() as service:
+        service.delete_mapping(sdm_control_id)
 
     return {"status": "ok"}
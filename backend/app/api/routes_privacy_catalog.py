@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Request
 
 from ..models import ( 
     PrivacyControlSummary, 
@@ -10,6 +10,8 @@ from ..models import (
     PrivacyGroupDeleteRequest
 )
 from ..services.privacy_catalog_service import PrivacyCatalogService
+from ..services.response_cache import cached_json_response, item_etag
+from ..config import settings
 
 router = APIRouter(prefix="/api/privacy", tags=["privacy-catalog"])
 
@@ -17,11 +19,14 @@ router = APIRouter(prefix="/api/privacy", tags=["privacy-catalog"])
 # --------- Gruppen-Endpunkte ---------
 
 @router.get("/groups", response_model=dict)
-def list_privacy_groups():
-    svc = PrivacyCatalogService()
-    items = svc.list_groups()
-    # für das Frontend-Konsistenz mit /controls (items-Array)
-    return {"items": items}
+def list_privacy_groups(request: Request):
+    def build():
+        svc = PrivacyCatalogService()
+        items = svc.list_groups()
+        # für das Frontend-Konsistenz mit /controls (items-Array)
+        return {"items": items}
+
+    return cached_json_response(request, settings.PRIVACY_CATALOG_NAME, build)
 
 
 @router.post("/groups", response_model=PrivacyGroupDetail)
@@ -69,22 +74,33 @@ def delete_privacy_group(
 #------ controls endpoints ---------------
 
 @router.get("/controls", response_model=dict)
-def list_privacy_controls():
-    svc = PrivacyCatalogService()
-    items = svc.list_controls()
-    return {"items": items}
+def list_privacy_controls(request: Request):
+    def build():
+        svc = PrivacyCatalogService()
+        return {"items": svc.list_controls()}
+
+    return cached_json_response(request, settings.PRIVACY_CATALOG_NAME, build)
 
 
 @router.get(
     "/controls/{control_id}",
     response_model=PrivacyControlDetail,
 )
-def get_privacy_control(control_id: str):
-    svc = PrivacyCatalogService()
-    ctrl = svc.get_control(control_id)
-    if not ctrl:
-        raise HTTPException(status_code=404, detail="Control not found")
-    return ctrl
+def get_privacy_control(control_id: str, request: Request, resolve: bool = False):
+    """
+    Detailansicht inkl. aufgelöster Links (back-matter-Resources, verwandte
+    Controls). `resolve=true` ersetzt Param-Einfügemarken in der Prosa.
+    """
+    def build():
+        svc = PrivacyCatalogService()
+        ctrl = svc.get_control(control_id, resolve=resolve)
+        if not ctrl:
+            raise HTTPException(status_code=404, detail="Control not found")
+        return ctrl
+
+    # aufgelöste Links/Params hängen auch von Katalog und verlinkten Controls ab
+    etag = item_etag(request, settings.PRIVACY_CATALOG_NAME, control_id, resolved=True)
+    return cached_json_response(request, settings.PRIVACY_CATALOG_NAME, build, etag=etag)
 
 
 @router.put(
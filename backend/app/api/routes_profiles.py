@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from ..services.catalog_registry import registry
+from ..services.catalog_utils import iter_catalog_controls
+from ..services.profile_resolver import ProfileResolutionError, profile_resolver
+from ..services.response_cache import cached_json_response
+
+router = APIRouter(prefix="/api/profiles", tags=["profiles"])
+
+
+def _resolution_key(name: str) -> str:
+    try:
+        return profile_resolver.resolution_key(name)
+    except ValueError as e:
+        # unbekannter Name, Import nicht gefunden, Import-Zyklus …
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _resolve(name: str):
+    try:
+        return profile_resolver.resolve(name)
+    except ProfileResolutionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("", response_model=dict)
+def list_profiles():
+    items = []
+    for name in registry.names(doc_type="profile"):
+        # große Dokumente werden nicht geparst (nur Name)
+        profile = {} if registry.is_large(name) else registry.get(name).get("profile") or {}
+        items.append(
+            {
+                "name": name,
+                "title": (profile.get("metadata") or {}).get("title", name),
+                "imports": [imp.get("href") for imp in profile.get("imports", []) or []],
+            }
+        )
+    return {"items": items}
+
+
+@router.get("/{name}/resolved", response_model=dict)
+def get_resolved_profile(name: str, request: Request):
+    """
+    Aufgelöster Katalog (imports → merge → modify). Memoisiert je Revision von
+    Profil und importierten Dokumenten.
+    """
+    key = _resolution_key(name)
+    return cached_json_response(request, name, lambda: _resolve(name), revision=key)
+
+
+@router.get("/{name}/resolved/controls", response_model=dict)
+def list_resolved_controls(name: str, request: Request):
+    """Kompakte Liste der Controls der aufgelösten Baseline."""
+    key = _resolution_key(name)
+
+    def build():
+        resolved = _resolve(name)
+        return {
+            "items": [
+                {"id": ctrl.get("id"), "title": ctrl.get("title", ""), "groupId": group_id, "parentId": parent_id}
+                for group_id, parent_id, ctrl in iter_catalog_controls(resolved)
+            ]
+        }
+
+    return cached_json_response(request, name, build, revision=key)
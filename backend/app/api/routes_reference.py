@@ -0,0 +1,59 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..models import ReferenceControlDetail
+from ..services.catalog_registry import registry
+from ..services.reference_catalog_service import ReferenceCatalogService
+
+router = APIRouter(prefix="/api/reference", tags=["reference-catalog"])
+
+
+def _service(name: str) -> ReferenceCatalogService:
+    try:
+        return ReferenceCatalogService(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("", response_model=dict)
+def list_reference_catalogs():
+    """Alle Kataloge der Registry; `large` = wird nur per Streaming-Import gelesen."""
+    items = [
+        {"name": name, "large": registry.is_large(name)}
+        for name in registry.names(doc_type="catalog")
+    ]
+    return {"items": items}
+
+
+@router.get("/{name}/groups", response_model=dict)
+def list_reference_groups(name: str):
+    return {"items": _service(name).list_groups()}
+
+
+@router.get("/{name}/controls", response_model=dict)
+def list_reference_controls(
+    name: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    groupId: Optional[str] = None,
+):
+    total, items = _service(name).list_controls(offset=offset, limit=limit, group_id=groupId)
+    return {"total": total, "offset": offset, "items": items}
+
+
+@router.get("/{name}/controls/{control_id}", response_model=ReferenceControlDetail)
+def get_reference_control(name: str, control_id: str):
+    ctrl = _service(name).get_control(control_id)
+    if not ctrl:
+        raise HTTPException(status_code=404, detail="Control not found")
+    return ctrl
+
+
+@router.get("/{name}/search", response_model=dict)
+def search_reference_controls(
+    name: str,
+    q: str,
+    limit: int = Query(50, ge=1, le=500),
+):
+    return {"items": _service(name).search(q, limit=limit)}
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter
+
+from ..services.catalog_registry import registry
+from ..services.snapshot_store import snapshot_store
+
+router = APIRouter(prefix="/api/registry", tags=["registry"])
+
+
+@router.get("", response_model=dict)
+def list_documents(type: Optional[str] = None):
+    """
+    Alle gefundenen OSCAL-Dokumente inkl. Ladezustand und geschätztem
+    Speicherbedarf (Dokument + Indexe).
+    """
+    items = [doc for doc in registry.report() if type is None or doc["type"] == type]
+    return {
+        "items": items,
+        "totalBytes": sum(doc["memoryBytes"] for doc in items),
+        "maxBytes": registry.max_bytes,
+    }
+
+
+@router.post("/rescan", response_model=dict)
+def rescan_documents():
+    """Durchsucht die Repo-Verzeichnisse erneut nach (neuen) OSCAL-Dokumenten."""
+    registry.scan()
+    return {"items": registry.names()}
+
+
+@router.get("/metrics", response_model=dict)
+def get_registry_metrics():
+    """
+    Single-Flight-Metriken des Ladepfads je Art (document, index, file-index):
+    tatsächliche Ausführungen, mitgenutzte (wartende) Aufrufe, aktuell
+    laufende Ladevorgänge und die bisher größte Zahl Wartender.
+    """
+    return {"singleFlight": registry.metrics()}
+
+
+@router.get("/snapshots", response_model=dict)
+def get_snapshots():
+    """Binäre Snapshots für den Kaltstart: Dateien, Quellen und Treffer-Zähler."""
+    return snapshot_store.status()
+
+
+@router.post("/snapshots", response_model=dict)
+def write_snapshots():
+    """Schreibt Snapshots aller geladenen Dokumente und angemeldeten Indexe."""
+    return {"items": snapshot_store.save_all()}
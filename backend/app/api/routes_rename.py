@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+
+from ..models import RenameRequest, RenameResult
+from ..services.file_service import TransactionError
+from ..services.rename_service import RenameConflict, RenameService
+
+router = APIRouter(prefix="/api/controls", tags=["rename"])
+
+
+@router.post("/{control_id}/rename", response_model=RenameResult)
+def rename_control(control_id: str, req: RenameRequest):
+    """
+    Benennt ein Control um und schreibt alle Verweise in allen Dokumenten
+    mit um (Mappings, related-mapping-Props, Part-IDs, Links, Erwähnungen).
+    Mit previewOnly (Standard) nur die vollständige Liste der Fundstellen;
+    sonst alles in einer Transaktion (409 bei Konflikt).
+    """
+    new_id = req.newId.strip()
+    if not new_id or any(c.isspace() for c in new_id) or "#" in new_id:
+        raise HTTPException(status_code=400, detail="Invalid control ID")
+
+    try:
+        return RenameService().rename(control_id, new_id, preview_only=req.previewOnly)
+    except (RenameConflict, TransactionError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
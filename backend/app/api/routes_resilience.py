@@ -1,69 +1,74 @@
-from fastapi import APIRouter, HTTPException
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException, Request
 
 from ..models import SecurityControl, SecurityControlUpdateRequest
 from ..services.file_service import FileService
+from ..services.response_cache import cached_json_response, item_etag
 from ..services.resilience_catalog_service import ResilienceCatalogService
 from ..config import settings
 
 router = APIRouter(prefix="/api/resilience", tags=["resilience"])
 
 
-@router.get("/controls", response_model=dict)
-def list_resilience_controls():
-    fs = FileService()
+_NOT_FOUND = "resilience_baseline_catalog.json not found – check config.py and data/ path"
+
+
+def _load_service() -> ResilienceCatalogService:
+    """Lesen über das gecachte Dokument der Registry."""
     try:
-        content = fs.read_text(settings.RESILIENCE_CATALOG_NAME)
+        return ResilienceCatalogService(FileService().load_json(settings.RESILIENCE_CATALOG_NAME))
     except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="resilience_baseline_catalog.json not found – check config.py and data/ path",
-        )
-
-    service = ResilienceCatalogService.from_json_str(content)
-    items = service.list_controls()
-    return {"items": items}
+        raise HTTPException(status_code=500, detail=_NOT_FOUND)
 
 
-@router.get("/controls/{control_id}", response_model=SecurityControl)
-def get_resilience_control(control_id: str):
-    fs = FileService()
+@contextmanager
+def _editing_service() -> Iterator[ResilienceCatalogService]:
+    """
+    Bearbeiten unter dem Dokument-Lock auf dem geteilten Stand; der Service
+    baut per Copy-on-Write eine neue Wurzel, die am Ende geschrieben wird.
+    """
     try:
-        content = fs.read_text(settings.RESILIENCE_CATALOG_NAME)
+        with FileService().editing(settings.RESILIENCE_CATALOG_NAME) as editor:
+            service = ResilienceCatalogService(editor.base)
+            yield service
+            editor.root = service.raw
     except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="resilience_baseline_catalog.json not found – check config.py and data/ path",
-        )
+        raise HTTPException(status_code=500, detail=_NOT_FOUND)
 
-    service = ResilienceCatalogService.from_json_str(content)
-    control = service.get_control(control_id)
-    if not control:
-        raise HTTPException(status_code=404, detail="Security control not found")
-    return control
 
+@router.get("/controls", response_model=dict)
+def list_resilience_controls(request: Request):
+    def build():
+        service = _load_service()
+        return {"items": service.list_controls()}
 
-@router.put("/controls/{control_id}", response_model=SecurityControl)
-def update_resilience_control(control_id: str, req: SecurityControlUpdateRequest):
-    fs = FileService()
-    try:
-        content = fs.read_text(settings.RESILIENCE_CATALOG_NAME)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="resilience_baseline_catalog.json not found – check config.py and data/ path",
-        )
+    return cached_json_response(request, settings.RESILIENCE_CATALOG_NAME, build)
+
+
+@router.get("/controls/{control_id}", response_model=SecurityControl)
+def get_resilience_control(control_id: str, request: Request):
+    def build():
+        service = _load_service()
+        control = service.get_control(control_id)
+        if not control:
+            raise HTTPException(status_code=404, detail="Security control not found")
+        return control
 
-    service = ResilienceCatalogService.from_json_str(content)
+    etag = item_etag(request, settings.RESILIENCE_CATALOG_NAME, control_id)
+    return cached_json_response(request, settings.RESILIENCE_CATALOG_NAME, build, etag=etag)
 
+
+@router.put("/controls/{control_id}", response_model=SecurityControl)
+def update_resilience_control(control_id: str, req: SecurityControlUpdateRequest):
     try:
-        updated = service.update_control(
-            control_id,
-            updates=req.dict(exclude_unset=True),
-        )
+        with _editing_service() as service:
+            updated = service.update_control(
+                control_id,
+                updates=req.dict(exclude_unset=True),
+            )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    new_content = service.to_json_str()
-    fs.write_text(settings.RESILIENCE_CATALOG_NAME, new_content)
-
     return updated
@@ -1,74 +1,85 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from ..models import SdmControlDetail, SdmControlUpdateRequest
-from ..services.file_service import FileService
+from ..models import SdmControlDetail, SdmControlUpdateRequest, SdmSecurityMapping, SdmSecurityMappingUpdateRequest
+from ..services.file_service import TransactionError
+from ..services.response_cache import cached_json_response, item_etag
 from ..services.sdm_catalog_service import SdmCatalogService
 from ..config import settings
 
 router = APIRouter(prefix="/api/sdm", tags=["sdm"])
 
 
-@router.get("/controls", response_model=dict)
-def list_sdm_controls():
-    fs = FileService()
+def _load_service() -> SdmCatalogService:
+    return SdmCatalogService()
+
+
+def _build(build):
     try:
-        content = fs.read_text(settings.SDM_PRIVACY_CATALOG_NAME)
+        return build()
     except FileNotFoundError:
         raise HTTPException(
             status_code=500,
             detail="sdm_privacy_catalog.json not found – check config.py and data/ path",
         )
 
-    service = SdmCatalogService.from_json_str(content)
-    items = service.list_controls()
-    return {"items": items}
+
+@router.get("/controls", response_model=dict)
+def list_sdm_controls(request: Request, includeNested: bool = False):
+    """Props-Sicht: Modul, Ziele, DSGVO-Artikel (optional inkl. Unter-Controls)."""
+    def build():
+        service = _load_service()
+        return {"items": service.list_controls(include_nested=includeNested)}
+
+    return cached_json_response(request, settings.SDM_PRIVACY_CATALOG_NAME, lambda: _build(build))
 
 
 @router.get("/controls/{control_id}", response_model=SdmControlDetail)
-def get_sdm_control(control_id: str):
-    fs = FileService()
-    try:
-        content = fs.read_text(settings.SDM_PRIVACY_CATALOG_NAME)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_catalog.json not found – check config.py and data/ path",
-        )
+def get_sdm_control(control_id: str, request: Request):
+    def build():
+        service = _load_service()
+        control = service.get_control(control_id)
+        if not control:
+            raise HTTPException(status_code=404, detail="Control not found")
+        return control
 
-    service = SdmCatalogService.from_json_str(content)
-    control = service.get_control(control_id)
-    if not control:
-        raise HTTPException(status_code=404, detail="Control not found")
-    return control
+    etag = item_etag(request, settings.SDM_PRIVACY_CATALOG_NAME, control_id)
+    return cached_json_response(request, settings.SDM_PRIVACY_CATALOG_NAME, lambda: _build(build), etag=etag)
 
 
 @router.put("/controls/{control_id}", response_model=SdmControlDetail)
 def update_sdm_control(control_id: str, req: SdmControlUpdateRequest):
     """
-    Aktualisiert Props für ein SDM-Control und persistiert die Änderungen
-    direkt in sdm_privacy_catalog.json.
+    Aktualisiert Props für ein SDM-Control (related-mappings, Umsetzungsgrad,
+    Risiko) und persistiert die Änderungen in sdm_privacy_catalog.json.
     """
-    fs = FileService()
+    service = _load_service()
     try:
-        content = fs.read_text(settings.SDM_PRIVACY_CATALOG_NAME)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=500,
-            detail="sdm_privacy_catalog.json not found – check config.py and data/ path",
-        )
-
-    service = SdmCatalogService.from_json_str(content)
-
-    try:
-        updated_control = service.update_control_props(
+        return service.update_control_props(
             control_id,
             props_update=req.props.dict(exclude_unset=True),
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    # neuen Katalog zurückschreiben
-    new_content = service.to_json_str()
-    fs.write_text(settings.SDM_PRIVACY_CATALOG_NAME, new_content)
 
-    return updated_control
+@router.put("/controls/{control_id}/mapping", response_model=dict)
+def update_sdm_control_mapping(control_id: str, req: SdmSecurityMappingUpdateRequest):
+    """
+    Ersetzt das Security-Mapping eines SDM-Controls und zieht dessen
+    related-mapping-Props (bsi/iso27001/iso27701) nach – Mapping-Datei und
+    Katalog werden gemeinsam geschrieben (409, wenn die Validierung scheitert).
+    """
+    mapping = SdmSecurityMapping(
+        sdmControlId=control_id,
+        sdmTitle=req.sdmTitle,
+        securityControls=req.securityControls,
+        standards=req.standards,
+        notes=req.notes,
+    )
+    service = _load_service()
+    try:
+        return service.update_mapping(control_id, mapping)
+    except TransactionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
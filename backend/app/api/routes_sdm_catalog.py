@@ -1,38 +1,47 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from ..models import SdmTomControlSummary, SdmTomControlDetail
-from ..services.sdm_privacy_catalog_service import SdmPrivacyCatalogService
+from ..models import SdmTomControlDetail
+from ..services.response_cache import cached_json_response, item_etag
+from ..services.sdm_catalog_service import SdmCatalogService
+from ..config import settings
 
-router = APIRouter(prefix="/api/sdm", tags=["sdm-privacy-catalog"])
+# Prosa-Sicht auf denselben Katalog wie routes_sdm (Beschreibung, Umsetzungshinweise)
+router = APIRouter(prefix="/api/sdm/prose", tags=["sdm-privacy-catalog"])
 
 
 @router.get("/controls", response_model=dict)
-def list_sdm_controls():
-    svc = SdmPrivacyCatalogService()
-    items = svc.list_controls()
-    return {"items": items}
+def list_sdm_prose_controls(request: Request, includeNested: bool = False):
+    def build():
+        svc = SdmCatalogService()
+        return {"items": svc.list_prose_controls(include_nested=includeNested)}
+
+    return cached_json_response(request, settings.SDM_PRIVACY_CATALOG_NAME, build)
 
 
 @router.get(
     "/controls/{control_id}",
     response_model=SdmTomControlDetail,
 )
-def get_sdm_control(control_id: str):
-    svc = SdmPrivacyCatalogService()
-    ctrl = svc.get_control(control_id)
-    if not ctrl:
-        raise HTTPException(status_code=404, detail="Control not found")
-    return ctrl
+def get_sdm_prose_control(control_id: str, request: Request):
+    def build():
+        svc = SdmCatalogService()
+        ctrl = svc.get_prose_control(control_id)
+        if not ctrl:
+            raise HTTPException(status_code=404, detail="Control not found")
+        return ctrl
+
+    etag = item_etag(request, settings.SDM_PRIVACY_CATALOG_NAME, control_id)
+    return cached_json_response(request, settings.SDM_PRIVACY_CATALOG_NAME, build, etag=etag)
 
 
 @router.put(
     "/controls/{control_id}",
     response_model=dict,
 )
-def update_sdm_control(control_id: str, data: SdmTomControlDetail):
-    svc = SdmPrivacyCatalogService()
+def update_sdm_prose_control(control_id: str, data: SdmTomControlDetail):
+    svc = SdmCatalogService()
     try:
-        result = svc.update_control(control_id, data)
+        result = svc.update_prose_control(control_id, data)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     return result
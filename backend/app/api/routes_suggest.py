@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..services.suggest_service import KINDS, SuggestService
+
+router = APIRouter(prefix="/api/suggest", tags=["suggest"])
+
+
+@router.get("", response_model=dict)
+def suggest(
+    q: str = Query(..., min_length=1),
+    kinds: Optional[str] = Query(None, description="Kommagetrennt: " + ", ".join(KINDS)),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Typeahead für Control-IDs (SDM, Privacy, SEC) und Standard-Codes
+    (BSI-Bausteine, ISO 27001/27701) inkl. Titel, nach Relevanz sortiert.
+    """
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    if kind_list:
+        unknown = sorted(set(kind_list) - set(KINDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown kinds: {', '.join(unknown)}")
+    return {"items": SuggestService().suggest(q, kind_list, limit)}
@@ -0,0 +1,70 @@
+import json
+
+from fastapi import APIRouter, HTTPException
+
+from ..models import TransactionRequest, TransactionResult, trusted
+from ..services import diff_service
+from ..services.file_service import FileService, TransactionError
+from ..services.json_patch import apply_patch_copy
+
+router = APIRouter(prefix="/api/transactions", tags=["transactions"])
+
+
+class _Conflict(ValueError):
+    pass
+
+
+@router.post("", response_model=TransactionResult)
+def commit_transaction(req: TransactionRequest):
+    """
+    Ändert mehrere Dokumente (Katalog- und Mapping-Dateien) in einem Schritt:
+    je Dokument JSON-Patch oder vollständiger Inhalt, optional gegen eine
+    erwartete Revision geprüft. Die neuen Stände werden gemeinsam validiert
+    und alles-oder-nichts geschrieben (400 ungültig, 409 Konflikt/Validierung).
+    """
+    names = [change.name for change in req.changes]
+    if not names:
+        raise HTTPException(status_code=400, detail="No changes given")
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Each document may appear only once")
+
+    fs = FileService()
+    try:
+        for name in names:
+            fs.require_core(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    try:
+        with fs.transaction(names, op=req.op) as tx:
+            for change in req.changes:
+                editor = tx.editor(change.name)
+                if change.baseRevision is not None and change.baseRevision != fs.revision(change.name):
+                    raise _Conflict(f"{change.name} was changed in the meantime")
+                if change.content is not None:
+                    tx.stage(change.name, json.loads(change.content), change.content)
+                elif change.patch is not None:
+                    try:
+                        tx.stage(change.name, apply_patch_copy(editor.base, change.patch))
+                    except ValueError as e:
+                        raise _Conflict(f"{change.name}: {e}")
+                else:
+                    raise ValueError(f"{change.name}: either patch or content is required")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (_Conflict, TransactionError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        # ungültiges JSON, fehlende Änderung
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return trusted(
+        TransactionResult,
+        id=tx.id,
+        committed=tx.committed,
+        revisions={name: fs.revision(name) for name in tx.editors},
+        diffs={
+            name: diff_service.diff_json(tx.editors[name].base, tx.editors[name].root, name)
+            for name in tx.committed
+        },
+    )
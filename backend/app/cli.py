@@ -0,0 +1,94 @@
+"""
+Kommandozeile der Workbench (aus backend/ heraus):
+
+    python -m app.cli duplicates --threshold 0.8 --part-names typical-measures
+    python -m app.cli snapshot
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from .services.catalog_registry import registry
+from .services.duplicate_service import DuplicateService
+from .services.snapshot_store import snapshot_store
+from .services.suggest_service import SuggestService
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
+def cmd_duplicates(args: argparse.Namespace) -> int:
+    service = DuplicateService()
+    try:
+        result = service.find_clusters(
+            threshold=args.threshold,
+            catalogs=_split(args.catalogs),
+            part_names=set(_split(args.part_names) or []) or None,
+            min_words=args.min_words,
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        stats = result["stats"]
+        print(
+            f"{stats['parts']} Parts, {stats['candidatePairs']} Kandidatenpaare, "
+            f"{stats['pairs']} Paare >= {args.threshold}, {len(result['items'])} Cluster"
+        )
+        for n, cluster in enumerate(result["items"], 1):
+            kind = "identisch" if cluster["exact"] else f"{cluster['minSimilarity']:.2f}–{cluster['maxSimilarity']:.2f}"
+            print(f"\n[{n}] {cluster['size']} Parts ({kind})")
+            for member in cluster["members"]:
+                excerpt = " ".join(member["prose"].split())
+                if len(excerpt) > 80:
+                    excerpt = excerpt[:77] + "..."
+                print(f"  {member['catalog']}:{member['controlId']}/{member['partName']}  {excerpt}")
+    # Exit-Code 1, wenn Duplikate gefunden wurden (für CI-Checks)
+    return 1 if result["items"] and args.fail_on_duplicates else 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    if not snapshot_store.enabled:
+        print("error: snapshots are disabled (OG_SNAPSHOTS=0)", file=sys.stderr)
+        return 2
+    names = [name for name in registry.names() if not registry.is_large(name)] if args.all else None
+    snapshot_store.preload(names)
+    # Typeahead-Index aufbauen, damit er mitgeschrieben wird
+    SuggestService().suggest("a")
+    for key in snapshot_store.save_all():
+        print(key)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="OpenGov OSCAL Workbench")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dup = sub.add_parser("duplicates", help="nahezu gleiche Prosa über die Kataloge finden")
+    dup.add_argument("--threshold", type=float, default=0.8, help="min. geschätzte Jaccard-Ähnlichkeit")
+    dup.add_argument("--catalogs", help="kommagetrennte Katalognamen (Standard: alle)")
+    dup.add_argument("--part-names", help="kommagetrennte Part-Namen, z.B. typical-measures")
+    dup.add_argument("--min-words", type=int, default=None, help="kürzere Prosa ignorieren")
+    dup.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    dup.add_argument("--fail-on-duplicates", action="store_true", help="Exit-Code 1 bei Treffern")
+    dup.set_defaults(func=cmd_duplicates)
+
+    snap = sub.add_parser("snapshot", help="binäre Snapshots für den Kaltstart schreiben")
+    snap.add_argument("--all", action="store_true", help="alle Dokumente statt nur der Kern-Dateien")
+    snap.set_defaults(func=cmd_snapshot)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[2]  # .../backend
 DATA_DIR = BASE_DIR / "data"
+# Laufzeit-Zustand der Workbench (Indexe, Journale, Snapshots) – nicht versioniert
+STATE_DIR = Path(os.environ.get("OG_WORKBENCH_STATE_PATH", BASE_DIR / ".workbench"))
 
 class Settings:
    # PRIVACY_OSCAL_PATH: Path = Path(
@@ -25,9 +27,64 @@ class Settings:
 
     RESILIENCE_CATALOG_NAME = "resilience_baseline_catalog"
     RESILIENCE_CATALOG_FILE = SECURITY_OSCAL_PATH / "oscal" / "catalog" / "resilience_baseline_catalog.json"
+    # catalog_id, unter dem die Mappings auf diesen Katalog verweisen
+    RESILIENCE_CATALOG_ID = "opengov-resilience-baseline"
 
     SDM_MAPPING_NAME = "sdm_privacy_to_security"
     SDM_MAPPING_FILE = SECURITY_OSCAL_PATH / "mappings" / "sdm_privacy_to_security.json"
 
+    # Catalog-Registry: diese Verzeichnisse werden nach OSCAL-Dokumenten durchsucht
+    CATALOG_SCAN_PATHS = [PRIVACY_OSCAL_PATH, SECURITY_OSCAL_PATH]
+    # Speicherbudget für geparste Dokumente + Indexe (angepinnte Kern-Dateien zählen mit, werden aber nie verdrängt)
+    CATALOG_CACHE_MAX_BYTES: int = int(os.environ.get("OG_CATALOG_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Kataloge ab dieser Größe werden read-only per Streaming-Import indexiert
+    LARGE_DOCUMENT_BYTES: int = int(os.environ.get("OG_LARGE_DOCUMENT_BYTES", str(8 * 1024 * 1024)))
+    # Prosa-Ablage der Streaming-Importe (außerhalb des Arbeitsspeichers)
+    REFERENCE_STORE_PATH: Path = STATE_DIR / "reference"
+
+    # Response-Cache für fertig serialisierte List-/Detail-Antworten
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.environ.get("OG_RESPONSE_CACHE_MAX_ENTRIES", "256"))
+    RESPONSE_CACHE_MIN_COMPRESS_BYTES: int = 1024
+
+    # Write-Behind-Journal: Änderungen werden als Patch-Record (fsync) journalisiert,
+    # die Datei selbst wird gebündelt geschrieben – nach IDLE ms ohne weitere
+    # Änderung, spätestens aber MAX_DELAY ms nach der ersten ungeschriebenen.
+    # Standardmäßig aus: noch nicht geschriebene Stände sieht nur der eigene
+    # Prozess – mit mehreren Workern (--workers N) nur bewusst einschalten.
+    WRITE_BEHIND_ENABLED: bool = os.environ.get("OG_WRITE_BEHIND", "0") in ("1", "true", "yes")
+    WRITE_BEHIND_IDLE_MS: int = int(os.environ.get("OG_WRITE_BEHIND_IDLE_MS", "500"))
+    WRITE_BEHIND_MAX_DELAY_MS: int = int(os.environ.get("OG_WRITE_BEHIND_MAX_DELAY_MS", "5000"))
+    JOURNAL_PATH: Path = STATE_DIR / "journal"
+    # Records laufender Mehrdatei-Transaktionen (Recovery beim Start)
+    TRANSACTION_PATH: Path = STATE_DIR / "transactions"
+
+    # Undo/Redo: Benutzer kommt aus diesem Header (sonst "anonymous"),
+    # Verlauf je Benutzer und Anzahl gehaltener Benutzer sind begrenzt
+    HISTORY_USER_HEADER: str = "X-Workbench-User"
+    HISTORY_MAX_ENTRIES: int = int(os.environ.get("OG_HISTORY_MAX_ENTRIES", "100"))
+    HISTORY_MAX_USERS: int = int(os.environ.get("OG_HISTORY_MAX_USERS", "64"))
+
+    # Duplikaterkennung (MinHash/LSH) über parts[].prose: Wort-Shingles der
+    # Länge SHINGLE_SIZE, NUM_PERM Hashes in BANDS Bändern (Schwelle der LSH
+    # ~ (1/BANDS)^(BANDS/NUM_PERM)), kürzere Prosa als MIN_WORDS wird ignoriert
+    DUPLICATE_SHINGLE_SIZE: int = 3
+    DUPLICATE_NUM_PERM: int = 128
+    DUPLICATE_BANDS: int = 32
+    DUPLICATE_MIN_WORDS: int = int(os.environ.get("OG_DUPLICATE_MIN_WORDS", "8"))
+
+    # Debug: intern gebaute Antwort-Modelle voll validieren (sonst model_construct)
+    # und gecachte Antworten zusätzlich gegen das response_model der Route prüfen
+    VALIDATE_MODELS: bool = os.environ.get("OG_VALIDATE_MODELS", "0") in ("1", "true", "yes")
+
+    # Delta-Sync: gehaltene Einträge des Änderungsprotokolls je Dokument.
+    # Das Protokoll ist prozesslokal – Deltas gibt es nur mit einem Worker,
+    # mit --workers N liefert /api/changes stets die vollständige Liste.
+    CHANGE_LOG_MAX_ENTRIES: int = int(os.environ.get("OG_CHANGE_LOG_MAX_ENTRIES", "1000"))
+
+    # Binäre Snapshots geparster Dokumente/Indexe für den Kaltstart der Worker
+    SNAPSHOT_ENABLED: bool = os.environ.get("OG_SNAPSHOTS", "1") not in ("0", "false", "no")
+    SNAPSHOT_PATH: Path = STATE_DIR / "snapshots"
+
 
 settings = Settings()
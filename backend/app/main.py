@@ -1,13 +1,41 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import routes_sdm, routes_files, routes_resilience, routes_mapping
-from .api import routes_privacy_catalog, routes_sdm_catalog
+from .api import routes_privacy_catalog, routes_sdm_catalog, routes_export
+from .api import routes_coverage, routes_registry, routes_reference, routes_profiles
+from .api import routes_assessment, routes_journal, routes_history, routes_suggest
+from .api import routes_duplicates, routes_changes, routes_bootstrap, routes_transactions
+from .api import routes_rename
+from .config import settings
+from .services.edit_journal import journal
+from .services.history_service import current_user
+from .services.snapshot_store import snapshot_store
+from .services.transaction_log import transaction_log
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # unterbrochene Mehrdatei-Transaktionen abschließen, dann Edits, die vor
+    # einem Absturz nur im Journal landeten, nachziehen
+    transaction_log.recover()
+    journal.recover()
+    # Kern-Dokumente vorab laden (aus Snapshots statt JSON-Parse)
+    snapshot_store.preload()
+    yield
+    # offene Write-Behind-Stände schreiben
+    journal.close()
+    # Snapshots für den nächsten Start (inkl. Typeahead-Index) aktualisieren
+    snapshot_store.save_all()
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="OpenGov OSCAL Workbench API",
-        version="0.1.0"
+        version="0.1.0",
+        lifespan=lifespan,
     )
 
     # CORS fürs Frontend (lokal)
@@ -19,6 +47,15 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.middleware("http")
+    async def bind_user(request: Request, call_next):
+        # Benutzer für Undo/Redo-Verlauf (ohne Header: kein Verlauf)
+        token = current_user.set(request.headers.get(settings.HISTORY_USER_HEADER) or None)
+        try:
+            return await call_next(request)
+        finally:
+            current_user.reset(token)
+
     @app.get("/")
     def root():
         return {
@@ -37,6 +74,20 @@ def create_app() -> FastAPI:
     app.include_router(routes_mapping.router)
     app.include_router(routes_privacy_catalog.router)
     app.include_router(routes_sdm_catalog.router)
+    app.include_router(routes_export.router)
+    app.include_router(routes_coverage.router)
+    app.include_router(routes_registry.router)
+    app.include_router(routes_reference.router)
+    app.include_router(routes_profiles.router)
+    app.include_router(routes_assessment.router)
+    app.include_router(routes_journal.router)
+    app.include_router(routes_history.router)
+    app.include_router(routes_suggest.router)
+    app.include_router(routes_duplicates.router)
+    app.include_router(routes_changes.router)
+    app.include_router(routes_bootstrap.router)
+    app.include_router(routes_transactions.router)
+    app.include_router(routes_rename.router)
 
     return app
 
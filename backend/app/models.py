@@ -1,6 +1,23 @@
-from typing import List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal, Type, TypeVar
 from pydantic import BaseModel
 
+from .config import settings
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def trusted(model: Type[M], **data: Any) -> M:
+    """
+    Baut ein Antwort-Modell aus intern erzeugten, bereits typgerechten Daten
+    ohne erneute Validierung (model_construct). Verschachtelte Modelle müssen
+    dabei schon als Modell-Instanzen übergeben werden. Mit
+    settings.VALIDATE_MODELS wird wie gewohnt validiert.
+    """
+    if settings.VALIDATE_MODELS:
+        return model(**data)
+    return model.model_construct(**data)
+
 
 class RelatedMapping(BaseModel):
     scheme: str  # "bsi" | "iso27001" | "iso27701" | ...
@@ -18,6 +35,7 @@ class SdmControlSummary(BaseModel):
     id: str
     title: str
     groupId: Optional[str] = None
+    parentId: Optional[str] = None      # bei verschachtelten Controls
     props: SdmControlSummaryProps
 
 
@@ -32,6 +50,7 @@ class SdmControlDetail(BaseModel):
     title: str
     class_: Optional[str] = None
     groupId: Optional[str] = None
+    parentId: Optional[str] = None
     props: SdmControlDetailProps
 
 
@@ -155,6 +174,20 @@ class SdmSecurityMappingUpdateRequest(BaseModel):
     standards: MappingStandards = MappingStandards()
     notes: Optional[str] = None
 
+
+class MappingSuggestion(BaseModel):
+    catalogId: str
+    controlId: str
+    title: Optional[str] = None
+    score: float            # Kosinus-Ähnlichkeit 0..1
+
+
+class MappingSuggestionList(BaseModel):
+    controlId: str
+    source: str             # "sdm" | "privacy"
+    alreadyMapped: List[str] = []
+    suggestions: List[MappingSuggestion] = []
+
 #oscal privacy models
 
 
@@ -195,6 +228,22 @@ class PrivacyControlSummary(BaseModel):
     dp_goals: List[str] = []
 
 
+class ResolvedLink(BaseModel):
+    href: str
+    rel: Optional[str] = None
+    text: Optional[str] = None
+    targetType: Literal["resource", "control", "external", "unresolved"] = "unresolved"
+    targetId: Optional[str] = None  # Resource-UUID bzw. Control-ID
+    title: Optional[str] = None
+    urls: List[str] = []
+
+
+class ResolvedParam(BaseModel):
+    id: str
+    label: Optional[str] = None
+    value: Optional[str] = None     # Wert bzw. Auswahl/Label als Platzhalter
+
+
 class PrivacyControlDetail(BaseModel):
     id: str
     title: str
@@ -213,6 +262,10 @@ class PrivacyControlDetail(BaseModel):
     assessment_questions: List[str] = []
     risk_hint: Optional[str] = None
 
+    # aufgelöst über den Resolution-Index (nur lesend, beim Speichern ignoriert)
+    links: List[ResolvedLink] = []
+    params: List[ResolvedParam] = []
+
 class SdmTomControlSummary(BaseModel):
     id: str
     title: str
@@ -231,3 +284,227 @@ class SdmTomControlDetail(BaseModel):
     description: Optional[str] = None
     implementation_hints: Optional[str] = None
 
+
+#coverage models
+
+class CoverageTarget(BaseModel):
+    id: str             # z.B. "CON.2", "A.8.10", "SEC-LOGGING-01"
+    refCount: int       # Anzahl SDM-Controls, die darauf verweisen
+
+
+class CoverageBucket(BaseModel):
+    key: str                              # SDM-Gewährleistungsziel bzw. SDM-Baustein
+    controlCount: int
+    covered: Dict[str, int] = {}          # scheme → Anzahl abgedeckter Controls
+    gaps: Dict[str, List[str]] = {}       # scheme → Control-IDs ohne Abdeckung
+
+
+class CoverageReport(BaseModel):
+    revision: str
+    schemes: List[str]
+    controlCount: int
+    covered: Dict[str, int] = {}
+    uncoveredControls: Dict[str, List[str]] = {}
+    byGoal: List[CoverageBucket] = []
+    byModule: List[CoverageBucket] = []
+    targets: Dict[str, List[CoverageTarget]] = {}
+    unreferencedSecurityControls: List[str] = []
+
+#registry models
+
+class RegistryDocument(BaseModel):
+    name: str
+    type: str                     # "catalog" | "profile" | "mapping" | ...
+    path: str
+    pinned: bool = False          # Kern-Dateien, werden nie aus dem Cache verdrängt
+    loaded: bool = False
+    revision: Optional[str] = None
+    documentBytes: int = 0        # geschätzter Speicherbedarf des geparsten Dokuments
+    indexBytes: Dict[str, int] = {}
+    memoryBytes: int = 0
+
+#reference catalog models (große, read-only Kataloge)
+
+class ReferenceGroupSummary(BaseModel):
+    id: str
+    title: str
+    controlCount: int = 0
+
+
+class ReferenceControlSummary(BaseModel):
+    id: str
+    title: str
+    groupId: Optional[str] = None
+    parentId: Optional[str] = None      # bei Control-Enhancements
+    class_: Optional[str] = None
+
+
+class ReferenceProp(BaseModel):
+    name: str
+    value: str
+
+
+class ReferencePart(BaseModel):
+    id: Optional[str] = None
+    name: str
+    prose: str
+
+
+class ReferenceControlDetail(ReferenceControlSummary):
+    props: List[ReferenceProp] = []
+    parts: List[ReferencePart] = []
+
+#maturity assessment models
+
+class MaturityAssessmentInput(BaseModel):
+    organisation: str
+    levels: Dict[str, int] = {}     # control-id → erreichter Reifegrad (1–5)
+
+
+class MaturityAssessmentRequest(BaseModel):
+    assessments: List[MaturityAssessmentInput]
+    includeControls: bool = False   # Einzelwerte je Control mit ausgeben
+
+
+class MaturityControlScore(BaseModel):
+    id: str
+    achieved: Optional[int] = None
+    target: float
+    gap: float
+    weight: float
+
+
+class MaturityAggregate(BaseModel):
+    key: str                        # Reifegrad-Domäne bzw. Gruppen-ID
+    controlCount: int
+    assessedCount: int
+    meanAchieved: Optional[float] = None
+    meanTarget: Optional[float] = None
+    totalGap: float = 0.0
+    targetReachedRatio: Optional[float] = None
+    riskWeightedScore: Optional[float] = None   # 0–100
+
+
+class MaturityAssessmentResult(BaseModel):
+    organisation: str
+    assessedCount: int
+    unassessedCount: int
+    invalidLevels: Dict[str, str] = {}           # control-id → Grund
+    overall: MaturityAggregate
+    byDomain: List[MaturityAggregate] = []
+    byGroup: List[MaturityAggregate] = []
+    controls: List[MaturityControlScore] = []
+
+
+class MaturityAssessmentResponse(BaseModel):
+    revision: str
+    scale: List[int]
+    results: List[MaturityAssessmentResult] = []
+
+
+#history models
+
+class HistoryEntrySummary(BaseModel):
+    id: int
+    name: str                   # symbolischer Dateiname (erstes Dokument)
+    names: List[str] = []       # alle Dokumente (mehrere bei Transaktionen)
+    op: str                     # z.B. "write_json", "undo"
+    timestamp: float
+    opCount: int                # Anzahl Patch-Operationen der Änderung
+    paths: List[str] = []       # betroffene JSON-Pointer (gekürzt)
+
+
+class HistoryState(BaseModel):
+    user: str
+    undo: List[HistoryEntrySummary] = []    # neueste zuerst
+    redo: List[HistoryEntrySummary] = []
+
+
+#delta sync models
+
+class ChangeLogEntry(BaseModel):
+    revision: int
+    op: str
+    timestamp: float
+    added: List[str] = []
+    changed: List[str] = []
+    removed: List[str] = []
+    full: bool = False
+
+
+class DeltaSyncResponse(BaseModel):
+    name: str
+    epoch: str                  # Prozess-Epoche; bei Abweichung komplett neu laden
+    revision: int               # beim nächsten Aufruf als `since` mitschicken
+    full: bool                  # True: `items` ist die vollständige Liste
+    items: List[Any] = []       # geänderte (bzw. alle) Summaries wie in der Listen-Route
+    removed: List[str] = []
+    changes: List[ChangeLogEntry] = []
+
+
+#bootstrap models
+
+class BootstrapGroup(BaseModel):
+    id: Optional[str] = None
+    title: str = ""
+    controlCount: int = 0                   # Controls direkt in der Gruppe (inkl. verschachtelter)
+    groups: List["BootstrapGroup"] = []
+
+
+class BootstrapCatalog(BaseModel):
+    """Fragment eines Dokuments in GET /api/bootstrap."""
+    name: str
+    type: str                               # catalog | mapping
+    view: str                               # sdm | privacy | resilience | mapping | catalog
+    title: Optional[str] = None
+    revision: str                           # Datei-Revision (wie in /api/files/{name})
+    changeRevision: int                     # Startpunkt für /api/changes/{name}?since=
+    items: List[Any] = []                   # Summaries wie in der Listen-Route
+    groups: List[BootstrapGroup] = []
+    facets: Dict[str, Dict[str, int]] = {}  # Facette → Wert → Anzahl
+
+
+#transaction models
+
+class TransactionChange(BaseModel):
+    """Änderung eines Dokuments in POST /api/transactions."""
+    name: str
+    patch: Optional[List[Dict[str, Any]]] = None    # JSON-Patch auf den aktuellen Stand …
+    content: Optional[str] = None                   # … oder vollständiger neuer Dateitext
+    baseRevision: Optional[str] = None              # erwartete Revision (sonst 409)
+
+
+class TransactionRequest(BaseModel):
+    changes: List[TransactionChange]
+    op: str = "transaction"
+
+
+class TransactionResult(BaseModel):
+    id: Optional[str] = None                # None, wenn sich inhaltlich nichts geändert hat
+    committed: List[str] = []
+    revisions: Dict[str, str] = {}          # neue Revision je beteiligtem Dokument
+    diffs: Dict[str, DiffResult] = {}
+
+
+#rename models
+
+class RenameRequest(BaseModel):
+    newId: str
+    previewOnly: bool = True
+
+
+class RenameOccurrence(BaseModel):
+    document: str
+    path: str                               # JSON-Pointer im Dokument
+    kind: str                               # id | value | link | part-id | mention
+    old: str
+    new: str
+
+
+class RenameResult(BaseModel):
+    oldId: str
+    newId: str
+    mode: Literal["preview", "renamed"]
+    documents: List[str] = []               # betroffene (bzw. geschriebene) Dokumente
+    occurrences: List[RenameOccurrence] = []
+    transactionId: Optional[str] = None
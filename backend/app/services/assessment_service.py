@@ -0,0 +1,254 @@
+import re
+from array import array
+from math import fsum
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+from .catalog_utils import get_prop_values, iter_catalog_controls
+from ..models import (
+    MaturityAggregate,
+    MaturityAssessmentInput,
+    MaturityAssessmentResponse,
+    MaturityAssessmentResult,
+    MaturityControlScore,
+)
+from ..config import settings
+
+
+MATURITY_PARAM_ID = "maturity-level"
+DEFAULT_SCALE: Tuple[int, int] = (1, 5)
+
+# Controls mit Risiko-Szenarien/-Hinweisen zählen im risikogewichteten Score stärker
+RISK_PART_NAMES = ("risk-impact-scenario", "risk-guidance")
+RISK_PART_FACTOR = 1.5
+
+_BOUND = re.compile(r"\$maturity-level\s*(>=|<=)\s*(\d+)")
+_MISSING = float("nan")
+
+
+def _scale_from_params(params: Iterable[Dict]) -> Tuple[int, int]:
+    """Min/Max der Reifegradskala aus den Constraints des globalen Params."""
+    low, high = DEFAULT_SCALE
+    for param in params or []:
+        if param.get("id") != MATURITY_PARAM_ID:
+            continue
+        for constraint in param.get("constraints", []) or []:
+            for test in constraint.get("tests", []) or []:
+                for op, value in _BOUND.findall(test.get("expression", "")):
+                    if op == ">=":
+                        low = int(value)
+                    else:
+                        high = int(value)
+    return low, high
+
+
+def _has_risk_part(parts: List[Dict]) -> bool:
+    for part in parts or []:
+        if part.get("name") in RISK_PART_NAMES or _has_risk_part(part.get("parts", [])):
+            return True
+    return False
+
+
+def _first_float(control: Dict, name: str) -> Optional[float]:
+    for value in get_prop_values(control, name):
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+def _gatherer(index: array, bucket: int) -> Callable[[Sequence[float]], Tuple[float, ...]]:
+    """Liest die Positionen eines Buckets aus einer Spalte (Gather in C via itemgetter)."""
+    positions = [i for i, b in enumerate(index) if b == bucket]
+    if len(positions) == 1:
+        single = positions[0]
+        return lambda col: (col[single],)
+    return itemgetter(*positions)
+
+
+class MaturityModel:
+    """
+    Katalogseitige Daten der Bewertung als spaltenweise, gleich ausgerichtete
+    Arrays (Control-Ordinalzahl = Position): Ziel-Reifegrad, Gewicht, Domänen-
+    und Gruppen-Index. Wird einmal pro Katalog-Revision gebaut; das Scoring
+    einer Organisation läuft dann nur noch über diese Arrays.
+    """
+
+    def __init__(self, document: Dict) -> None:
+        self.scale = _scale_from_params((document.get("catalog") or {}).get("params", []))
+        low, high = self.scale
+
+        self.control_ids: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.targets = array("d")
+        self.weights = array("d")
+        self.domain_index = array("i")
+        self.group_index = array("i")
+        self.domains: List[str] = []
+        self.groups: List[str] = []
+        domain_pos: Dict[str, int] = {}
+        group_pos: Dict[str, int] = {}
+
+        for group_id, _, ctrl in iter_catalog_controls(document):
+            target = _first_float(ctrl, "target-maturity")
+            ctrl_id = ctrl.get("id")
+            if target is None or not ctrl_id or ctrl_id in self.position:
+                continue  # nur Controls mit Soll-Reifegrad werden bewertet
+            target = min(max(target, low), high)
+
+            weight = _first_float(ctrl, "risk-weight")
+            if weight is None:
+                # ohne explizites Gewicht: höherer Soll-Reifegrad = kritischer
+                weight = target / high
+                if _has_risk_part(ctrl.get("parts", [])):
+                    weight *= RISK_PART_FACTOR
+
+            domain = next(iter(get_prop_values(ctrl, "maturity-domain")), None) or "unassigned"
+            group = group_id or "ungrouped"
+
+            self.position[ctrl_id] = len(self.control_ids)
+            self.control_ids.append(ctrl_id)
+            self.targets.append(target)
+            self.weights.append(weight)
+            self.domain_index.append(domain_pos.setdefault(domain, len(domain_pos)))
+            self.group_index.append(group_pos.setdefault(group, len(group_pos)))
+            if len(self.domains) < len(domain_pos):
+                self.domains.append(domain)
+            if len(self.groups) < len(group_pos):
+                self.groups.append(group)
+
+        self.domain_counts = [self.domain_index.count(i) for i in range(len(self.domains))]
+        self.group_counts = [self.group_index.count(i) for i in range(len(self.groups))]
+        self.domain_members = [_gatherer(self.domain_index, i) for i in range(len(self.domains))]
+        self.group_members = [_gatherer(self.group_index, i) for i in range(len(self.groups))]
+
+    def vectorize(self, levels: Dict[str, int]) -> Tuple[array, Dict[str, str]]:
+        """
+        Erreichte Reifegrade als Array in Control-Reihenfolge (NaN = nicht
+        bewertet) plus ungültige Einträge (unbekanntes Control, außerhalb der Skala).
+        """
+        low, high = self.scale
+        achieved = array("d", [_MISSING]) * len(self.control_ids)
+        invalid: Dict[str, str] = {}
+        for ctrl_id, level in levels.items():
+            pos = self.position.get(ctrl_id)
+            if pos is None:
+                invalid[ctrl_id] = "unknown control"
+            elif not low <= level <= high:
+                invalid[ctrl_id] = f"level must be between {low} and {high}"
+            else:
+                achieved[pos] = float(level)
+        return achieved, invalid
+
+
+def _aggregate(key: str, count: int, sums: List[float]) -> MaturityAggregate:
+    """sums = [bewertet, Σ erreicht, Σ Soll, Σ Lücke, # Soll erreicht, Σ w·Erfüllung, Σ w]"""
+    assessed, achieved, target, gap, reached, weighted, weight = sums
+    if not assessed:
+        return MaturityAggregate(key=key, controlCount=count, assessedCount=0)
+    return MaturityAggregate(
+        key=key,
+        controlCount=count,
+        assessedCount=int(assessed),
+        meanAchieved=round(achieved / assessed, 3),
+        meanTarget=round(target / assessed, 3),
+        totalGap=round(gap, 3),
+        targetReachedRatio=round(reached / assessed, 4),
+        riskWeightedScore=round(100.0 * weighted / weight, 2) if weight else None,
+    )
+
+
+class AssessmentService:
+    """
+    Reifegrad-Selbstbewertung gegen den Privacy-Katalog: Lücken zum
+    Soll-Reifegrad, Aggregate je Reifegrad-Domäne und Gruppe sowie ein
+    risikogewichteter Score (0–100) – für viele Organisationen in einem Aufruf.
+    """
+
+    INDEX_KEY = "maturity-model"
+
+    def __init__(self, catalog_registry: Optional[CatalogRegistry] = None) -> None:
+        self.registry = catalog_registry or registry
+        self.name = settings.PRIVACY_CATALOG_NAME
+
+    def model(self) -> MaturityModel:
+        return self.registry.get_index(
+            self.name,
+            self.INDEX_KEY,
+            MaturityModel,
+        )
+
+    def score(
+        self,
+        assessments: List[MaturityAssessmentInput],
+        include_controls: bool = False,
+    ) -> MaturityAssessmentResponse:
+        revision = self.registry.revision(self.name)
+        model = self.model()
+        low, high = model.scale
+        return MaturityAssessmentResponse(
+            revision=revision,
+            scale=list(range(low, high + 1)),
+            results=[self._score_one(model, a, include_controls) for a in assessments],
+        )
+
+    def _score_one(
+        self,
+        model: MaturityModel,
+        assessment: MaturityAssessmentInput,
+        include_controls: bool,
+    ) -> MaturityAssessmentResult:
+        achieved, invalid = model.vectorize(assessment.levels)
+        targets, weights = model.targets, model.weights
+
+        # Spalten elementweise über die ausgerichteten Arrays (a == a ⇔ nicht NaN);
+        # nicht bewertete Controls tragen überall 0 bei
+        assessed_col = [1.0 if a == a else 0.0 for a in achieved]
+        columns = (
+            assessed_col,
+            [a if a == a else 0.0 for a in achieved],
+            [t * m for t, m in zip(targets, assessed_col)],
+            [t - a if a < t else 0.0 for a, t in zip(achieved, targets)],
+            [1.0 if a >= t else 0.0 for a, t in zip(achieved, targets)],
+            [(w * a / t if a < t else w) if a == a else 0.0
+             for a, t, w in zip(achieved, targets, weights)],
+            [w * m for w, m in zip(weights, assessed_col)],
+        )
+
+        def bucket(key: str, members: Callable[[Sequence[float]], Tuple[float, ...]], count: int):
+            return _aggregate(key, count, [fsum(members(col)) for col in columns])
+
+        total = [fsum(col) for col in columns]
+        assessed = int(total[0])
+        controls: List[MaturityControlScore] = []
+        if include_controls:
+            gaps = columns[3]
+            controls = [
+                MaturityControlScore(
+                    id=ctrl_id,
+                    achieved=int(a) if a == a else None,
+                    target=targets[i],
+                    gap=gaps[i],
+                    weight=round(weights[i], 4),
+                )
+                for i, (ctrl_id, a) in enumerate(zip(model.control_ids, achieved))
+            ]
+
+        return MaturityAssessmentResult(
+            organisation=assessment.organisation,
+            assessedCount=assessed,
+            unassessedCount=len(model.control_ids) - assessed,
+            invalidLevels=invalid,
+            overall=_aggregate("overall", len(model.control_ids), total),
+            byDomain=[
+                bucket(key, model.domain_members[i], model.domain_counts[i])
+                for i, key in enumerate(model.domains)
+            ],
+            byGroup=[
+                bucket(key, model.group_members[i], model.group_counts[i])
+                for i, key in enumerate(model.groups)
+            ],
+            controls=controls,
+        )
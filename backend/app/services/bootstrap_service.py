@@ -0,0 +1,271 @@
+import hashlib
+import json
+import struct
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+from .catalog_utils import get_prop_values, iter_catalog_controls
+from .change_log import ChangeLog, change_log
+from .file_service import FileService
+from .mapping_service import MappingService
+from .privacy_catalog_service import PrivacyCatalogService
+from .resilience_catalog_service import ResilienceCatalogService
+from .response_cache import CachedBody, encode_json
+from .sdm_catalog_service import SdmCatalogService
+from ..models import BootstrapCatalog, BootstrapGroup, trusted
+from ..config import settings
+
+try:  # optional: Brotli nur, wenn das Paket installiert ist
+    import brotli
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    brotli = None
+
+
+# gzip-Header ohne Dateiname/mtime (RFC 1952) und leerer letzter Deflate-Block
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+_DEFLATE_END = b"\x03\x00"
+
+
+def deflate_fragment(data: bytes) -> bytes:
+    """
+    Roh-Deflate eines Teilstücks, abgeschlossen mit Z_FULL_FLUSH: endet
+    byte-genau und ohne Rückverweise über die Grenze hinaus, kann also mit
+    anderen so komprimierten Teilstücken zu einem Strom verkettet werden.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+
+@dataclass
+class Fragment:
+    """Vorkodiertes Fragment eines Dokuments (JSON + Roh-Deflate)."""
+
+    name: str
+    revision: str
+    identity: bytes
+    deflated: bytes
+
+
+class _Body:
+    """Sammelt JSON-Teilstücke samt Deflate und baut daraus die Antwort."""
+
+    def __init__(self) -> None:
+        self.identity: List[bytes] = []
+        self.deflated: List[bytes] = []
+
+    def glue(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.identity.append(data)
+        self.deflated.append(deflate_fragment(data))
+
+    def fragment(self, fragment: Fragment) -> None:
+        self.identity.append(fragment.identity)
+        self.deflated.append(fragment.deflated)
+
+    def build(self) -> CachedBody:
+        identity = b"".join(self.identity)
+        trailer = struct.pack("<II", zlib.crc32(identity), len(identity) & 0xFFFFFFFF)
+        body = CachedBody(
+            identity=identity,
+            gzip=_GZIP_HEADER + b"".join(self.deflated) + _DEFLATE_END + trailer,
+        )
+        if brotli is not None:
+            body.br = brotli.compress(identity, quality=5)
+        return body
+
+
+def group_tree(document: Dict) -> List[BootstrapGroup]:
+    """Gruppenbaum eines Katalogs mit Anzahl Controls je Gruppe."""
+    def build(group: Dict) -> BootstrapGroup:
+        count = sum(1 for _ in iter_catalog_controls({"catalog": {"controls": group.get("controls", [])}}))
+        return trusted(
+            BootstrapGroup,
+            id=group.get("id"),
+            title=group.get("title", ""),
+            controlCount=count,
+            groups=[build(g) for g in group.get("groups", []) or []],
+        )
+
+    catalog = document.get("catalog") or {}
+    return [build(g) for g in catalog.get("groups", []) or []]
+
+
+def facet_counts(items: Iterable[Any], facets: Dict[str, Callable[[Any], Iterable[Optional[str]]]]) -> Dict[str, Dict[str, int]]:
+    """Facette → Wert → Anzahl Einträge (Werte je Eintrag nur einmal gezählt)."""
+    counters: Dict[str, Counter] = {name: Counter() for name in facets}
+    for item in items:
+        for name, values in facets.items():
+            counters[name].update({v for v in values(item) if v})
+    return {name: dict(sorted(counter.items())) for name, counter in counters.items()}
+
+
+def _mapping_schemes(mapping: Any) -> List[str]:
+    standards = mapping.standards
+    return [scheme for scheme in ("bsi", "iso27001", "iso27701") if getattr(standards, scheme)]
+
+
+# Kern-Dokumente: (Sicht, Summaries wie in der Listen-Route, Facetten)
+View = Tuple[str, Callable[[FileService], List[Any]], Dict[str, Callable[[Any], Iterable[Optional[str]]]]]
+
+
+class BootstrapService:
+    """
+    Alles, was das Frontend beim Start braucht, in einer Antwort: je
+    registriertem Katalog (plus SDM→Security-Mapping) Summaries, Gruppenbaum,
+    Facetten-Zähler und Revisions-Token (Datei-Revision und Startpunkt für
+    /api/changes).
+
+    Jedes Dokument wird als eigenes Fragment einmal pro Revision zu JSON und
+    Roh-Deflate kodiert. Die Antwort wird aus diesen Fragmenten zusammen-
+    gesetzt: ändert sich nur ein Katalog, wird nur sein Fragment neu gebaut,
+    die übrigen gehen unverändert (auch komprimiert) in die neue Antwort.
+
+    Große Referenzkataloge (Streaming-Import) bleiben außen vor.
+    """
+
+    VIEWS: Dict[str, View] = {
+        settings.SDM_PRIVACY_CATALOG_NAME: (
+            "sdm",
+            lambda fs: SdmCatalogService(fs).list_controls(include_nested=True),
+            {
+                "sdmModule": lambda c: [c.props.sdmModule],
+                "sdmGoals": lambda c: c.props.sdmGoals,
+                "dsgvoArticles": lambda c: c.props.dsgvoArticles,
+            },
+        ),
+        settings.PRIVACY_CATALOG_NAME: (
+            "privacy",
+            lambda fs: PrivacyCatalogService(fs).list_controls(),
+            {
+                "groupId": lambda c: [c.group_id],
+                "dpGoals": lambda c: c.dp_goals,
+                "dsgvoArticles": lambda c: c.dsgvo_articles,
+            },
+        ),
+        settings.RESILIENCE_CATALOG_NAME: (
+            "resilience",
+            lambda fs: ResilienceCatalogService(fs.load_json(settings.RESILIENCE_CATALOG_NAME)).list_controls(),
+            {
+                "domain": lambda c: [c.domain],
+                "class": lambda c: [c.class_],
+            },
+        ),
+        settings.SDM_MAPPING_NAME: (
+            "mapping",
+            lambda fs: MappingService(fs.load_json(settings.SDM_MAPPING_NAME)).list_mappings(),
+            {
+                "securityCatalogs": lambda m: [ref.catalogId for ref in m.securityControls],
+                "standards": _mapping_schemes,
+            },
+        ),
+    }
+
+    _fragments: Dict[str, Fragment] = {}
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        file_service: Optional[FileService] = None,
+        catalog_registry: Optional[CatalogRegistry] = None,
+        log: Optional[ChangeLog] = None,
+    ) -> None:
+        self.fs = file_service or FileService()
+        self.registry = catalog_registry or registry
+        self.log = log or change_log
+
+    def documents(self) -> List[str]:
+        names = [name for name in self.registry.names("catalog") if not self.registry.is_large(name)]
+        if settings.SDM_MAPPING_NAME in self.registry.names("mapping"):
+            names.append(settings.SDM_MAPPING_NAME)
+        return names
+
+    def revisions(self) -> Dict[str, str]:
+        return {name: self.fs.revision(name) for name in self.documents()}
+
+    # ------------------------ Fragmente ------------------------
+
+    def _generic_items(self, document: Dict) -> List[Dict]:
+        return [
+            {
+                "id": ctrl.get("id", ""),
+                "title": ctrl.get("title", ""),
+                "groupId": group_id,
+                "parentId": parent_id,
+                "class": ctrl.get("class"),
+                "label": (get_prop_values(ctrl, "label") or [None])[0],
+            }
+            for group_id, parent_id, ctrl in iter_catalog_controls(document)
+        ]
+
+    def build_fragment(self, name: str, revision: str) -> Fragment:
+        # Protokoll-Revision vor dem Laden lesen: eine Änderung dazwischen
+        # liefert der nächste Delta-Abruf höchstens doppelt, nie zu wenig
+        change_revision = self.log.sync(name)
+        document = self.registry.get(name)
+        view = self.VIEWS.get(name)
+        if view is not None:
+            view_name, list_items, facets = view
+            items = list_items(self.fs)
+        else:
+            view_name = "catalog"
+            items = self._generic_items(document)
+            facets = {"class": lambda c: [c["class"]]}
+
+        payload = trusted(
+            BootstrapCatalog,
+            name=name,
+            type=self.registry.doc_type(name),
+            view=view_name,
+            title=((document.get("catalog") or document).get("metadata") or {}).get("title"),
+            revision=revision,
+            changeRevision=change_revision,
+            items=items,
+            groups=group_tree(document),
+            facets=facet_counts(items, facets),
+        )
+        identity = encode_json(payload)
+        return Fragment(name=name, revision=revision, identity=identity, deflated=deflate_fragment(identity))
+
+    def fragment(self, name: str, revision: str) -> Fragment:
+        with self._lock:
+            cached = self._fragments.get(name)
+        if cached is not None and cached.revision == revision:
+            return cached
+        fragment = self.build_fragment(name, revision)
+        with self._lock:
+            self._fragments[name] = fragment
+        return fragment
+
+    # ------------------------ Antwort ------------------------
+
+    @staticmethod
+    def token(revisions: Dict[str, str]) -> str:
+        """Gemeinsamer Revisions-Token aller Fragmente."""
+        raw = "\n".join(f"{name}={rev}" for name, rev in sorted(revisions.items()))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    def build(self, revisions: Optional[Dict[str, str]] = None) -> CachedBody:
+        """
+        {"epoch", "revision", "catalogs": {name: BootstrapCatalog}} – aus den
+        gecachten Fragmenten zusammengesetzt, inkl. gzip aus deren Deflate.
+        """
+        revisions = revisions if revisions is not None else self.revisions()
+        with self._lock:
+            for name in [n for n in self._fragments if n not in revisions]:
+                del self._fragments[name]
+
+        body = _Body()
+        body.glue(
+            '{"epoch":' + json.dumps(self.log.epoch)
+            + ',"revision":' + json.dumps(self.token(revisions))
+            + ',"catalogs":{'
+        )
+        for i, (name, revision) in enumerate(revisions.items()):
+            body.glue(("," if i else "") + json.dumps(name, ensure_ascii=False) + ":")
+            body.fragment(self.fragment(name, revision))
+        body.glue("}}")
+        return body.build()
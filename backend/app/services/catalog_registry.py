@@ -0,0 +1,542 @@
+import copy
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .content_hashes import content_hashes
+from .single_flight import SingleFlight
+from ..config import settings
+
+
+# Wurzel-Keys der OSCAL-Modelle → Dokumenttyp
+OSCAL_ROOT_TYPES: Dict[str, str] = {
+    "catalog": "catalog",
+    "profile": "profile",
+    "component-definition": "component-definition",
+    "system-security-plan": "system-security-plan",
+    "assessment-plan": "assessment-plan",
+    "assessment-results": "assessment-results",
+    "plan-of-action-and-milestones": "plan-of-action-and-milestones",
+    "mapping-collection": "mapping",
+}
+
+_FIRST_KEY = re.compile(rb'^\s*\{\s*"([^"]+)"')
+
+
+def stat_revision(path: Path) -> str:
+    """Billiger Revisions-Token einer Datei (mtime + Größe), ohne sie zu lesen."""
+    stat = path.stat()
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def detect_document_type(path: Path) -> str:
+    """
+    Bestimmt den Dokumenttyp anhand des ersten Keys im JSON (OSCAL-Dokumente
+    haben genau einen Wurzel-Key) – dafür werden nur die ersten Bytes gelesen.
+    """
+    with path.open("rb") as fh:
+        head = fh.read(4096)
+    match = _FIRST_KEY.match(head.lstrip(b"\xef\xbb\xbf"))
+    if match:
+        doc_type = OSCAL_ROOT_TYPES.get(match.group(1).decode("utf-8", "replace"))
+        if doc_type:
+            return doc_type
+    if "mappings" in path.parts:
+        return "mapping"
+    return "unknown"
+
+
+# replace() übernimmt die Größe des Vorgängers als Schätzung; nach so vielen
+# Ersetzungen ohne Messung wird das Dokument wieder vollständig vermessen
+_REMEASURE_EVERY = 32
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Grobe Schätzung des Speicherbedarfs einer Objektstruktur (inkl. Inhalt)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        oid = id(current)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+    return total
+
+
+class LargeDocumentError(ValueError):
+    """Dokument ab LARGE_DOCUMENT_BYTES – nur per Streaming-Import lesbar."""
+
+
+class DocumentView(NamedTuple):
+    """Lese-Stand eines Eintrags; wird nur als Ganzes ersetzt (nie verändert)."""
+
+    revision: str
+    document: Dict
+    dirty: bool
+    indexes: Dict[str, Any]
+    # Inhalts-Hash des Stands, wenn dieser Prozess ihn geschrieben hat
+    tag: Optional[str] = None
+
+
+@dataclass
+class RegistryEntry:
+    name: str
+    path: Path
+    doc_type: str
+    pinned: bool = False
+    revision: Optional[str] = None
+    document: Optional[Dict] = None
+    document_bytes: int = 0
+    # Ersetzungen seit der letzten Messung von document_bytes
+    estimated_replaces: int = 0
+    indexes: Dict[str, Any] = field(default_factory=dict)
+    index_bytes: Dict[str, int] = field(default_factory=dict)
+    # True, solange der Stand im Speicher neuer ist als die Datei (Write-Behind)
+    dirty: bool = False
+    # Inhalts-Hash selbst geschriebener Stände (Teil des Revisions-Tokens)
+    tag: Optional[str] = None
+    # für Leser ohne Lock: wird nach jeder Änderung der Felder oben neu gesetzt
+    view: Optional[DocumentView] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.document is not None
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.document_bytes + sum(self.index_bytes.values())
+
+    def publish(self) -> None:
+        """Aktuellen Stand für Leser veröffentlichen (eine atomare Zuweisung)."""
+        if self.document is None or self.revision is None:
+            self.view = None
+        else:
+            self.view = DocumentView(self.revision, self.document, self.dirty, self.indexes, self.tag)
+
+    def unload(self) -> None:
+        self.view = None
+        self.dirty = False
+        self.tag = None
+        self.revision = None
+        self.document = None
+        self.document_bytes = 0
+        self.indexes = {}
+        self.index_bytes = {}
+
+
+class CatalogRegistry:
+    """
+    Verzeichnis aller OSCAL-Dokumente unter den konfigurierten Repo-Pfaden.
+
+    - Dokumente werden beim Scannen nur registriert (Name, Pfad, Typ) und
+      erst beim ersten Zugriff geparst.
+    - Geparste Dokumente und davon abgeleitete Indexe liegen in einem LRU,
+      der über einen Speicher-Budget begrenzt ist; angepinnte Dokumente
+      (die vier Kern-Dateien) werden nie verdrängt.
+    - Jeder Zugriff prüft die Datei-Revision, Änderungen von außen (andere
+      Worker, Git-Checkout) werden also erkannt.
+    - Gleichzeitige Cache-Misses für dieselbe (Datei, Revision) bzw. denselben
+      Index teilen sich einen Parse/Index-Aufbau (Single-Flight).
+
+    Die von get() gelieferten Dokumente werden geteilt und dürfen nicht
+    verändert werden; zum Bearbeiten FileService.editing() (Copy-on-Write)
+    oder load_mutable() verwenden.
+
+    Über put() kann ein neuerer Stand als der auf der Platte hinterlegt
+    werden (Write-Behind-Journal); bis mark_clean() gilt dann dieser Stand
+    samt seiner Revision und die Datei wird nicht gelesen.
+
+    Leser nehmen keinen Lock: get()/revision()/get_index() lesen nur den
+    DocumentView des Eintrags, den Schreiber (unter dem Lock) als Ganzes
+    ersetzen. Da Dokumente nie verändert werden – Schreiber bauen eine neue
+    Wurzel –, sieht ein Leser immer einen vollständigen Stand, den alten
+    oder den neuen.
+
+    Mit angehängtem Snapshot-Store (attach_snapshots) werden Dokumente aus
+    dessen binären Snapshots geladen; geschriebene Stände veröffentlicht
+    mark_clean() dort für die anderen Worker.
+    """
+
+    def __init__(
+        self,
+        scan_paths: Iterable[Path],
+        pinned: Dict[str, Path],
+        max_bytes: int,
+    ) -> None:
+        self.scan_paths = list(scan_paths)
+        self.pinned = dict(pinned)
+        self.max_bytes = max_bytes
+        self._entries: Dict[str, RegistryEntry] = {}
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._scanned = False
+        self._flight = SingleFlight()
+        # optionaler Snapshot-Store (snapshot_store.py): Laden ohne JSON-Parse
+        self.snapshots: Optional[Any] = None
+
+    def attach_snapshots(self, store: Any) -> None:
+        self.snapshots = store
+
+    # ------------------------ Discovery ------------------------
+
+    def scan(self) -> None:
+        """(Re-)Scan der Repo-Verzeichnisse; bereits geladene Einträge bleiben erhalten."""
+        found: Dict[str, RegistryEntry] = {}
+        pinned_paths = {p.resolve() for p in self.pinned.values()}
+
+        for name, path in self.pinned.items():
+            doc_type = detect_document_type(path) if path.exists() else "unknown"
+            found[name] = RegistryEntry(name=name, path=path, doc_type=doc_type, pinned=True)
+
+        for root in self.scan_paths:
+            if not root.exists():
+                continue
+            for path in sorted(root.rglob("*.json")):
+                if path.resolve() in pinned_paths:
+                    continue
+                name = path.stem
+                if name in found:
+                    # Namenskollision → Pfad relativ zum Repo als Name
+                    name = path.relative_to(root.parent).with_suffix("").as_posix()
+                doc_type = detect_document_type(path)
+                if doc_type == "unknown":
+                    continue
+                found[name] = RegistryEntry(name=name, path=path, doc_type=doc_type)
+
+        with self._lock:
+            for name, entry in found.items():
+                old = self._entries.get(name)
+                if old is not None and old.path == entry.path:
+                    found[name] = old
+            for name in set(self._entries) - set(found):
+                self._lru.pop(name, None)
+            self._entries = found
+            self._scanned = True
+
+    def _ensure_scanned(self) -> None:
+        if not self._scanned:
+            self.scan()
+
+    def _entry(self, name: str) -> RegistryEntry:
+        self._ensure_scanned()
+        entry = self._entries.get(name)
+        if entry is None:
+            raise ValueError(f"Unknown file name: {name}")
+        return entry
+
+    def names(self, doc_type: Optional[str] = None) -> List[str]:
+        self._ensure_scanned()
+        return sorted(
+            name for name, entry in self._entries.items()
+            if doc_type is None or entry.doc_type == doc_type
+        )
+
+    def path(self, name: str) -> Path:
+        return self._entry(name).path
+
+    def doc_type(self, name: str) -> str:
+        return self._entry(name).doc_type
+
+    def revision(self, name: str) -> str:
+        """
+        Revisions-Token für Caches/ETags: Datei-Revision (mtime + Größe), bei
+        selbst geschriebenen Ständen ergänzt um deren Inhalts-Hash – zwei
+        gleich große Schreibvorgänge innerhalb der mtime-Auflösung ergeben
+        so trotzdem verschiedene Tokens.
+        """
+        entry = self._entry(name)
+        view = entry.view
+        revision = self._file_revision(entry)
+        if view is not None and not view.dirty and view.tag and view.revision == revision:
+            return f"{revision}-{view.tag}"
+        return revision
+
+    @staticmethod
+    def _file_revision(entry: RegistryEntry) -> str:
+        view = entry.view
+        if view is not None and view.dirty:
+            return view.revision
+        return stat_revision(entry.path)
+
+    def _tag(self, name: str, document: Dict) -> str:
+        # nach einem Schreibvorgang meist schon gehasht (No-op-Prüfung)
+        return content_hashes.hashes(name, document).root_hex[:12]
+
+    # ------------------------ Laden & Cache ------------------------
+
+    def get(self, name: str) -> Dict:
+        """Geparstes Dokument (geteilt, read-only) – lädt beim ersten Zugriff."""
+        entry = self._entry(name)
+        view = entry.view
+        if view is not None and (view.dirty or view.revision == stat_revision(entry.path)):
+            self._touch_unlocked(name)
+            return view.document
+
+        revision = self._file_revision(entry)
+        with self._lock:
+            if entry.document is not None and entry.revision == revision:
+                self._touch(name)
+                return entry.document
+        self._require_parseable(entry)
+
+        def load() -> Dict:
+            document = self._load(entry)
+            size = deep_sizeof(document)
+            with self._lock:
+                if entry.revision != revision:
+                    entry.unload()
+                entry.document = document
+                entry.revision = revision
+                entry.document_bytes = size
+                entry.estimated_replaces = 0
+                entry.publish()
+                self._touch(name)
+                self._evict()
+            return document
+
+        return self._flight.do(("document", name, revision), load)
+
+    def load_mutable(self, name: str) -> Dict:
+        """Frisch geparste, private Kopie zum Bearbeiten (am Cache vorbei)."""
+        entry = self._entry(name)
+        with self._lock:
+            if entry.dirty:
+                return copy.deepcopy(entry.document)
+        self._require_parseable(entry)
+        return self._parse(entry.path)
+
+    def put(self, name: str, document: Dict, revision: str) -> None:
+        """
+        Hinterlegt einen noch nicht geschriebenen Stand (ab jetzt geteilt und
+        read-only). Abgeleitete Indexe des alten Stands werden verworfen.
+        """
+        self._replace(name, document, revision, dirty=True)
+
+    def replace(self, name: str, document: Dict) -> None:
+        """
+        Übernimmt den gerade in die Datei geschriebenen Stand `document` (ab
+        jetzt geteilt und read-only) – Leser wechseln ohne erneutes Parsen.
+        """
+        entry = self._entry(name)
+        self._replace(name, document, stat_revision(entry.path), dirty=False, tag=self._tag(name, document))
+
+    def _replace(self, name: str, document: Dict, revision: str, dirty: bool, tag: Optional[str] = None) -> None:
+        entry = self._entry(name)
+        # neue Stände teilen fast alles mit dem Vorgänger: Größe des alten
+        # Stands als Schätzung statt erneut das ganze Dokument abzulaufen –
+        # nur alle _REMEASURE_EVERY Ersetzungen (und außerhalb des Locks)
+        # wird neu gemessen, damit die Schätzung nicht beliebig driftet
+        measure = not entry.document_bytes or entry.estimated_replaces >= _REMEASURE_EVERY
+        measured = deep_sizeof(document) if measure else 0
+        with self._lock:
+            size = measured or entry.document_bytes or deep_sizeof(document)
+            estimated = 0 if measured else entry.estimated_replaces + 1
+            entry.unload()
+            entry.document = document
+            entry.revision = revision
+            entry.document_bytes = size
+            entry.estimated_replaces = estimated
+            entry.dirty = dirty
+            entry.tag = tag
+            entry.publish()
+            self._touch(name)
+            self._evict()
+
+    def mark_clean(self, name: str, document: Dict) -> None:
+        """
+        Nach dem Schreiben von `document` auf die Platte: gilt der Stand noch,
+        übernimmt er die Datei-Revision (Indexe bleiben erhalten).
+        """
+        entry = self._entry(name)
+        tag = self._tag(name, document)
+        with self._lock:
+            if not (entry.dirty and entry.document is document):
+                return
+            entry.revision = stat_revision(entry.path)
+            entry.dirty = False
+            entry.tag = tag
+            entry.publish()
+        if self.snapshots is not None:
+            # geschriebenen Stand an die anderen Worker weitergeben
+            self.snapshots.publish(name, document)
+
+    def is_dirty(self, name: str) -> bool:
+        view = self._entry(name).view
+        return view is not None and view.dirty
+
+    def get_index(self, name: str, key: str, builder: Callable[[Dict], Any]) -> Any:
+        """
+        Von einem Dokument abgeleiteter Index, gecacht pro Dokument-Revision
+        und gemeinsam mit dem Dokument verdrängt.
+        """
+        document = self.get(name)
+        entry = self._entries[name]
+        view = entry.view
+        if view is not None and view.document is document:
+            index = view.indexes.get(key)
+            if index is not None:
+                return index
+
+        def build() -> Any:
+            index = builder(document)
+            size = deep_sizeof(index)
+            with self._lock:
+                if entry.document is document:
+                    entry.indexes[key] = index
+                    entry.index_bytes[key] = size
+                    self._evict()
+            return index
+
+        return self._flight.do(("index", name, key, id(document)), build)
+
+    def get_file_index(self, name: str, key: str, builder: Callable[[Path], Any]) -> Any:
+        """
+        Wie get_index(), aber der Builder bekommt nur den Dateipfad – das
+        Dokument selbst wird dabei nicht geparst (z.B. für Streaming-Importe
+        sehr großer Kataloge).
+        """
+        entry = self._entry(name)
+        revision = self._file_revision(entry)
+        with self._lock:
+            if entry.revision == revision and key in entry.indexes:
+                self._touch(name)
+                return entry.indexes[key]
+
+        def build() -> Any:
+            index = builder(entry.path)
+            size = deep_sizeof(index)
+            with self._lock:
+                if entry.revision != revision:
+                    entry.unload()
+                    entry.revision = revision
+                entry.indexes[key] = index
+                entry.index_bytes[key] = size
+                self._touch(name)
+                self._evict()
+            return index
+
+        return self._flight.do(("file-index", name, key, revision), build)
+
+    def is_large(self, name: str) -> bool:
+        """Dokumente ab LARGE_DOCUMENT_BYTES werden nur per Streaming-Import gelesen."""
+        return self._entry(name).path.stat().st_size >= settings.LARGE_DOCUMENT_BYTES
+
+    def _require_parseable(self, entry: RegistryEntry) -> None:
+        # Kerndokumente (gepinnt) werden immer geparst – alle anderen großen
+        # Dokumente nur über get_file_index/den Streaming-Import
+        if not entry.pinned and entry.path.exists() and self.is_large(entry.name):
+            raise LargeDocumentError(
+                f"{entry.name} is too large to be loaded as a whole, use the reference catalog API"
+            )
+
+    def discard(self, name: str) -> None:
+        """Verwirft den Stand im Speicher – auch einen noch nicht geschriebenen."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.unload()
+            self._lru.pop(name, None)
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and not entry.dirty:
+                entry.unload()
+            self._lru.pop(name, None)
+
+    @staticmethod
+    def _parse(path: Path) -> Dict:
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _load(self, entry: RegistryEntry) -> Dict:
+        if self.snapshots is not None:
+            return self.snapshots.load_document(entry.name, entry.path)
+        return self._parse(entry.path)
+
+    def _touch(self, name: str) -> None:
+        self._lru[name] = None
+        self._lru.move_to_end(name)
+
+    def _touch_unlocked(self, name: str) -> None:
+        # nur die Verdrängungsreihenfolge (ein Hinweis): move_to_end ist unter
+        # dem GIL atomar, ein inzwischen verdrängter Eintrag wird ignoriert
+        try:
+            self._lru.move_to_end(name)
+        except KeyError:
+            pass
+
+    def _evict(self) -> None:
+        total = sum(e.memory_bytes for e in self._entries.values())
+        for name in list(self._lru):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.get(name)
+            if entry is None or entry.pinned or entry.dirty:
+                continue
+            total -= entry.memory_bytes
+            entry.unload()
+            del self._lru[name]
+
+    def pinned_names(self) -> List[str]:
+        return sorted(self.pinned)
+
+    def loaded_documents(self) -> List[Tuple[str, Dict]]:
+        """(Name, Dokument) aller geladenen Dokumente, deren Stand in der Datei steht."""
+        with self._lock:
+            return [
+                (name, entry.document)
+                for name, entry in sorted(self._entries.items())
+                if entry.document is not None and not entry.dirty
+            ]
+
+    # ------------------------ Reporting ------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Single-Flight-Zähler je Art (document/index/file-index)."""
+        return self._flight.metrics()
+
+    def report(self) -> List[Dict[str, Any]]:
+        self._ensure_scanned()
+        with self._lock:
+            return [
+                {
+                    "name": entry.name,
+                    "type": entry.doc_type,
+                    "path": str(entry.path),
+                    "pinned": entry.pinned,
+                    "loaded": entry.loaded,
+                    "dirty": entry.dirty,
+                    "revision": entry.revision,
+                    "documentBytes": entry.document_bytes,
+                    "indexBytes": dict(entry.index_bytes),
+                    "memoryBytes": entry.memory_bytes,
+                }
+                for entry in sorted(self._entries.values(), key=lambda e: e.name)
+            ]
+
+
+registry = CatalogRegistry(
+    scan_paths=settings.CATALOG_SCAN_PATHS,
+    pinned={
+        settings.PRIVACY_CATALOG_NAME: settings.PRIVACY_CATALOG_FILE,
+        settings.SDM_PRIVACY_CATALOG_NAME: settings.SDM_PRIVACY_CATALOG_FILE,
+        settings.RESILIENCE_CATALOG_NAME: settings.RESILIENCE_CATALOG_FILE,
+        settings.SDM_MAPPING_NAME: settings.SDM_MAPPING_FILE,
+    },
+    max_bytes=settings.CATALOG_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,180 @@
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .catalog_utils import iter_catalog_controls
+from ..models import ResolvedLink, ResolvedParam
+
+
+# OSCAL-Einfügemarke "{{ insert: param, pm-9_prm_1 }}"
+_INSERT = re.compile(r"\{\{\s*insert:\s*param\s*,\s*([^\s}]+)\s*\}\}")
+
+
+def _param_text(param: Dict) -> Optional[str]:
+    """Wert eines Params (values/value), sonst Auswahl oder Label als Platzhalter."""
+    values = param.get("values")
+    if values:
+        return ", ".join(str(v) for v in values)
+    if param.get("value") is not None:
+        return str(param["value"])
+    select = param.get("select") or {}
+    choices = select.get("choice") or []
+    if choices:
+        joiner = " | " if select.get("how-many") == "one-or-more" else " / "
+        return "(" + joiner.join(str(c) for c in choices) + ")"
+    label = param.get("label")
+    if label:
+        return f"[{label}]"
+    return None
+
+
+# Position eines Parts im Control: Indizes in den verschachtelten parts-Listen
+PartPath = Tuple[int, ...]
+
+
+def iter_parts(ctrl: Dict) -> Iterator[Tuple[PartPath, Dict]]:
+    """Alle Parts eines Controls (inkl. verschachtelter) mit ihrer Position."""
+    stack: List[Tuple[PartPath, Dict]] = [((i,), part) for i, part in enumerate(ctrl.get("parts", []) or [])]
+    while stack:
+        path, part = stack.pop()
+        yield path, part
+        stack.extend((path + (i,), child) for i, child in enumerate(part.get("parts", []) or []))
+
+
+class CatalogResolutionIndex:
+    """
+    Auflösungs-Index eines Katalogs (pro Revision gebaut):
+
+    - uuid → Resource aus back-matter (plus rlink-URL → uuid, damit auch
+      externe Links einer Resource zugeordnet werden),
+    - Param-ID → Param, global und je Control (Control-Params überdecken
+      globale, Unter-Controls erben die ihrer Eltern),
+    - Control-ID → Titel für related-control-Links.
+
+    Aufgelöste Links/Prosa werden pro Control memoisiert.
+    """
+
+    def __init__(self, document: Dict) -> None:
+        catalog = document.get("catalog") or {}
+
+        self.resources: Dict[str, Dict] = {}
+        self.resource_by_url: Dict[str, str] = {}
+        for res in (catalog.get("back-matter") or {}).get("resources", []) or []:
+            uuid = res.get("uuid")
+            if not uuid:
+                continue
+            self.resources[uuid] = res
+            for rlink in res.get("rlinks", []) or []:
+                if rlink.get("href"):
+                    self.resource_by_url.setdefault(rlink["href"], uuid)
+
+        self.global_params: Dict[str, Dict] = {
+            p["id"]: p for p in catalog.get("params", []) or [] if p.get("id")
+        }
+        self.control_params: Dict[str, Dict[str, Dict]] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        self.titles: Dict[str, str] = {}
+        for _, parent_id, ctrl in iter_catalog_controls(document):
+            ctrl_id = ctrl.get("id")
+            if not ctrl_id:
+                continue
+            self.parents[ctrl_id] = parent_id
+            self.titles[ctrl_id] = ctrl.get("title", "")
+            params = {p["id"]: p for p in ctrl.get("params", []) or [] if p.get("id")}
+            if params:
+                self.control_params[ctrl_id] = params
+
+        self._memo: Dict[str, Tuple[List[ResolvedLink], List[ResolvedParam], Dict[PartPath, str]]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------ Params ------------------------
+
+    def find_param(self, param_id: str, control_id: Optional[str]) -> Optional[Dict]:
+        current = control_id
+        while current is not None:
+            param = self.control_params.get(current, {}).get(param_id)
+            if param is not None:
+                return param
+            current = self.parents.get(current)
+        return self.global_params.get(param_id)
+
+    def render(self, prose: Optional[str], control_id: Optional[str] = None) -> Optional[str]:
+        """Ersetzt Param-Einfügemarken; unbekannte Params bleiben stehen."""
+        if not prose or "{{" not in prose:
+            return prose
+
+        def replace(match: "re.Match[str]") -> str:
+            param = self.find_param(match.group(1), control_id)
+            text = _param_text(param) if param is not None else None
+            return text if text is not None else match.group(0)
+
+        return _INSERT.sub(replace, prose)
+
+    # ------------------------ Links ------------------------
+
+    def resolve_link(self, link: Dict) -> ResolvedLink:
+        href = link.get("href", "")
+        resolved = ResolvedLink(href=href, rel=link.get("rel"), text=link.get("text"))
+
+        if href.startswith("#"):
+            target = href[1:]
+            if target in self.resources:
+                uuid = target
+            elif target in self.titles:
+                resolved.targetType = "control"
+                resolved.targetId = target
+                resolved.title = self.titles[target]
+                return resolved
+            else:
+                resolved.targetType = "unresolved"
+                return resolved
+        else:
+            uuid = self.resource_by_url.get(href)
+            if uuid is None:
+                resolved.targetType = "external"
+                resolved.urls = [href] if href else []
+                return resolved
+
+        res = self.resources[uuid]
+        resolved.targetType = "resource"
+        resolved.targetId = uuid
+        resolved.title = res.get("title")
+        resolved.urls = [r["href"] for r in res.get("rlinks", []) or [] if r.get("href")]
+        return resolved
+
+    # ------------------------ pro Control ------------------------
+
+    def resolve_control(self, ctrl: Dict) -> Tuple[List[ResolvedLink], List[ResolvedParam], Dict[PartPath, str]]:
+        """
+        Aufgelöste Links, verwendete Params und gerenderte Prosa (Position des
+        Parts, siehe iter_parts → Text, nur für Parts mit Einfügemarken) eines
+        Controls. Nach Position statt ID/Name, da Parts ohne ID mit gleichem
+        Namen (z.B. mehrere "item") sonst einander überschreiben.
+        """
+        ctrl_id = ctrl.get("id", "")
+        with self._lock:
+            memo = self._memo.get(ctrl_id)
+        if memo is not None:
+            return memo
+
+        links = [self.resolve_link(link) for link in ctrl.get("links", []) or []]
+
+        rendered: Dict[PartPath, str] = {}
+        used: Dict[str, ResolvedParam] = {}
+        for path, part in iter_parts(ctrl):
+            prose = part.get("prose")
+            if prose and "{{" in prose:
+                rendered[path] = self.render(prose, ctrl_id)
+                for param_id in _INSERT.findall(prose):
+                    param = self.find_param(param_id, ctrl_id)
+                    if param is not None and param_id not in used:
+                        used[param_id] = ResolvedParam(
+                            id=param_id,
+                            label=param.get("label"),
+                            value=_param_text(param),
+                        )
+
+        memo = (links, list(used.values()), rendered)
+        with self._lock:
+            self._memo[ctrl_id] = memo
+        return memo
@@ -0,0 +1,27 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _walk_controls(controls: List[Dict], group_id: Optional[str], parent_id: Optional[str]):
+    for ctrl in controls or []:
+        yield group_id, parent_id, ctrl
+        yield from _walk_controls(ctrl.get("controls", []), group_id, ctrl.get("id"))
+
+
+def iter_catalog_controls(catalog_dict: Dict) -> Iterator[Tuple[Optional[str], Optional[str], Dict]]:
+    """
+    Generator über alle Controls eines OSCAL-Katalogs inkl. verschachtelter
+    Controls. Gibt Tupel (group_id, parent_id, control_dict) zurück.
+    """
+    catalog = catalog_dict.get("catalog") or {}
+    for group in catalog.get("groups", []):
+        yield from _walk_controls(group.get("controls", []), group.get("id"), None)
+    yield from _walk_controls(catalog.get("controls", []), None, None)
+
+
+def get_prop_values(control: Dict, name: str) -> List[str]:
+    """Alle Werte der Props mit Namen `name` (in Dokumentreihenfolge)."""
+    return [
+        str(p["value"])
+        for p in control.get("props", [])
+        if p.get("name") == name and p.get("value") is not None
+    ]
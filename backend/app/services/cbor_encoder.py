@@ -0,0 +1,79 @@
+import struct
+from typing import Any
+
+try:  # optional: cbor2 (C-Erweiterung) nur, wenn das Paket installiert ist
+    import cbor2
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    cbor2 = None
+
+
+def _head(major: int, value: int, out: bytearray) -> None:
+    if value < 24:
+        out.append(major << 5 | value)
+    elif value < 0x100:
+        out.append(major << 5 | 24)
+        out.append(value)
+    elif value < 0x10000:
+        out.append(major << 5 | 25)
+        out += value.to_bytes(2, "big")
+    elif value < 0x100000000:
+        out.append(major << 5 | 26)
+        out += value.to_bytes(4, "big")
+    else:
+        out.append(major << 5 | 27)
+        out += value.to_bytes(8, "big")
+
+
+def _encode(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xF6)
+    elif obj is True:
+        out.append(0xF5)
+    elif obj is False:
+        out.append(0xF4)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        _head(3, len(data), out)
+        out += data
+    elif isinstance(obj, int):
+        if 0 <= obj < 1 << 64:
+            _head(0, obj, out)
+        elif -(1 << 64) <= obj < 0:
+            _head(1, -1 - obj, out)
+        else:
+            # Bignum (Tag 2/3)
+            magnitude = obj if obj >= 0 else -1 - obj
+            data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, "big")
+            _head(6, 2 if obj >= 0 else 3, out)
+            _head(2, len(data), out)
+            out += data
+    elif isinstance(obj, float):
+        out.append(0xFB)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, dict):
+        _head(5, len(obj), out)
+        for key, value in obj.items():
+            _encode(key, out)
+            _encode(value, out)
+    elif isinstance(obj, (list, tuple)):
+        _head(4, len(obj), out)
+        for item in obj:
+            _encode(item, out)
+    elif isinstance(obj, (bytes, bytearray)):
+        _head(2, len(obj), out)
+        out += obj
+    else:
+        raise TypeError(f"Cannot encode {type(obj).__name__} as CBOR")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    CBOR (RFC 8949) eines JSON-Dokuments: Maps, Arrays, Text, Zahlen,
+    Bool/null – kompakter als JSON und ohne Parsen von Zahlen/Escapes im
+    Client. Mit installiertem cbor2 wird dessen Encoder verwendet.
+    """
+    if cbor2 is not None:
+        return cbor2.dumps(obj)
+    out = bytearray()
+    _encode(obj, out)
+    return bytes(out)
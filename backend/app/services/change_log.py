@@ -0,0 +1,188 @@
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .catalog_registry import registry
+from .catalog_utils import iter_catalog_controls
+from .file_service import on_change
+from ..config import settings
+
+
+@dataclass
+class ChangeEntry:
+    revision: int
+    op: str
+    timestamp: float
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # Struktur nicht nach IDs aufschlüsselbar → Client muss neu laden
+    full: bool = False
+
+
+@dataclass
+class Delta:
+    revision: int
+    full: bool
+    upserted: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    entries: List[ChangeEntry] = field(default_factory=list)
+
+
+def keyed_items(document: Dict) -> Optional[Dict[str, Any]]:
+    """
+    ID → vergleichbarer Stand je Eintrag: Controls eines Katalogs (ohne
+    Unter-Controls, mit Gruppe/Eltern) bzw. Mappings nach sdm_control_id.
+    None, wenn das Dokument keine dieser Strukturen hat.
+    """
+    if isinstance(document.get("mappings"), list):
+        return {
+            m.get("sdm_control_id", ""): m
+            for m in document["mappings"] if isinstance(m, dict)
+        }
+    if isinstance(document.get("catalog"), dict):
+        items: Dict[str, Any] = {}
+        for group_id, parent_id, ctrl in iter_catalog_controls(document):
+            if ctrl.get("id"):
+                shallow = {k: v for k, v in ctrl.items() if k != "controls"}
+                items[ctrl["id"]] = (group_id, parent_id, shallow)
+        return items
+    return None
+
+
+def diff_items(old: Dict, new: Dict) -> Optional[Tuple[List[str], List[str], List[str]]]:
+    """(added, changed, removed) zwischen zwei Dokumentständen, None = nicht aufschlüsselbar."""
+    old_items, new_items = keyed_items(old), keyed_items(new)
+    if old_items is None or new_items is None:
+        return None
+    added = [k for k in new_items if k not in old_items]
+    removed = [k for k in old_items if k not in new_items]
+    changed = [k for k, v in new_items.items() if k in old_items and old_items[k] != v]
+    return added, changed, removed
+
+
+class _DocumentLog:
+    def __init__(self, max_entries: int) -> None:
+        self.revision = 0
+        self.entries: Deque[ChangeEntry] = deque(maxlen=max_entries)
+        self.document: Optional[Dict] = None    # zuletzt gesehener Stand
+
+
+class ChangeLog:
+    """
+    Monotoner Revisionszähler und begrenztes Änderungsprotokoll je Dokument.
+
+    - Gespeist über FileService.on_change, d.h. aus den Schreibpfaden aller
+      Services (inkl. /api/save, Undo/Redo): pro Änderung werden die
+      hinzugefügten/geänderten/entfernten Control- bzw. Mapping-IDs abgelegt.
+    - Änderungen an der Datei von außen (Git-Checkout, anderer Worker)
+      werden beim nächsten Zugriff erkannt, weil die Registry dann einen
+      anderen Dokumentstand liefert, und ebenfalls als Eintrag erfasst.
+    - Der Zähler gilt pro Prozess-Epoche; nach einem Neustart (andere
+      epoch) oder wenn Einträge aus dem Protokoll gefallen sind, muss der
+      Client komplett neu laden.
+
+    Epoche und Zähler liegen nur im Speicher des Prozesses. Delta-Sync
+    setzt daher einen einzelnen Worker voraus: mit mehreren Workern landen
+    aufeinanderfolgende Anfragen eines Clients in verschiedenen Prozessen,
+    die Epoche passt nicht und jede Antwort ist full=True (korrekt, aber
+    ohne Ersparnis).
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.epoch = uuid.uuid4().hex[:12]
+        self._logs: Dict[str, _DocumentLog] = {}
+        self._lock = threading.Lock()
+
+    def _log(self, name: str) -> _DocumentLog:
+        log = self._logs.get(name)
+        if log is None:
+            log = self._logs[name] = _DocumentLog(self.max_entries)
+        return log
+
+    def _append(self, log: _DocumentLog, op: str, old: Optional[Dict], new: Dict) -> None:
+        log.document = new
+        if old is None:
+            return
+        diff = diff_items(old, new)
+        if diff is None:
+            entry = ChangeEntry(revision=0, op=op, timestamp=time.time(), full=True)
+        else:
+            added, changed, removed = diff
+            if not (added or changed or removed):
+                return
+            entry = ChangeEntry(
+                revision=0, op=op, timestamp=time.time(),
+                added=added, changed=changed, removed=removed,
+            )
+        log.revision += 1
+        entry.revision = log.revision
+        log.entries.append(entry)
+
+    def record(self, name: str, old: Dict, new: Dict, patch: List[Dict[str, Any]], op: str) -> None:
+        """on_change-Listener (läuft unter dem Dokument-Lock)."""
+        with self._lock:
+            log = self._log(name)
+            # war zwischenzeitlich ein externer Stand aktiv, zuerst diesen erfassen
+            if log.document is not None and log.document is not old:
+                self._append(log, "external", log.document, old)
+            self._append(log, op, old, new)
+
+    def sync(self, name: str) -> int:
+        """Gleicht mit dem aktuellen Stand der Registry ab; liefert die Revision."""
+        document = registry.get(name)
+        with self._lock:
+            log = self._log(name)
+            if log.document is not document:
+                self._append(log, "external", log.document, document)
+            return log.revision
+
+    def changes_since(self, name: str, since: Optional[int], epoch: Optional[str] = None) -> Delta:
+        revision = self.sync(name)
+        with self._lock:
+            log = self._log(name)
+            entries = [e for e in log.entries if since is not None and e.revision > since]
+            oldest = log.entries[0].revision if log.entries else revision + 1
+
+        full = (
+            since is None
+            or epoch != self.epoch
+            or since > revision
+            or since < oldest - 1           # Protokoll wurde gekürzt
+            or any(e.full for e in entries)
+        )
+        if full:
+            return Delta(revision=revision, full=True)
+
+        state: Dict[str, bool] = {}         # ID → noch vorhanden?
+        for entry in entries:
+            for key in entry.added + entry.changed:
+                state[key] = True
+            for key in entry.removed:
+                state[key] = False
+        return Delta(
+            revision=revision,
+            full=False,
+            upserted=[k for k, present in state.items() if present],
+            removed=[k for k, present in state.items() if not present],
+            entries=entries,
+        )
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    "revision": log.revision,
+                    "entries": len(log.entries),
+                    "oldestRevision": log.entries[0].revision if log.entries else None,
+                }
+                for name, log in sorted(self._logs.items())
+            }
+
+
+change_log = ChangeLog(settings.CHANGE_LOG_MAX_ENTRIES)
+on_change(change_log.record)
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .catalog_utils import iter_catalog_controls
+
+
+# Strukturschlüssel, deren Werte als eigene Knoten gehasht werden; alle
+# übrigen Felder eines Objekts gehen kanonisch serialisiert in dessen Hash ein
+_OBJECT_KEYS = ("catalog", "metadata", "back-matter")
+_LIST_KEYS = ("groups", "controls", "parts", "mappings", "resources")
+
+# id(Knoten) → (Knoten, Hash, Hash der eigenen Felder); der Knoten selbst
+# wird mitgehalten, damit seine id nicht an ein neues Objekt vergeben wird
+_Node = Tuple[Any, bytes, bytes]
+
+
+def canonical_json(value: Any) -> bytes:
+    """Kanonische JSON-Form (sortierte Schlüssel, ohne Leerraum)."""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class ItemHash:
+    """Hash eines Controls (bzw. Mappings) samt Position im Dokument."""
+
+    digest: bytes
+    group_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    links: List[str] = field(default_factory=list)     # "#id"-Ziele
+
+
+class ContentHashes:
+    """
+    Merkle-Hashes eines (unveränderlichen) Dokuments: Katalog, Gruppen,
+    Controls, Parts, back-matter-Resources und Mappings bekommen je einen
+    Hash aus ihren eigenen Feldern (kanonisches JSON) und den Hashes ihrer
+    Kinder. Gleicher Hash ⇔ gleicher Inhalt, unabhängig von Formatierung
+    und Schlüsselreihenfolge.
+
+    Mit `previous` (Hashes eines Vorgänger-Stands) werden Knoten, die per
+    Copy-on-Write mit diesem geteilt sind, nicht neu gehasht – nach einer
+    Änderung nur der geänderte Pfad.
+    """
+
+    def __init__(self, document: Dict, previous: Optional["ContentHashes"] = None) -> None:
+        self.document = document
+        self._nodes: Dict[int, _Node] = {}
+        self._prior = previous._nodes if previous is not None else {}
+        try:
+            self.root = self._node(document)
+        finally:
+            del self._prior
+
+        self.items: Dict[str, ItemHash] = {}
+        if isinstance(document.get("mappings"), list):
+            for mapping in document["mappings"]:
+                if isinstance(mapping, dict) and mapping.get("sdm_control_id"):
+                    self.items.setdefault(mapping["sdm_control_id"], ItemHash(self._nodes[id(mapping)][1]))
+        elif isinstance(document.get("catalog"), dict):
+            for group_id, parent_id, ctrl in iter_catalog_controls(document):
+                if ctrl.get("id") and id(ctrl) in self._nodes:
+                    self.items.setdefault(ctrl["id"], ItemHash(
+                        digest=self._nodes[id(ctrl)][1],
+                        group_id=group_id,
+                        parent_id=parent_id,
+                        links=[
+                            link["href"][1:] for link in ctrl.get("links", []) or []
+                            if str(link.get("href", "")).startswith("#")
+                        ],
+                    ))
+
+        # Katalog-Kontext für aufgelöste Ansichten: globale Params, back-matter
+        catalog = document.get("catalog")
+        context = hashlib.sha1()
+        if isinstance(catalog, dict):
+            if id(catalog) in self._nodes:
+                context.update(self._nodes[id(catalog)][2])
+            context.update(self.digest(catalog.get("back-matter")) or b"")
+        self.context = context.digest()
+
+    @property
+    def root_hex(self) -> str:
+        return self.root.hex()
+
+    def digest(self, node: Any) -> Optional[bytes]:
+        """Hash eines Knotens dieses Dokuments (None, wenn nicht gehasht)."""
+        entry = self._nodes.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        return entry[1]
+
+    def _node(self, node: Any) -> bytes:
+        if not isinstance(node, dict):
+            return hashlib.sha1(canonical_json(node)).digest()
+
+        hit = self._prior.get(id(node))
+        if hit is not None and hit[0] is node:
+            # geteilter Teilbaum: Hash übernehmen, Kinder nur registrieren
+            self._nodes[id(node)] = hit
+            for key, value in self._children(node):
+                if isinstance(value, list):
+                    for child in value:
+                        self._node(child)
+                else:
+                    self._node(value)
+            return hit[1]
+
+        own: Dict[str, Any] = {}
+        nested: List[Tuple[str, Any]] = []
+        children = dict(self._children(node))
+        for key, value in node.items():
+            if key in children:
+                nested.append((key, value))
+            else:
+                own[key] = value
+        own_digest = hashlib.sha1(canonical_json(own)).digest()
+
+        h = hashlib.sha1(own_digest)
+        for key, value in sorted(nested, key=lambda kv: kv[0]):
+            h.update(key.encode("utf-8") + b"\x00")
+            if isinstance(value, list):
+                h.update(len(value).to_bytes(4, "big"))
+                for child in value:
+                    h.update(self._node(child))
+            else:
+                h.update(self._node(value))
+        digest = h.digest()
+        self._nodes[id(node)] = (node, digest, own_digest)
+        return digest
+
+    @staticmethod
+    def _children(node: Dict) -> List[Tuple[str, Any]]:
+        children: List[Tuple[str, Any]] = []
+        for key in _OBJECT_KEYS:
+            value = node.get(key)
+            if isinstance(value, dict):
+                children.append((key, value))
+        for key in _LIST_KEYS:
+            value = node.get(key)
+            if isinstance(value, list):
+                children.append((key, value))
+        return children
+
+    def etag(self, item_id: str, view: str, resolved: bool = False) -> Optional[str]:
+        """
+        ETag einer Detailansicht von `item_id`: ändert sich nur, wenn sich
+        das Control (inkl. Position) ändert – mit `resolved` zusätzlich bei
+        Änderungen an Katalog-Params/back-matter, Eltern-Controls und
+        verlinkten Controls. None, wenn es das Item nicht gibt.
+        """
+        item = self.items.get(item_id)
+        if item is None:
+            return None
+        h = hashlib.sha1(view.encode("utf-8") + b"\x00" + item.digest)
+        h.update(canonical_json([item.group_id, item.parent_id]))
+        if resolved:
+            h.update(self.context)
+            parent = item.parent_id
+            while parent is not None and parent in self.items:
+                h.update(self.items[parent].digest)
+                parent = self.items[parent].parent_id
+            for target in item.links:
+                linked = self.items.get(target)
+                h.update(linked.digest if linked is not None else b"-")
+        return h.hexdigest()[:32]
+
+
+class ContentHashCache:
+    """
+    Hashes der zuletzt gesehenen Stände je Dokument (höchstens zwei, d.h.
+    alter und neuer Stand eines Schreibvorgangs). Ein neuer Stand baut auf
+    dem letzten auf und hasht so nur die Teilbäume, die er nicht teilt.
+    """
+
+    KEEP = 2
+
+    def __init__(self) -> None:
+        self._recent: Dict[str, Deque[ContentHashes]] = {}
+        self._lock = threading.Lock()
+
+    def hashes(self, name: str, document: Dict) -> ContentHashes:
+        with self._lock:
+            recent = self._recent.setdefault(name, deque(maxlen=self.KEEP))
+            for hashes in recent:
+                if hashes.document is document:
+                    return hashes
+            previous = recent[-1] if recent else None
+        hashes = ContentHashes(document, previous)
+        with self._lock:
+            self._recent[name].append(hashes)
+        return hashes
+
+    def same(self, name: str, old: Dict, new: Dict) -> bool:
+        """Gleicher Inhalt? (z.B. um No-op-Schreibvorgänge zu überspringen)"""
+        if old is new:
+            return True
+        return self.hashes(name, old).root == self.hashes(name, new).root
+
+
+content_hashes = ContentHashCache()
@@ -0,0 +1,205 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .catalog_utils import get_prop_values, iter_catalog_controls
+from .file_service import FileService
+from ..models import CoverageBucket, CoverageReport, CoverageTarget
+from ..config import settings
+
+
+# Spalten der Inzidenzmatrix; "security" = Controls aus dem Resilience-Katalog
+SCHEMES: Tuple[str, ...] = ("bsi", "iso27001", "iso27701", "security")
+
+
+def _standard_code(value: str) -> str:
+    """"CON.2 Datenschutz" → "CON.2" (Mapping-Datei führt Code + Titel)."""
+    return value.strip().split(" ", 1)[0] if value else ""
+
+
+def _mask_from_indices(indices: Iterable[int], size: int) -> int:
+    """Bitmaske über `size` Zeilen; gebaut über ein bytearray statt n-mal `1 << i`."""
+    bits = bytearray((size + 7) // 8)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+# Bitpositionen je Byte-Wert, für _indices_from_mask
+_BYTE_BITS = [[bit for bit in range(8) if value >> bit & 1] for value in range(256)]
+_NON_ZERO_BYTE = re.compile(rb"[^\x00]")
+
+
+def _indices_from_mask(mask: int) -> List[int]:
+    """Gesetzte Bits als Zeilenindizes; Null-Bytes werden per Regex (in C) übersprungen."""
+    if not mask:
+        return []
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    return [
+        (m.start() << 3) + bit
+        for m in _NON_ZERO_BYTE.finditer(data)
+        for bit in _BYTE_BITS[data[m.start()]]
+    ]
+
+
+class CoverageMatrix:
+    """
+    Dünn besetzte Inzidenzmatrix SDM-Control × Ziel (BSI-Baustein, ISO-Control,
+    SEC-Control …), spaltenweise als Bitmasken über die Control-Zeilen abgelegt.
+
+    Abdeckung, Lücken und Aggregate je Ziel/Baustein sind damit reine
+    Bit-Operationen (AND/ANDNOT/popcount) über ganze Spalten statt Schleifen
+    über einzelne Controls.
+    """
+
+    def __init__(
+        self,
+        control_ids: List[str],
+        links: Dict[str, Dict[str, List[int]]],
+        goals: Dict[str, List[int]],
+        modules: Dict[str, List[int]],
+        security_control_ids: List[str],
+    ) -> None:
+        size = len(control_ids)
+        self.control_ids = control_ids
+        self.all_mask = (1 << size) - 1
+
+        # scheme → target → Maske der verweisenden Controls
+        self.target_masks: Dict[str, Dict[str, int]] = {
+            scheme: {target: _mask_from_indices(rows, size) for target, rows in targets.items()}
+            for scheme, targets in links.items()
+        }
+        # scheme → Maske aller Controls mit mind. einem Verweis
+        self.scheme_masks: Dict[str, int] = {}
+        for scheme in SCHEMES:
+            rows = set()
+            for target_rows in links.get(scheme, {}).values():
+                rows.update(target_rows)
+            self.scheme_masks[scheme] = _mask_from_indices(rows, size)
+
+        self.goal_masks = {goal: _mask_from_indices(rows, size) for goal, rows in goals.items()}
+        self.module_masks = {mod: _mask_from_indices(rows, size) for mod, rows in modules.items()}
+        self.security_control_ids = security_control_ids
+
+    def _ids(self, mask: int) -> List[str]:
+        return [self.control_ids[i] for i in _indices_from_mask(mask)]
+
+    def _bucket(self, key: str, mask: int) -> CoverageBucket:
+        return CoverageBucket(
+            key=key,
+            controlCount=mask.bit_count(),
+            covered={s: (mask & m).bit_count() for s, m in self.scheme_masks.items()},
+            gaps={s: self._ids(mask & ~m) for s, m in self.scheme_masks.items()},
+        )
+
+    def report(self, revision: str) -> CoverageReport:
+        security_refs = self.target_masks.get("security", {})
+        return CoverageReport(
+            revision=revision,
+            schemes=list(SCHEMES),
+            controlCount=len(self.control_ids),
+            covered={s: m.bit_count() for s, m in self.scheme_masks.items()},
+            uncoveredControls={s: self._ids(self.all_mask & ~m) for s, m in self.scheme_masks.items()},
+            byGoal=[self._bucket(k, m) for k, m in sorted(self.goal_masks.items())],
+            byModule=[self._bucket(k, m) for k, m in sorted(self.module_masks.items())],
+            targets={
+                scheme: sorted(
+                    (CoverageTarget(id=t, refCount=m.bit_count()) for t, m in targets.items()),
+                    key=lambda t: (-t.refCount, t.id),
+                )
+                for scheme, targets in self.target_masks.items()
+            },
+            unreferencedSecurityControls=[
+                sec_id
+                for sec_id in self.security_control_ids
+                if not security_refs.get(sec_id)
+            ],
+        )
+
+
+def build_coverage_matrix(sdm_catalog: Dict, mapping: Dict, resilience_catalog: Dict) -> CoverageMatrix:
+    """
+    Baut die Matrix aus
+    - related-mapping-Props im SDM-Katalog (class = scheme),
+    - Mapping-Datei (security_controls + standards).
+    """
+    control_ids: List[str] = []
+    row_of: Dict[str, int] = {}
+    goals: Dict[str, List[int]] = {}
+    modules: Dict[str, List[int]] = {}
+    links: Dict[str, Dict[str, List[int]]] = {scheme: {} for scheme in SCHEMES}
+
+    def link(scheme: str, target: str, row: int) -> None:
+        if target:
+            links.setdefault(scheme, {}).setdefault(target, []).append(row)
+
+    for _, _, ctrl in iter_catalog_controls(sdm_catalog):
+        ctrl_id = ctrl.get("id")
+        if not ctrl_id or ctrl_id in row_of:
+            continue
+        row = len(control_ids)
+        row_of[ctrl_id] = row
+        control_ids.append(ctrl_id)
+
+        for goal in get_prop_values(ctrl, "sdm-goal"):
+            goals.setdefault(goal, []).append(row)
+        for module in get_prop_values(ctrl, "sdm-module"):
+            modules.setdefault(module, []).append(row)
+
+        for prop in ctrl.get("props", []):
+            if prop.get("name") == "related-mapping":
+                link(prop.get("class") or "other", _standard_code(str(prop.get("value", ""))), row)
+
+    for raw in mapping.get("mappings", []) or []:
+        row = row_of.get(raw.get("sdm_control_id", ""))
+        if row is None:
+            continue
+        for sc in raw.get("security_controls", []) or []:
+            link("security", sc.get("control_id", ""), row)
+        standards = raw.get("standards", {}) or {}
+        for scheme in ("bsi", "iso27001", "iso27701"):
+            for value in standards.get(scheme) or []:
+                link(scheme, _standard_code(value), row)
+
+    security_ids = [
+        ctrl["id"] for _, _, ctrl in iter_catalog_controls(resilience_catalog) if ctrl.get("id")
+    ]
+
+    return CoverageMatrix(control_ids, links, goals, modules, security_ids)
+
+
+class CoverageService:
+    """
+    Liefert den Coverage-Report; die Matrix wird pro Revisionstripel
+    (SDM-Katalog, Mapping-Datei, Resilience-Katalog) nur einmal gebaut.
+    """
+
+    DOCUMENTS = (
+        settings.SDM_PRIVACY_CATALOG_NAME,
+        settings.SDM_MAPPING_NAME,
+        settings.RESILIENCE_CATALOG_NAME,
+    )
+
+    _lock = threading.Lock()
+    _cached: Optional[Tuple[Tuple[str, ...], CoverageReport]] = None
+
+    def __init__(self, file_service: Optional[FileService] = None) -> None:
+        self.fs = file_service or FileService()
+
+    def report(self) -> CoverageReport:
+        revisions = tuple(self.fs.revision(name) for name in self.DOCUMENTS)
+
+        cached = CoverageService._cached
+        if cached is not None and cached[0] == revisions:
+            return cached[1]
+
+        with CoverageService._lock:
+            cached = CoverageService._cached
+            if cached is not None and cached[0] == revisions:
+                return cached[1]
+
+            sdm, mapping, resilience = (self.fs.load_json(name) for name in self.DOCUMENTS)
+            matrix = build_coverage_matrix(sdm, mapping, resilience)
+            report = matrix.report(revision=":".join(revisions))
+            CoverageService._cached = (revisions, report)
+            return report
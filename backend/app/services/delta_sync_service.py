@@ -0,0 +1,98 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .change_log import ChangeLog, change_log
+from .file_service import FileService
+from .mapping_service import MappingService
+from .privacy_catalog_service import PrivacyCatalogService
+from .resilience_catalog_service import ResilienceCatalogService
+from .sdm_catalog_service import SdmCatalogService
+from ..models import ChangeLogEntry, DeltaSyncResponse, trusted
+from ..config import settings
+
+
+# Summaries wie in den Listen-Routen (fs, includeNested) + Schlüssel-Funktion je Dokument
+Lister = Tuple[Callable[[FileService, bool], List[Any]], Callable[[Any], str]]
+
+
+class DeltaSyncService:
+    """
+    "Änderungen seit Revision R" für die Listen der Kern-Dokumente: liefert
+    nur die Summaries geänderter/neuer Einträge und die IDs entfernter –
+    oder die komplette Liste, wenn der Client neu laden muss.
+
+    Das Änderungsprotokoll kennt alle Controls (auch verschachtelte); die
+    Antwort bezieht sich aber immer auf genau die Einträge, die der Lister
+    liefert: geänderte IDs, die nicht (mehr) in der Liste stehen – z.B. ein
+    Control, das unter ein anderes verschoben wurde –, gelten als entfernt.
+    """
+
+    LISTERS: Dict[str, Lister] = {
+        settings.SDM_PRIVACY_CATALOG_NAME: (
+            lambda fs, nested: SdmCatalogService(fs).list_controls(include_nested=nested),
+            lambda item: item.id,
+        ),
+        settings.PRIVACY_CATALOG_NAME: (
+            lambda fs, nested: PrivacyCatalogService(fs).list_controls(),
+            lambda item: item.id,
+        ),
+        settings.RESILIENCE_CATALOG_NAME: (
+            lambda fs, nested: ResilienceCatalogService(fs.load_json(settings.RESILIENCE_CATALOG_NAME)).list_controls(),
+            lambda item: item.id,
+        ),
+        settings.SDM_MAPPING_NAME: (
+            lambda fs, nested: MappingService(fs.load_json(settings.SDM_MAPPING_NAME)).list_mappings(),
+            lambda item: item.sdmControlId,
+        ),
+    }
+
+    def __init__(self, file_service: Optional[FileService] = None, log: Optional[ChangeLog] = None) -> None:
+        self.fs = file_service or FileService()
+        self.log = log or change_log
+
+    def changes(
+        self,
+        name: str,
+        since: Optional[int] = None,
+        epoch: Optional[str] = None,
+        include_nested: bool = False,
+    ) -> DeltaSyncResponse:
+        """
+        Unbekannte Dokumente lösen ValueError aus. `include_nested` wie der
+        gleichnamige Parameter der Listen-Route (nur SDM-Katalog).
+        """
+        lister = self.LISTERS.get(name)
+        if lister is None:
+            raise ValueError(f"Delta sync not supported for: {name}")
+        list_items, key = lister
+
+        delta = self.log.changes_since(name, since, epoch)
+        items = list_items(self.fs, include_nested)
+        removed = delta.removed
+        if not delta.full:
+            wanted = set(delta.upserted)
+            items = [item for item in items if key(item) in wanted]
+            listed = {key(item) for item in items}
+            removed = removed + [k for k in delta.upserted if k not in listed]
+
+        return trusted(
+            DeltaSyncResponse,
+            name=name,
+            epoch=self.log.epoch,
+            revision=delta.revision,
+            full=delta.full,
+            items=items,
+            removed=removed,
+            changes=[
+                trusted(
+                    ChangeLogEntry,
+                    revision=e.revision,
+                    op=e.op,
+                    timestamp=e.timestamp,
+                    added=e.added,
+                    changed=e.changed,
+                    removed=e.removed,
+                    full=e.full,
+                )
+                for e in delta.entries
+            ],
+        )
@@ -1,17 +1,135 @@
 # backend/app/services/diff_service.py
 
-from typing import Any, Dict, List
-from ..models import DiffResult, DiffSummary, DiffChange
+from typing import Any, Dict, List, Optional
 
+from .content_hashes import ContentHashes, content_hashes
+from ..models import DiffResult, DiffSummary, DiffChange, trusted
 
-def diff_json(old: Dict[str, Any], new: Dict[str, Any]) -> DiffResult:
+# Obergrenze für details (summary zählt trotzdem alle Änderungen)
+MAX_DETAILS = 500
+
+# Schlüssel, über die Listen-Elemente einander zugeordnet werden
+_ID_KEYS = ("id", "uuid", "sdm_control_id")
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _item_key(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        for key in _ID_KEYS:
+            value = item.get(key)
+            if isinstance(value, str) and value:
+                return value
+    return None
+
+
+class _Differ:
+    def __init__(self, old_hashes: Optional[ContentHashes], new_hashes: Optional[ContentHashes]) -> None:
+        self.old_hashes = old_hashes
+        self.new_hashes = new_hashes
+        self.counts = {"added": 0, "changed": 0, "removed": 0}
+        self.details: List[DiffChange] = []
+
+    def same(self, old: Any, new: Any) -> bool:
+        if old is new:
+            return True
+        if self.old_hashes is not None and self.new_hashes is not None:
+            old_digest, new_digest = self.old_hashes.digest(old), self.new_hashes.digest(new)
+            if old_digest is not None and new_digest is not None:
+                return old_digest == new_digest
+        return old == new
+
+    def record(self, change: str, path: str, old: Any = None, new: Any = None) -> None:
+        self.counts[change] += 1
+        if len(self.details) < MAX_DETAILS:
+            self.details.append(trusted(DiffChange, path=path or "/", change=change, old=old, new=new))
+
+    def walk(self, old: Any, new: Any, path: str) -> None:
+        if self.same(old, new):
+            return
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key, value in old.items():
+                if key not in new:
+                    self.record("removed", f"{path}/{_escape(key)}", old=value)
+            for key, value in new.items():
+                if key not in old:
+                    self.record("added", f"{path}/{_escape(key)}", new=value)
+                else:
+                    self.walk(old[key], value, f"{path}/{_escape(key)}")
+            return
+        if isinstance(old, list) and isinstance(new, list):
+            if not self.walk_keyed(old, new, path):
+                self.walk_positional(old, new, path)
+            return
+        self.record("changed", path, old=old, new=new)
+
+    def walk_keyed(self, old: List, new: List, path: str) -> bool:
+        """Listen mit eindeutigen IDs (Controls, Gruppen, Parts, …) nach ID zuordnen."""
+        old_keys = [_item_key(item) for item in old]
+        new_keys = [_item_key(item) for item in new]
+        if (
+            None in old_keys or None in new_keys
+            or len(set(old_keys)) != len(old_keys) or len(set(new_keys)) != len(new_keys)
+        ):
+            return False
+
+        old_by_key: Dict[str, Any] = dict(zip(old_keys, old))
+        new_by_key: Dict[str, Any] = dict(zip(new_keys, new))
+        for key in old_keys:
+            if key not in new_by_key:
+                self.record("removed", f"{path}/{_escape(key)}", old=old_by_key[key])
+        for key in new_keys:
+            if key not in old_by_key:
+                self.record("added", f"{path}/{_escape(key)}", new=new_by_key[key])
+            else:
+                self.walk(old_by_key[key], new_by_key[key], f"{path}/{_escape(key)}")
+
+        # reine Umsortierung als eine Änderung der Reihenfolge melden
+        old_order = [k for k in old_keys if k in new_by_key]
+        new_order = [k for k in new_keys if k in old_by_key]
+        if old_order != new_order:
+            self.record("changed", path, old=old_order, new=new_order)
+        return True
+
+    def walk_positional(self, old: List, new: List, path: str) -> None:
+        # gemeinsamen Anfang/Ende überspringen (wie json_patch.make_patch)
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and self.same(old[prefix], new[prefix]):
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and self.same(old[len(old) - 1 - suffix], new[len(new) - 1 - suffix]):
+            suffix += 1
+        old_mid = old[prefix:len(old) - suffix]
+        new_mid = new[prefix:len(new) - suffix]
+
+        common = min(len(old_mid), len(new_mid))
+        for i in range(common):
+            self.walk(old_mid[i], new_mid[i], f"{path}/{prefix + i}")
+        for i in range(common, len(new_mid)):
+            self.record("added", f"{path}/{prefix + i}", new=new_mid[i])
+        for i in range(common, len(old_mid)):
+            self.record("removed", f"{path}/{prefix + i}", old=old_mid[i])
+
+
+def diff_json(old: Dict[str, Any], new: Dict[str, Any], name: Optional[str] = None) -> DiffResult:
     """
-    Sehr einfache Stub-Implementierung:
-    - betrachtet noch keine echten Feldänderungen,
-    - liefert erst einmal nur ein leeres Diff-Ergebnis zurück.
+    Strukturelles Diff zweier Dokumentstände: hinzugefügte, geänderte und
+    entfernte Felder/Elemente mit Pfad (JSON-Pointer; Listen-Elemente mit
+    ID werden über diese adressiert und zugeordnet, sodass Einfügen oder
+    Verschieben eines Controls nicht alle folgenden als geändert meldet).
 
-    Später kann hier z.B. DeepDiff oder eine eigene Logik rein.
+    Identische Teilbäume werden übersprungen – geteilte Knoten (Copy-on-
+    Write) per Identität, sonst mit `name` über die Merkle-Hashes beider
+    Stände, ohne Hashes per Gleichheitsvergleich.
     """
-    summary = DiffSummary(added=0, changed=0, removed=0)
-    details: List[DiffChange] = []
-    return DiffResult(summary=summary, details=details)
+    old_hashes = new_hashes = None
+    if name is not None:
+        old_hashes = content_hashes.hashes(name, old)
+        new_hashes = content_hashes.hashes(name, new)
+    differ = _Differ(old_hashes, new_hashes)
+    differ.walk(old, new, "")
+    summary = trusted(DiffSummary, **differ.counts)
+    return trusted(DiffResult, summary=summary, details=differ.details)
@@ -0,0 +1,77 @@
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Sequence, Set, Union
+
+Path = Sequence[Union[str, int]]
+
+
+def find_control_path(document: Dict, control_id: str) -> Optional[List[Union[str, int]]]:
+    """
+    Pfad (Schlüssel/Indizes ab der Wurzel) zum Control `control_id` in
+    Gruppen, deren Unter-Controls oder direkt unter dem Katalog.
+    """
+    def walk(controls: List[Dict], prefix: List[Union[str, int]]) -> Optional[List[Union[str, int]]]:
+        for i, ctrl in enumerate(controls or []):
+            if ctrl.get("id") == control_id:
+                return prefix + [i]
+            found = walk(ctrl.get("controls", []), prefix + [i, "controls"])
+            if found is not None:
+                return found
+        return None
+
+    catalog = document.get("catalog") or {}
+    for gi, group in enumerate(catalog.get("groups", []) or []):
+        found = walk(group.get("controls", []), ["catalog", "groups", gi, "controls"])
+        if found is not None:
+            return found
+    return walk(catalog.get("controls", []), ["catalog", "controls"])
+
+
+class DocumentEditor:
+    """
+    Copy-on-Write-Bearbeitung eines geteilten Dokument-Stands (Registry).
+
+    `base` wird nie verändert. writable() kopiert nur die Container entlang
+    eines Pfads (flach) und liefert den eigenen Container am Ende; own()
+    ersetzt einen Teilbaum (z.B. ein Control) durch eine tiefe Kopie. Alles
+    andere teilt `root` mit `base` – Leser des alten Stands sehen nie halb
+    angewendete Änderungen, und der neue Stand kostet nur die kopierten Pfade.
+    """
+
+    def __init__(self, base: Dict) -> None:
+        self.base = base
+        self.root = base
+        # optional: bereits serialisierter neuer Stand (spart das Serialisieren)
+        self.content: Optional[str] = None
+        self._owned: Set[int] = set()
+
+    @property
+    def changed(self) -> bool:
+        return self.root is not self.base
+
+    def _copy(self, node: Any) -> Any:
+        if id(node) in self._owned:
+            return node
+        if isinstance(node, dict):
+            node = dict(node)
+        elif isinstance(node, list):
+            node = list(node)
+        else:
+            raise TypeError(f"Cannot edit {type(node).__name__} in place")
+        self._owned.add(id(node))
+        return node
+
+    def writable(self, path: Path = ()) -> Any:
+        """Eigener (kopierter) Container am Pfad, samt kopierter Vorfahren."""
+        node = self.root = self._copy(self.root)
+        for key in path:
+            child = self._copy(node[key])
+            node[key] = child
+            node = child
+        return node
+
+    def own(self, path: Path) -> Any:
+        """Teilbaum am Pfad als private tiefe Kopie – frei veränderbar."""
+        parent = self.writable(path[:-1])
+        node = parent[path[-1]] = deepcopy(parent[path[-1]])
+        self._owned.add(id(node))
+        return node
@@ -0,0 +1,236 @@
+import hashlib
+import random
+import re
+import threading
+import zlib
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+from .catalog_utils import iter_catalog_controls
+from .suggest_service import normalize
+from ..config import settings
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+@dataclass(frozen=True)
+class ProseLocation:
+    catalog: str
+    control_id: str
+    part_id: Optional[str]
+    part_name: str
+    prose: str
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """Wort-Shingles (gehasht auf 32 Bit); kurze Texte ergeben ein Shingle."""
+    words = _WORD.findall(normalize(text))
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash über NUM_PERM Hash-Permutationen h(x) = (a·x + b) mod p."""
+
+    def __init__(self, num_perm: int, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, values: Set[int]) -> array:
+        if not values:
+            return array("Q", [_MAX_HASH] * self.num_perm)
+        return array("Q", (
+            min((a * x + b) % _PRIME for x in values) & _MAX_HASH
+            for a, b in self._perms
+        ))
+
+
+def estimate_similarity(left: array, right: array) -> float:
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class _UnionFind:
+    def __init__(self) -> None:
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+
+class DuplicateService:
+    """
+    Findet nahezu gleiche Prosa (parts[].prose) über alle registrierten Kataloge:
+
+    - Wort-Shingles → MinHash-Signatur (NUM_PERM Werte); Signaturen werden
+      pro Prosa-Hash gecacht, unveränderte Parts werden also nicht neu gehasht.
+    - LSH-Banding: Signatur in BANDS Bänder zu je ROWS Werten; nur Parts, die
+      in mind. einem Band übereinstimmen, werden als Paar geprüft – statt aller
+      n² Paare.
+    - Kandidaten werden über die geschätzte Jaccard-Ähnlichkeit gefiltert und
+      per Union-Find zu Clustern zusammengefasst.
+
+    Große Referenzkataloge (Streaming-Import) bleiben außen vor.
+    """
+
+    _signatures: Dict[str, array] = {}
+    _lock = threading.Lock()
+    _hasher: Optional[MinHasher] = None
+
+    def __init__(self, catalog_registry: Optional[CatalogRegistry] = None) -> None:
+        self.registry = catalog_registry or registry
+        cls = type(self)
+        if cls._hasher is None or cls._hasher.num_perm != settings.DUPLICATE_NUM_PERM:
+            cls._hasher = MinHasher(settings.DUPLICATE_NUM_PERM)
+            cls._signatures = {}
+
+    # ------------------------ Einsammeln ------------------------
+
+    def catalogs(self) -> List[str]:
+        return [name for name in self.registry.names("catalog") if not self.registry.is_large(name)]
+
+    def iter_prose(self, catalogs: Iterable[str], part_names: Optional[Set[str]] = None) -> Iterable[ProseLocation]:
+        for name in catalogs:
+            for _, _, ctrl in iter_catalog_controls(self.registry.get(name)):
+                stack = list(ctrl.get("parts", []) or [])
+                while stack:
+                    part = stack.pop()
+                    stack.extend(part.get("parts", []) or [])
+                    prose = part.get("prose")
+                    if not prose or (part_names and part.get("name") not in part_names):
+                        continue
+                    yield ProseLocation(
+                        catalog=name,
+                        control_id=ctrl.get("id", ""),
+                        part_id=part.get("id"),
+                        part_name=part.get("name", ""),
+                        prose=prose,
+                    )
+
+    # ------------------------ Signaturen ------------------------
+
+    def _signature(self, prose: str, stats: Dict[str, int]) -> Tuple[str, array]:
+        digest = hashlib.sha1(normalize(prose).encode("utf-8")).hexdigest()
+        signature = self._signatures.get(digest)
+        if signature is None:
+            signature = self._hasher.signature(shingles(prose, settings.DUPLICATE_SHINGLE_SIZE))
+            self._signatures[digest] = signature
+            stats["computedSignatures"] += 1
+        else:
+            stats["cachedSignatures"] += 1
+        return digest, signature
+
+    # ------------------------ Suche ------------------------
+
+    def find_clusters(
+        self,
+        threshold: float = 0.8,
+        catalogs: Optional[List[str]] = None,
+        part_names: Optional[Set[str]] = None,
+        min_words: Optional[int] = None,
+    ) -> Dict:
+        """
+        Cluster nahezu gleicher Prosa mit geschätzter Jaccard-Ähnlichkeit
+        >= threshold; unbekannte Kataloge lösen ValueError aus.
+        """
+        known = self.catalogs()
+        selected = catalogs or known
+        unknown = [name for name in selected if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown catalog(s): {', '.join(unknown)}")
+        min_words = settings.DUPLICATE_MIN_WORDS if min_words is None else min_words
+
+        stats = {"parts": 0, "computedSignatures": 0, "cachedSignatures": 0, "candidatePairs": 0, "pairs": 0}
+        locations: List[ProseLocation] = []
+        signatures: List[array] = []
+        bands = settings.DUPLICATE_BANDS
+        rows = settings.DUPLICATE_NUM_PERM // bands
+        buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+
+        with self._lock:
+            used: Set[str] = set()
+            for loc in self.iter_prose(selected, part_names):
+                if len(_WORD.findall(loc.prose)) < min_words:
+                    continue
+                digest, signature = self._signature(loc.prose, stats)
+                used.add(digest)
+                idx = len(locations)
+                locations.append(loc)
+                signatures.append(signature)
+                for band in range(bands):
+                    buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(idx)
+            # nach einem vollständigen Lauf Signaturen verschwundener Texte
+            # verwerfen (Cache wächst nicht unbegrenzt)
+            if catalogs is None and not part_names:
+                for digest in [d for d in self._signatures if d not in used]:
+                    del self._signatures[digest]
+        stats["parts"] = len(locations)
+
+        candidates: Set[Tuple[int, int]] = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    candidates.add((left, right))
+        stats["candidatePairs"] = len(candidates)
+
+        union = _UnionFind()
+        pair_scores: Dict[Tuple[int, int], float] = {}
+        for left, right in candidates:
+            score = estimate_similarity(signatures[left], signatures[right])
+            if score >= threshold:
+                pair_scores[(left, right)] = score
+                union.union(left, right)
+        stats["pairs"] = len(pair_scores)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for idx in union.parent:
+            groups[union.find(idx)].append(idx)
+        cluster_scores: Dict[int, List[float]] = defaultdict(list)
+        for (left, _), score in pair_scores.items():
+            cluster_scores[union.find(left)].append(score)
+
+        clusters = []
+        for root, members in groups.items():
+            members.sort(key=lambda i: (locations[i].catalog, locations[i].control_id, locations[i].part_id or ""))
+            scores = cluster_scores[root]
+            clusters.append({
+                "size": len(members),
+                "maxSimilarity": round(max(scores), 3),
+                "minSimilarity": round(min(scores), 3),
+                "exact": len({normalize(locations[i].prose) for i in members}) == 1,
+                "members": [
+                    {
+                        "catalog": locations[i].catalog,
+                        "controlId": locations[i].control_id,
+                        "partId": locations[i].part_id,
+                        "partName": locations[i].part_name,
+                        "prose": locations[i].prose,
+                    }
+                    for i in members
+                ],
+            })
+        clusters.sort(key=lambda c: (-c["size"], -c["maxSimilarity"], c["members"][0]["controlId"]))
+        return {"items": clusters, "stats": stats, "threshold": threshold}
@@ -0,0 +1,542 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+from .json_patch import apply_patch, apply_patch_copy, guard_patch, make_patch
+from ..config import settings
+
+try:  # optional: ohne fcntl (Windows) keine prozessübergreifenden Locks
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_document(document: Dict) -> str:
+    """Dateiformat der Workbench (wie _save_catalog der Services)."""
+    return json.dumps(document, indent=2, ensure_ascii=False)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Schreibt über eine Temp-Datei + fsync + os.replace (nie halbe Dateien)."""
+    # eindeutig je Prozess/Thread: parallele Schreiber teilen nie eine Temp-Datei
+    tmp = path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with tmp.open("wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _dump(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exklusiver, prozessübergreifender Lock (flock) auf `path`."""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+class _RebaseConflict(ValueError):
+    pass
+
+
+class _DocumentState:
+    """Journal-Zustand eines Dokuments (alles unter `lock`)."""
+
+    def __init__(self, name: str, journal_file: Path) -> None:
+        self.name = name
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.started = False
+        self.seq = 0
+        self.flushed_seq = 0
+        self.records: List[Tuple[int, str]] = []   # seit dem letzten Flush
+        # Stand der Datei, auf dem die offenen Edits aufbauen (Hash + Dokument)
+        self.base_hash: Optional[str] = None
+        self.base_document: Optional[Dict] = None
+        self.document: Optional[Dict] = None
+        self.content: Optional[str] = None
+        self.first_dirty_at: Optional[float] = None
+        self.last_write_at: float = 0.0
+
+    @property
+    def dirty(self) -> bool:
+        return self.seq > self.flushed_seq
+
+
+class EditJournal:
+    """
+    Write-Behind-Journal für Dokument-Änderungen.
+
+    Jede Änderung wird als kleiner JSON-Patch-Record an
+    `<journal_dir>/<name>.<owner>.jsonl` angehängt und per fsync dauerhaft
+    gemacht (owner = PID + Startzeit: jeder Prozess hat eigene Journale);
+    der neue Stand liegt ab dann in der CatalogRegistry (dirty). Ein
+    Hintergrund-Thread schreibt die vollständige Datei gebündelt – nach
+    `idle_ms` ohne weitere Änderung, spätestens nach `max_delay_ms`.
+
+    Aufbau einer Journal-Datei (JSON Lines):
+
+        {"type": "base",  "name": ..., "owner": ..., "hash": <sha256 der Datei>, "seq": n}
+        {"type": "edit",  "seq": n+1, "op": ..., "ts": ..., "patch": [...]}
+        {"type": "flush", "seq": k, "hash": <sha256 des geschriebenen Stands>}
+
+    Beim Start (recover) wird anhand der Hashes bestimmt, ab welchem Record
+    die Datei nachgezogen werden muss: passt die Datei zum Base-Hash, werden
+    alle Edits angewendet, passt sie zu einem Flush-Marker, nur die danach.
+    Passt sie zu keinem (extern geändert), wird das Journal beiseite gelegt.
+    Mehrere Worker recovern nacheinander (flock auf dem Verzeichnis) und nur
+    Journale von Prozessen, die nicht mehr laufen: jeder Prozess hält
+    solange einen flock auf `<owner>.owner`.
+
+    Hinweis: Der noch nicht geschriebene Stand ist nur in diesem Prozess
+    sichtbar; andere Worker sehen ihn erst nach dem Flush. Hat ein anderer
+    Prozess die Datei inzwischen geschrieben, werden die offenen Edits beim
+    Flush auf dessen Stand umgesetzt (mit test-Ops, siehe guard_patch);
+    scheitert das, wird das Journal beiseite gelegt statt fremde Änderungen
+    zu überschreiben. Deshalb ist Write-Behind standardmäßig aus.
+    """
+
+    def __init__(
+        self,
+        journal_dir: Path,
+        catalog_registry: CatalogRegistry,
+        idle_ms: int,
+        max_delay_ms: int,
+    ) -> None:
+        self.journal_dir = journal_dir
+        self.registry = catalog_registry
+        self.idle = idle_ms / 1000.0
+        self.max_delay = max_delay_ms / 1000.0
+        self._states: Dict[str, _DocumentState] = {}
+        self._states_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._epoch = f"{time.time_ns():x}"
+        self.owner = f"{os.getpid()}-{self._epoch}"
+        self._owner_fh: Optional[IO[str]] = None
+        self.recovered: List[Dict[str, Any]] = []
+
+    # ------------------------ Zustand ------------------------
+
+    @staticmethod
+    def _safe(name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+    def _journal_file(self, name: str) -> Path:
+        return self.journal_dir / f"{self._safe(name)}.{self.owner}.jsonl"
+
+    def _directory_lock(self):
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        return _file_lock(self.journal_dir / ".lock")
+
+    def _document_lock(self, name: str):
+        """Serialisiert Flushes desselben Dokuments über alle Prozesse."""
+        return _file_lock(self.journal_dir / f"{self._safe(name)}.lock")
+
+    def _claim_owner(self) -> None:
+        """Lebenszeichen dieses Prozesses für recover() anderer Worker."""
+        if self._owner_fh is not None or fcntl is None:
+            return
+        with self._directory_lock():
+            fh = (self.journal_dir / f"{self.owner}.owner").open("a")
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            self._owner_fh = fh
+
+    def _owner_alive(self, owner: str) -> bool:
+        if owner == self.owner:
+            return True
+        owner_file = self.journal_dir / f"{owner}.owner"
+        if fcntl is None or not owner_file.exists():
+            return False
+        with owner_file.open("a") as fh:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        return False
+
+    def _state(self, name: str) -> _DocumentState:
+        with self._states_lock:
+            state = self._states.get(name)
+            if state is None:
+                state = self._states[name] = _DocumentState(name, self._journal_file(name))
+            return state
+
+    def _append(self, state: _DocumentState, lines: List[str]) -> None:
+        with state.journal_file.open("a", encoding="utf-8") as fh:
+            fh.write("".join(line + "\n" for line in lines))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _rewrite(self, state: _DocumentState, base_hash: str) -> None:
+        """Kompaktiert das Journal: neuer Base-Record + noch offene Edits."""
+        header = _dump({
+            "type": "base", "name": state.name, "owner": self.owner, "hash": base_hash, "seq": state.flushed_seq,
+        })
+        data = "".join(line + "\n" for line in [header] + [l for _, l in state.records])
+        atomic_write(state.journal_file, data.encode("utf-8"))
+
+    def _start(self, state: _DocumentState) -> None:
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._claim_owner()
+        # noch nichts offen: der Stand der Registry ist der der Datei
+        state.base_document = self.registry.get(state.name)
+        disk = self.registry.path(state.name).read_bytes()
+        state.base_hash = _digest(disk)
+        self._rewrite(state, state.base_hash)
+        state.started = True
+
+    # ------------------------ Schreiben ------------------------
+
+    def record(
+        self,
+        name: str,
+        op: str,
+        document: Dict,
+        content: Optional[str] = None,
+        patch: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Journalisiert den neuen Stand `document` (wird damit geteilt/read-only)
+        und gibt die Sequenznummer zurück. `content` ist optional der exakte
+        Dateitext, der beim Flush geschrieben werden soll; `patch` der bereits
+        berechnete Patch vom aktuellen Stand zu `document`.
+        """
+        state = self._state(name)
+        with state.lock:
+            if patch is None:
+                patch = make_patch(self.registry.get(name), document)
+            if not patch:
+                return state.seq
+            if not state.started:
+                self._start(state)
+
+            seq = state.seq + 1
+            line = _dump({"type": "edit", "seq": seq, "op": op, "ts": time.time(), "patch": patch})
+            self._append(state, [line])
+
+            now = time.monotonic()
+            state.records.append((seq, line))
+            state.seq = seq
+            state.document = document
+            state.content = content
+            state.last_write_at = now
+            if state.first_dirty_at is None:
+                state.first_dirty_at = now
+            self.registry.put(name, document, f"wb{self._epoch}-{seq:x}")
+
+        self._ensure_thread()
+        with self._wakeup:
+            self._wakeup.notify()
+        return seq
+
+    def pending_content(self, name: str) -> Optional[str]:
+        """Dateitext des noch nicht geschriebenen Stands (None = Datei ist aktuell)."""
+        with self._states_lock:
+            state = self._states.get(name)
+        if state is None:
+            return None
+        with state.lock:
+            if not state.dirty:
+                return None
+            if state.content is None:
+                state.content = serialize_document(state.document)
+            return state.content
+
+    # ------------------------ Flush ------------------------
+
+    def flush(self, name: str) -> bool:
+        """Schreibt den aktuellen Stand eines Dokuments auf die Platte."""
+        state = self._state(name)
+        with state.flush_lock, self._document_lock(name):
+            with state.lock:
+                if not state.dirty:
+                    return False
+                disk = self.registry.path(name).read_bytes()
+                if _digest(disk) != state.base_hash:
+                    # Datei inzwischen von einem anderen Prozess geschrieben
+                    try:
+                        self._rebase(state, disk)
+                    except _RebaseConflict as e:
+                        self._set_aside(state, str(e))
+                        return False
+                seq, document, content = state.seq, state.document, state.content
+            if content is None:
+                content = serialize_document(document)
+            data = content.encode("utf-8")
+            digest = _digest(data)
+
+            with state.lock:
+                self._append(state, [_dump({"type": "flush", "seq": seq, "hash": digest})])
+            atomic_write(self.registry.path(name), data)
+
+            with state.lock:
+                state.flushed_seq = seq
+                state.base_hash = digest
+                state.base_document = document
+                state.records = [(s, l) for s, l in state.records if s > seq]
+                self._rewrite(state, digest)
+                if state.dirty:
+                    state.first_dirty_at = state.last_write_at
+                else:
+                    state.first_dirty_at = None
+                    state.content = None
+                    self.registry.mark_clean(name, document)
+            return True
+
+    def _rebase(self, state: _DocumentState, disk: bytes) -> None:
+        """
+        Setzt die offenen Edits (netto: Basis → aktueller Stand, mit test-Ops)
+        auf den Stand `disk` um, den ein anderer Prozess geschrieben hat. Das
+        Journal bekommt diesen Stand als Basis und einen Edit-Record darauf;
+        der umgesetzte Stand ersetzt den in der Registry (Aufruf unter state.lock).
+        """
+        theirs = json.loads(disk.decode("utf-8"))
+        ours = guard_patch(state.base_document, make_patch(state.base_document, state.document))
+        try:
+            merged = apply_patch_copy(theirs, ours)
+        except ValueError as e:
+            raise _RebaseConflict(f"pending edits conflict with the file on disk ({e})") from e
+
+        seq = state.seq + 1
+        line = _dump({"type": "edit", "seq": seq, "op": "rebase", "ts": time.time(), "patch": make_patch(theirs, merged)})
+        state.records = [(seq, line)]
+        state.seq = seq
+        state.base_hash = _digest(disk)
+        state.base_document = theirs
+        state.document = merged
+        state.content = None
+        self._rewrite(state, state.base_hash)
+        self.registry.put(state.name, merged, f"wb{self._epoch}-{seq:x}")
+        logger.warning("%s was written by another process, rebased pending edits", state.name)
+
+    def _set_aside(self, state: _DocumentState, reason: str) -> None:
+        """Offene Edits verwerfen (Journal bleibt als .conflict-Datei erhalten)."""
+        logger.warning("Write-behind flush of %s failed: %s; journal moved aside", state.name, reason)
+        if state.journal_file.exists():
+            state.journal_file.rename(state.journal_file.with_suffix(f".conflict-{int(time.time())}"))
+        state.flushed_seq = state.seq
+        state.records = []
+        state.started = False
+        state.first_dirty_at = None
+        state.document = state.content = state.base_document = None
+        self.registry.discard(state.name)
+
+    def release(self, name: str) -> None:
+        """
+        Vor einem direkten Schreiben am Journal vorbei (Transaktionen, unter
+        dem Dokument-Lock): offenen Stand schreiben und das Journal des
+        Dokuments schließen – der nächste Edit beginnt mit neuem Base-Record.
+        """
+        self.flush(name)
+        with self._states_lock:
+            state = self._states.get(name)
+        if state is None:
+            return
+        with state.lock:
+            if state.started and not state.dirty:
+                state.journal_file.unlink(missing_ok=True)
+                state.records = []
+                state.started = False
+
+    def flush_all(self) -> List[str]:
+        with self._states_lock:
+            names = list(self._states)
+        return [name for name in names if self.flush(name)]
+
+    def _due(self, now: float) -> Tuple[List[str], Optional[float]]:
+        """Fällige Dokumente + Sekunden bis zum nächsten Fälligkeitszeitpunkt."""
+        due: List[str] = []
+        next_in: Optional[float] = None
+        with self._states_lock:
+            states = list(self._states.values())
+        for state in states:
+            with state.lock:
+                if not state.dirty:
+                    continue
+                deadline = min(state.last_write_at + self.idle, state.first_dirty_at + self.max_delay)
+            if deadline <= now:
+                due.append(state.name)
+            else:
+                next_in = deadline - now if next_in is None else min(next_in, deadline - now)
+        return due, next_in
+
+    def _run(self) -> None:
+        while True:
+            due, next_in = self._due(time.monotonic())
+            failed = False
+            for name in due:
+                try:
+                    self.flush(name)
+                except Exception:  # pragma: no cover - Platte voll o.ä.; Journal bleibt gültig
+                    logger.exception("Write-behind flush of %s failed", name)
+                    failed = True
+            if due and not failed:
+                continue
+            with self._wakeup:
+                if self._stopping:
+                    return
+                self._wakeup.wait(self.idle if failed else next_in)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            with self._wakeup:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name="edit-journal-flush", daemon=True)
+                    self._thread.start()
+
+    def close(self) -> None:
+        """Stoppt den Flush-Thread und schreibt alle offenen Stände."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush_all()
+        with self._states_lock:
+            states = list(self._states.values())
+        for state in states:
+            with state.lock:
+                if state.started and not state.dirty:
+                    state.journal_file.unlink(missing_ok=True)
+                    state.records = []
+                    state.started = False
+        if self._owner_fh is not None:
+            (self.journal_dir / f"{self.owner}.owner").unlink(missing_ok=True)
+            self._owner_fh.close()
+            self._owner_fh = None
+
+    # ------------------------ Recovery ------------------------
+
+    @staticmethod
+    def _read_records(path: Path) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # abgeschnittener Record (Absturz während des Schreibens) → Ende
+                break
+        return records
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """
+        Zieht beim Start alle Journale beendeter Prozesse nach, deren Edits
+        noch nicht in der Datei stehen, und setzt diese Journale zurück.
+        """
+        report: List[Dict[str, Any]] = []
+        if not self.journal_dir.exists():
+            return report
+
+        with self._directory_lock():
+            report = self._recover_unlocked()
+        self.recovered = report
+        return report
+
+    def _recover_unlocked(self) -> List[Dict[str, Any]]:
+        report: List[Dict[str, Any]] = []
+        for journal_file in sorted(self.journal_dir.glob("*.jsonl")):
+            records = self._read_records(journal_file)
+            header = records[0] if records and records[0].get("type") == "base" else None
+            owner = header.get("owner") if header else None
+            if owner and self._owner_alive(owner):
+                continue    # gehört einem laufenden Worker
+            name = header.get("name") if header else None
+            try:
+                path = self.registry.path(name) if name else None
+            except ValueError:
+                path = None
+            if path is None or not path.exists():
+                logger.warning("Journal %s refers to unknown document %r, moved aside", journal_file, name)
+                journal_file.rename(journal_file.with_suffix(f".orphan-{int(time.time())}"))
+                report.append({"name": name, "status": "orphaned", "replayed": 0})
+                continue
+
+            disk = path.read_bytes()
+            disk_hash = _digest(disk)
+            start: Optional[int] = header["seq"] if header.get("hash") == disk_hash else None
+            for rec in records:
+                if rec.get("type") == "flush" and rec.get("hash") == disk_hash:
+                    start = rec["seq"]
+            if start is None:
+                logger.warning("Journal %s does not match %s (changed externally?), moved aside", journal_file, path)
+                journal_file.rename(journal_file.with_suffix(f".conflict-{int(time.time())}"))
+                report.append({"name": name, "status": "conflict", "replayed": 0})
+                continue
+
+            edits = [r for r in records if r.get("type") == "edit" and r["seq"] > start]
+            if edits:
+                document = json.loads(disk.decode("utf-8"))
+                for rec in edits:
+                    document = apply_patch(document, rec["patch"])
+                atomic_write(path, serialize_document(document).encode("utf-8"))
+                self.registry.invalidate(name)
+                logger.info("Replayed %d journal record(s) onto %s", len(edits), path)
+            journal_file.unlink()
+            report.append({"name": name, "status": "replayed" if edits else "clean", "replayed": len(edits)})
+
+        for owner_file in self.journal_dir.glob("*.owner"):
+            if not self._owner_alive(owner_file.stem):
+                owner_file.unlink(missing_ok=True)
+        return report
+
+    # ------------------------ Reporting ------------------------
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._states_lock:
+            states = list(self._states.values())
+        result = []
+        for state in states:
+            with state.lock:
+                result.append({
+                    "name": state.name,
+                    "seq": state.seq,
+                    "flushedSeq": state.flushed_seq,
+                    "dirty": state.dirty,
+                    "pendingRecords": len(state.records),
+                })
+        return sorted(result, key=lambda s: s["name"])
+
+
+journal = EditJournal(
+    settings.JOURNAL_PATH,
+    registry,
+    idle_ms=settings.WRITE_BEHIND_IDLE_MS,
+    max_delay_ms=settings.WRITE_BEHIND_MAX_DELAY_MS,
+)
+
+# offene Stände auch ohne ASGI-Shutdown (CLI, Tests) nicht verlieren
+atexit.register(journal.close)
@@ -0,0 +1,326 @@
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from .catalog_utils import iter_catalog_controls
+from .reference_catalog_service import ReferenceCatalogIndex
+
+
+# Trennzeichen für mehrfach vorkommende Props in einer Zelle
+MULTI_VALUE_SEPARATOR = "; "
+
+# nach so vielen Zeilen wird ein Chunk an den Client geschickt
+ROWS_PER_CHUNK = 200
+
+CONTROL_BASE_COLUMNS = ["group_id", "control_id", "parent_id", "title", "class"]
+
+MAPPING_COLUMNS = [
+    "sdm_control_id",
+    "sdm_title",
+    "sdm_group_id",
+    "target_type",
+    "catalog_id",
+    "target_id",
+    "target_title",
+    "remarks",
+    "source",
+]
+
+
+# ------------------------ Zeilen-Generatoren ------------------------
+
+def control_columns(catalog_dict: Dict) -> List[str]:
+    """
+    Spaltenkopf für den Control-Export: feste Basisspalten plus eine Spalte je
+    Prop-Name (in Reihenfolge des ersten Auftretens). Dafür ist ein Durchlauf
+    über die Props nötig – es werden dabei aber keine Zeilen gepuffert.
+    """
+    prop_names: Dict[str, None] = {}
+    for _, _, ctrl in iter_catalog_controls(catalog_dict):
+        for prop in ctrl.get("props", []):
+            name = prop.get("name")
+            if name:
+                prop_names.setdefault(name, None)
+    return CONTROL_BASE_COLUMNS + [f"prop:{name}" for name in prop_names]
+
+
+def iter_control_rows(catalog_dict: Dict, columns: Sequence[str]) -> Iterator[List[str]]:
+    prop_columns = [c[len("prop:"):] for c in columns[len(CONTROL_BASE_COLUMNS):]]
+
+    for group_id, parent_id, ctrl in iter_catalog_controls(catalog_dict):
+        values: Dict[str, List[str]] = {}
+        for prop in ctrl.get("props", []):
+            name = prop.get("name")
+            value = prop.get("value")
+            if name and value is not None:
+                values.setdefault(name, []).append(str(value))
+
+        row = [
+            group_id or "",
+            ctrl.get("id", ""),
+            parent_id or "",
+            ctrl.get("title", ""),
+            ctrl.get("class", "") or "",
+        ]
+        row.extend(MULTI_VALUE_SEPARATOR.join(values.get(name, [])) for name in prop_columns)
+        yield row
+
+
+def reference_control_columns(index: ReferenceCatalogIndex) -> List[str]:
+    """Wie control_columns(), aber aus dem Streaming-Index eines großen Katalogs."""
+    prop_names: Dict[str, None] = {}
+    for ctrl_id in index.order:
+        for name, _ in index.controls[ctrl_id].props:
+            prop_names.setdefault(name, None)
+    return CONTROL_BASE_COLUMNS + [f"prop:{name}" for name in prop_names]
+
+
+def iter_reference_control_rows(index: ReferenceCatalogIndex, columns: Sequence[str]) -> Iterator[List[str]]:
+    """Wie iter_control_rows(), aber aus dem Streaming-Index (ohne geparstes Dokument)."""
+    prop_columns = [c[len("prop:"):] for c in columns[len(CONTROL_BASE_COLUMNS):]]
+
+    for ctrl_id in index.order:
+        ctrl = index.controls[ctrl_id]
+        values: Dict[str, List[str]] = {}
+        for name, value in ctrl.props:
+            values.setdefault(name, []).append(value)
+
+        row = [ctrl.group_id or "", ctrl.id, ctrl.parent_id or "", ctrl.title, ctrl.class_ or ""]
+        row.extend(MULTI_VALUE_SEPARATOR.join(values.get(name, [])) for name in prop_columns)
+        yield row
+
+
+def _catalog_mapping_rows(catalog_dict: Dict) -> Iterator[List[str]]:
+    """related-mapping-Props aus dem SDM-Katalog als Matrix-Zeilen."""
+    for group_id, _, ctrl in iter_catalog_controls(catalog_dict):
+        for prop in ctrl.get("props", []):
+            if prop.get("name") != "related-mapping":
+                continue
+            yield [
+                ctrl.get("id", ""),
+                ctrl.get("title", ""),
+                group_id or "",
+                prop.get("class") or "other",
+                "",
+                str(prop.get("value", "")),
+                "",
+                prop.get("remarks") or "",
+                "catalog-prop",
+            ]
+
+
+def iter_mapping_rows(mapping_dict: Dict, sdm_catalog_dict: Optional[Dict] = None) -> Iterator[List[str]]:
+    """
+    Mapping-Matrix im Long-Format: eine Zeile pro Verknüpfung
+    SDM-Control × (Security-Control | BSI | ISO 27001 | ISO 27701).
+
+    Optional werden zusätzlich die related-mapping-Props des SDM-Katalogs
+    ausgegeben (Spalte `source` unterscheidet die Herkunft).
+    """
+    for raw in mapping_dict.get("mappings", []) or []:
+        sdm_id = raw.get("sdm_control_id", "")
+        sdm_title = raw.get("sdm_title", "")
+        sdm_group = raw.get("sdm_group_id", "") or ""
+
+        for sc in raw.get("security_controls", []) or []:
+            yield [
+                sdm_id,
+                sdm_title,
+                sdm_group,
+                "security-control",
+                sc.get("catalog_id", ""),
+                sc.get("control_id", ""),
+                sc.get("control_title", "") or "",
+                "",
+                "mapping",
+            ]
+
+        standards = raw.get("standards", {}) or {}
+        for scheme in ("bsi", "iso27001", "iso27701"):
+            for value in standards.get(scheme) or []:
+                yield [sdm_id, sdm_title, sdm_group, scheme, "", value, "", "", "mapping"]
+
+    if sdm_catalog_dict is not None:
+        yield from _catalog_mapping_rows(sdm_catalog_dict)
+
+
+# ------------------------ CSV ------------------------
+
+# Zellen mit diesen Anfangszeichen wertet Excel als Formel aus
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value: Any) -> Any:
+    """Formel-Injection verhindern: solche Zellen mit ' als Text markieren."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    delimiter: str = ",",
+) -> Iterator[bytes]:
+    """
+    Schreibt CSV zeilenweise; der Puffer wird nach ROWS_PER_CHUNK Zeilen
+    geleert, der Speicherbedarf bleibt also unabhängig von der Zeilenzahl.
+    Mit BOM, damit Excel Umlaute korrekt erkennt; Zellen, die Excel als
+    Formel lesen würde (=, +, -, @), bekommen ein führendes '.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\r\n")
+
+    writer.writerow(columns)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    for idx, row in enumerate(rows, start=1):
+        writer.writerow([_csv_cell(value) for value in row])
+        if idx % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    rest = buffer.getvalue()
+    if rest:
+        yield rest.encode("utf-8")
+
+
+# ------------------------ XLSX ------------------------
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Nicht-seekbares Schreibziel für zipfile: sammelt geschriebene Bytes, bis
+    der Generator sie mit drain() abholt. zipfile nutzt dann Data-Descriptors
+    und muss nichts zurückspulen.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _xlsx_row(values: Sequence[Any]) -> bytes:
+    cells = []
+    for value in values:
+        text = _ILLEGAL_XML_CHARS.sub("", "" if value is None else str(value))
+        cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return ("<row>" + "".join(cells) + "</row>").encode("utf-8")
+
+
+def stream_xlsx(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    sheet_name: str = "export",
+) -> Iterator[bytes]:
+    """
+    Minimaler XLSX-Writer (ein Sheet, Inline-Strings, keine Styles), der das
+    Worksheet zeilenweise in einen ZIP-Stream schreibt. Inline-Strings sparen
+    die Shared-Strings-Tabelle, die sonst komplett gepuffert werden müsste.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield sink.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", mode="w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            sheet.write(_xlsx_row(columns))
+            for idx, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row))
+                if idx % ROWS_PER_CHUNK == 0:
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+
+# ------------------------ Formate ------------------------
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def stream_table(
+    fmt: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    sheet_name: str = "export",
+    delimiter: str = ",",
+) -> Tuple[Iterator[bytes], str]:
+    """Wählt den Writer für `fmt` und liefert (Chunk-Generator, Media-Type)."""
+    if fmt == "csv":
+        return stream_csv(columns, rows, delimiter=delimiter), EXPORT_MEDIA_TYPES[fmt]
+    if fmt == "xlsx":
+        return stream_xlsx(columns, rows, sheet_name=sheet_name), EXPORT_MEDIA_TYPES[fmt]
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -1,31 +1,274 @@
 import json
+import threading
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from . import diff_service
+from .catalog_registry import registry
+from .content_hashes import content_hashes
+from .document_editor import DocumentEditor
+from .edit_journal import atomic_write, journal, serialize_document
+from .json_patch import make_patch
+from .transaction_log import transaction_log
 from ..config import settings
 
 
-NAME_TO_PATH: Dict[str, Path] = {
-    settings.PRIVACY_CATALOG_NAME: settings.PRIVACY_CATALOG_FILE,
-    settings.SDM_PRIVACY_CATALOG_NAME: settings.SDM_PRIVACY_CATALOG_FILE,
-    settings.RESILIENCE_CATALOG_NAME: settings.RESILIENCE_CATALOG_FILE,
-    settings.SDM_MAPPING_NAME: settings.SDM_MAPPING_FILE
-}
+# Callbacks, die nach jedem erfolgreichen write_text/write_json mit dem
+# symbolischen Namen aufgerufen werden (z.B. um Caches zu invalidieren).
+_WRITE_LISTENERS: List[Callable[[str], None]] = []
+
+
+def on_write(listener: Callable[[str], None]) -> Callable[[str], None]:
+    """Registriert einen Listener für Schreibvorgänge (auch als Decorator nutzbar)."""
+    _WRITE_LISTENERS.append(listener)
+    return listener
+
+
+# Callbacks für inhaltliche Änderungen: (name, alter Stand, neuer Stand,
+# Patch alt → neu, Operation). Aufruf innerhalb des Dokument-Locks.
+ChangeListener = Callable[[str, Dict, Dict, List[Dict[str, Any]], str], None]
+_CHANGE_LISTENERS: List[ChangeListener] = []
+
+
+def on_change(listener: ChangeListener) -> ChangeListener:
+    _CHANGE_LISTENERS.append(listener)
+    return listener
+
+
+# Callbacks je Transaktion, nach den on_change-Aufrufen ihrer Dokumente:
+# (Operation, [(name, alter Stand, neuer Stand, Patch)]) – für Listener, die
+# eine Transaktion als Einheit sehen müssen (z.B. Undo/Redo).
+TransactionListener = Callable[[str, List[Tuple[str, Dict, Dict, List[Dict[str, Any]]]]], None]
+_TRANSACTION_LISTENERS: List[TransactionListener] = []
+
+# True, solange on_change-Listener für ein Dokument einer Transaktion laufen
+in_transaction: ContextVar[bool] = ContextVar("file_in_transaction", default=False)
+
+
+def on_transaction(listener: TransactionListener) -> TransactionListener:
+    _TRANSACTION_LISTENERS.append(listener)
+    return listener
+
+
+# Validatoren für Transaktionen: (alte Stände, neue Stände je Name) →
+# Fehlermeldungen; sehen alle beteiligten Dokumente gemeinsam.
+TransactionValidator = Callable[[Dict[str, Dict], Dict[str, Dict]], List[str]]
+_VALIDATORS: List[TransactionValidator] = []
+
+
+def on_validate(validator: TransactionValidator) -> TransactionValidator:
+    _VALIDATORS.append(validator)
+    return validator
+
+
+class TransactionError(ValueError):
+    """Transaktion verworfen (Validierung) – es wurde nichts geschrieben."""
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+_DOCUMENT_LOCKS: Dict[str, threading.RLock] = {}
+_DOCUMENT_LOCKS_GUARD = threading.Lock()
+
+
+def document_lock(name: str) -> threading.RLock:
+    """Serialisiert Lesen-Ändern-Schreiben je Dokument (innerhalb des Prozesses)."""
+    with _DOCUMENT_LOCKS_GUARD:
+        lock = _DOCUMENT_LOCKS.get(name)
+        if lock is None:
+            lock = _DOCUMENT_LOCKS[name] = threading.RLock()
+        return lock
+
+
+class Transaction:
+    """
+    Änderungen an mehreren Dokumenten, die FileService.transaction am Ende
+    gemeinsam validiert und alles-oder-nichts schreibt. Je Dokument ein
+    DocumentEditor auf dem aktuellen Stand (Copy-on-Write).
+    """
+
+    def __init__(self, names: Iterable[str], op: str) -> None:
+        self.op = op
+        self.editors: Dict[str, DocumentEditor] = {
+            name: DocumentEditor(registry.get(name)) for name in names
+        }
+        self.id: Optional[str] = None
+        self.committed: List[str] = []
+
+    def editor(self, name: str) -> DocumentEditor:
+        editor = self.editors.get(name)
+        if editor is None:
+            raise ValueError(f"Document '{name}' is not part of this transaction")
+        return editor
+
+    def stage(self, name: str, document: Dict, content: Optional[str] = None) -> None:
+        """Neuen Stand eines Dokuments vormerken (`document` danach nicht mehr verändern)."""
+        editor = self.editor(name)
+        editor.root = document
+        editor.content = content
 
 
 class FileService:
-    def read_text(self, name: str) -> str:
-        path = NAME_TO_PATH.get(name)
-        if not path:
-            raise ValueError(f"Unknown file name: {name}")
-        return path.read_text(encoding="utf-8")
+    """
+    Liest/schreibt Dateien anhand symbolischer Namen; die Zuordnung
+    Name → Pfad kommt aus der CatalogRegistry.
 
-    def write_text(self, name: str, content: str) -> None:
-        path = NAME_TO_PATH.get(name)
-        if not path:
+    Mit WRITE_BEHIND_ENABLED gehen Schreibvorgänge über das Edit-Journal:
+    der neue Stand ist sofort lesbar (read_text/load_json/revision), die
+    Datei wird gebündelt im Hintergrund geschrieben.
+    """
+
+    def _path(self, name: str) -> Path:
+        return registry.path(name)
+
+    @staticmethod
+    def require_core(name: str) -> None:
+        """
+        Datei-API (Lesen als Text, Schreiben, Transaktionen) nur für die fest
+        konfigurierten Kern-Dokumente – nicht für alles, was der Registry-Scan
+        unter den Repo-Pfaden findet.
+        """
+        if name not in registry.pinned_names():
             raise ValueError(f"Unknown file name: {name}")
-        path.write_text(content, encoding="utf-8")
+
+    def read_text(self, name: str) -> str:
+        self.require_core(name)
+        pending = journal.pending_content(name)
+        if pending is not None:
+            return pending
+        return self._path(name).read_text(encoding="utf-8")
+
+    def write_text(self, name: str, content: str, op: str = "write_text") -> None:
+        self._commit(name, json.loads(content), content, op)
+
+    def write_json(
+        self,
+        name: str,
+        document: Dict,
+        content: Optional[str] = None,
+        op: str = "write_json",
+    ) -> None:
+        """
+        Wie write_text, aber mit dem bereits geparsten Dokument (spart den
+        erneuten Parse); `document` darf danach nicht mehr verändert werden.
+        """
+        self._commit(name, document, content, op)
+
+    @contextmanager
+    def editing(self, name: str, op: str = "write_json") -> Iterator[DocumentEditor]:
+        """
+        Lesen-Ändern-Schreiben unter dem Dokument-Lock auf dem aktuellen,
+        geteilten Stand: Änderungen gehen per Copy-on-Write in editor.root,
+        das am Ende des Blocks geschrieben wird (bei einer Exception nicht).
+        """
+        self.require_core(name)
+        with document_lock(name):
+            editor = DocumentEditor(registry.get(name))
+            yield editor
+            if editor.changed:
+                self.write_json(name, editor.root, editor.content, op=op)
+
+    @contextmanager
+    def transaction(self, names: Iterable[str], op: str = "transaction") -> Iterator[Transaction]:
+        """
+        Mehrere Dokumente gemeinsam ändern: alle Dokument-Locks (in fester
+        Reihenfolge) für die Dauer des Blocks, danach gemeinsame Validierung
+        (on_validate) und ein atomarer Commit aller geänderten Dokumente
+        über das Transaktions-Log. Bei einer Exception oder einem
+        Validierungsfehler (TransactionError) wird nichts geschrieben.
+        """
+        names = sorted(set(names))
+        for name in names:
+            self.require_core(name)  # unbekannte Namen vor dem Sperren melden
+        with ExitStack() as stack:
+            for name in names:
+                stack.enter_context(document_lock(name))
+            tx = Transaction(names, op)
+            yield tx
+            self._commit_transaction(tx)
+        for name in tx.committed:
+            self._notify(name)
+
+    def _commit_transaction(self, tx: Transaction) -> None:
+        changed = {
+            name: editor for name, editor in tx.editors.items()
+            if editor.changed and not content_hashes.same(name, editor.base, editor.root)
+        }
+        if not changed:
+            return
+
+        old = {name: editor.base for name, editor in tx.editors.items()}
+        new = {name: editor.root for name, editor in tx.editors.items()}
+        errors = [error for validator in _VALIDATORS for error in validator(old, new)]
+        if errors:
+            raise TransactionError(errors)
+
+        documents = []
+        for name, editor in changed.items():
+            if settings.WRITE_BEHIND_ENABLED:
+                # offene Journal-Stände zuerst schreiben, dann am Journal vorbei
+                journal.release(name)
+            content = editor.content if editor.content is not None else serialize_document(editor.root)
+            documents.append((name, content))
+        tx.id = transaction_log.commit(tx.op, documents)
+
+        changes = []
+        token = in_transaction.set(True)
+        try:
+            for name, editor in changed.items():
+                registry.replace(name, editor.root)
+                patch = make_patch(editor.base, editor.root)
+                if patch:
+                    changes.append((name, editor.base, editor.root, patch))
+                    for listener in _CHANGE_LISTENERS:
+                        listener(name, editor.base, editor.root, patch, tx.op)
+                tx.committed.append(name)
+        finally:
+            in_transaction.reset(token)
+        if changes:
+            for tx_listener in _TRANSACTION_LISTENERS:
+                tx_listener(tx.op, changes)
+
+    def _commit(self, name: str, document: Dict, content: Optional[str], op: str) -> None:
+        self.require_core(name)
+        with document_lock(name):
+            old = registry.get(name)
+            if content_hashes.same(name, old, document):
+                # No-op (gleicher Inhalt): weder Datei noch Journal, Listener, Caches
+                return
+            patch = make_patch(old, document)
+            if settings.WRITE_BEHIND_ENABLED:
+                journal.record(name, op, document, content, patch=patch)
+            else:
+                if content is None:
+                    content = serialize_document(document)
+                # atomar ersetzen: Leser ohne Lock sehen nie eine halbe Datei
+                atomic_write(self._path(name), content.encode("utf-8"))
+                registry.replace(name, document)
+            if patch:
+                for listener in _CHANGE_LISTENERS:
+                    listener(name, old, document, patch, op)
+        self._notify(name)
+
+    @staticmethod
+    def _notify(name: str) -> None:
+        for listener in _WRITE_LISTENERS:
+            listener(name)
+
+    def revision(self, name: str) -> str:
+        """
+        Billiger Revisions-Token einer Datei (mtime + Größe), ohne sie zu lesen.
+        Ändert sich bei jedem Schreiben – auch durch andere Worker-Prozesse.
+        """
+        return registry.revision(name)
+
+    def load_json(self, name: str):
+        """Geparstes Dokument aus der Registry (geteilt – nicht verändern!)."""
+        return registry.get(name)
 
     def diff(self, old_content: str, new_content: str):
         old_json = json.loads(old_content)
@@ -33,5 +276,6 @@ class FileService:
         return diff_service.diff_json(old_json, new_json)
 
     def diff_current_and_new(self, name: str, new_content: str):
-        old_content = self.read_text(name)
-        return self.diff(old_content, new_content)
\ No newline at end of file
+        self.require_core(name)
+        # aktueller Stand aus der Registry statt die Datei erneut zu parsen
+        return diff_service.diff_json(self.load_json(name), json.loads(new_content))
@@ -0,0 +1,212 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .file_service import (
+    FileService,
+    TransactionError,
+    document_lock,
+    in_transaction,
+    on_change,
+    on_transaction,
+)
+from .json_patch import apply_patch_copy, guard_patch, make_patch
+from ..models import HistoryEntrySummary, HistoryState
+from ..config import settings
+
+
+# Benutzer des aktuellen Requests (gesetzt per Middleware aus dem Header);
+# None = ohne Header – solche Änderungen landen in keinem Verlauf
+current_user: ContextVar[Optional[str]] = ContextVar("workbench_user", default=None)
+# True, während Undo/Redo selbst schreibt – diese Writes nicht erneut aufzeichnen
+_replaying: ContextVar[bool] = ContextVar("history_replaying", default=False)
+
+_MAX_SUMMARY_PATHS = 5
+
+
+class HistoryConflict(ValueError):
+    """Undo/Redo nicht möglich (nichts vorhanden oder Dokument inzwischen geändert)."""
+
+
+@dataclass
+class HistoryEntry:
+    id: int
+    names: List[str]                        # ein Dokument oder alle einer Transaktion
+    op: str
+    timestamp: float
+    undo: Dict[str, List[Dict[str, Any]]]   # je Dokument inverser Patch inkl. test-Ops
+    redo: Dict[str, List[Dict[str, Any]]]   # je Dokument Vorwärts-Patch inkl. test-Ops
+    paths: List[str] = field(default_factory=list)
+    op_count: int = 0
+
+    def summary(self) -> HistoryEntrySummary:
+        return HistoryEntrySummary(
+            id=self.id,
+            name=self.names[0],
+            names=self.names,
+            op=self.op,
+            timestamp=self.timestamp,
+            opCount=self.op_count,
+            paths=self.paths,
+        )
+
+
+class _Session:
+    def __init__(self, max_entries: int) -> None:
+        self.undo: Deque[HistoryEntry] = deque(maxlen=max_entries)
+        self.redo: Deque[HistoryEntry] = deque(maxlen=max_entries)
+
+
+class EditHistory:
+    """
+    Undo/Redo je Benutzer auf Basis inverser Patches.
+
+    Jede inhaltliche Änderung über den FileService (alle Editing-Services
+    schreiben darüber) wird als Paar (inverser Patch, Vorwärts-Patch)
+    aufgezeichnet – beide mit "test"-Ops abgesichert. Undo/Redo wendet den
+    Patch copy-on-write auf den aktuellen Stand an (Aufwand ~ Größe der
+    Änderung) und schreibt das Ergebnis wie jede andere Änderung.
+
+    Eine Transaktion (FileService.transaction) ergibt einen Eintrag mit
+    einem Patch je Dokument; Undo/Redo wendet ihn wieder als Transaktion
+    an, also alles-oder-nichts über alle beteiligten Dokumente.
+
+    Hat sich ein betroffener Teil inzwischen geändert (z.B. durch einen
+    anderen Benutzer), schlägt der Test fehl; der Eintrag bleibt dann im
+    Verlauf (ein erneuter Versuch nach dem Zurücksetzen ist möglich).
+
+    Aufgezeichnet wird nur mit Benutzer (Header X-Workbench-User) – ohne
+    würden sich alle Clients einen Verlauf teilen und gegenseitig ihre
+    Änderungen rückgängig machen. Der Verlauf lebt im Speicher des
+    Prozesses: mit mehreren Workern kennt nur der Worker, der eine Änderung
+    geschrieben hat, deren Eintrag (Undo anderswo → "Nothing to undo").
+
+    Speicher: höchstens `max_entries` Einträge je Richtung und Benutzer und
+    `max_users` Benutzer (LRU); die Patches referenzieren nur die geänderten
+    Teilbäume der (unveränderlichen) Dokumentstände.
+    """
+
+    def __init__(self, max_entries: int, max_users: int) -> None:
+        self.max_entries = max_entries
+        self.max_users = max_users
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _session(self, user: str) -> _Session:
+        session = self._sessions.get(user)
+        if session is None:
+            session = self._sessions[user] = _Session(self.max_entries)
+            while len(self._sessions) > self.max_users:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(user)
+        return session
+
+    # ------------------------ Aufzeichnen ------------------------
+
+    def record(self, name: str, old: Dict, new: Dict, patch: List[Dict[str, Any]], op: str) -> None:
+        if in_transaction.get():
+            return  # kommt gesammelt über record_transaction
+        self.record_transaction(op, [(name, old, new, patch)])
+
+    def record_transaction(self, op: str, changes: List[Tuple[str, Dict, Dict, List[Dict[str, Any]]]]) -> None:
+        user = current_user.get()
+        if _replaying.get() or user is None:
+            return
+        patches = [patch for _, _, _, patch in changes]
+        entry = HistoryEntry(
+            id=next(self._ids),
+            names=[name for name, _, _, _ in changes],
+            op=op,
+            timestamp=time.time(),
+            undo={name: guard_patch(new, make_patch(new, old)) for name, old, new, _ in changes},
+            redo={name: guard_patch(old, patch) for name, old, _, patch in changes},
+            paths=[o["path"] for patch in patches for o in patch][:_MAX_SUMMARY_PATHS],
+            op_count=sum(len(patch) for patch in patches),
+        )
+        with self._lock:
+            session = self._session(user)
+            session.undo.append(entry)
+            session.redo.clear()
+
+    # ------------------------ Undo/Redo ------------------------
+
+    def _replay(self, user: str, undo: bool, fs: Optional[FileService] = None) -> HistoryEntrySummary:
+        fs = fs or FileService()
+        with self._lock:
+            session = self._session(user)
+            source = session.undo if undo else session.redo
+            if not source:
+                raise HistoryConflict("Nothing to undo" if undo else "Nothing to redo")
+            entry = source.pop()
+
+        patches = entry.undo if undo else entry.redo
+        op = "undo" if undo else "redo"
+
+        def apply(name: str, current: Dict) -> Dict:
+            try:
+                return apply_patch_copy(current, patches[name])
+            except ValueError as e:
+                raise HistoryConflict(
+                    f"{name} was changed in the meantime, cannot {op} change {entry.id}: {e}"
+                ) from e
+
+        token = _replaying.set(True)
+        try:
+            if len(entry.names) == 1:
+                name = entry.names[0]
+                with document_lock(name):
+                    fs.write_json(name, apply(name, fs.load_json(name)), op=op)
+            else:
+                # alles-oder-nichts wie die ursprüngliche Transaktion
+                try:
+                    with fs.transaction(entry.names, op=op) as tx:
+                        for name in entry.names:
+                            tx.stage(name, apply(name, tx.editor(name).base))
+                except TransactionError as e:
+                    raise HistoryConflict(f"Cannot {op} change {entry.id}: {e}") from e
+        except BaseException:
+            # nicht angewendet: Eintrag bleibt im Verlauf
+            with self._lock:
+                (self._session(user).undo if undo else self._session(user).redo).append(entry)
+            raise
+        finally:
+            _replaying.reset(token)
+
+        with self._lock:
+            session = self._session(user)
+            (session.redo if undo else session.undo).append(entry)
+        return entry.summary()
+
+    def undo(self, user: str, fs: Optional[FileService] = None) -> HistoryEntrySummary:
+        return self._replay(user, undo=True, fs=fs)
+
+    def redo(self, user: str, fs: Optional[FileService] = None) -> HistoryEntrySummary:
+        return self._replay(user, undo=False, fs=fs)
+
+    # ------------------------ Abfragen ------------------------
+
+    def state(self, user: str) -> HistoryState:
+        with self._lock:
+            session = self._sessions.get(user)
+            if session is None:
+                return HistoryState(user=user)
+            return HistoryState(
+                user=user,
+                undo=[e.summary() for e in reversed(session.undo)],
+                redo=[e.summary() for e in reversed(session.redo)],
+            )
+
+    def clear(self, user: str) -> None:
+        with self._lock:
+            self._sessions.pop(user, None)
+
+
+history = EditHistory(settings.HISTORY_MAX_ENTRIES, settings.HISTORY_MAX_USERS)
+
+on_change(history.record)
+on_transaction(history.record_transaction)
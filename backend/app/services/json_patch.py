@@ -0,0 +1,212 @@
+from typing import Any, Dict, List, Set
+
+
+# Teilmenge von RFC 6902 (add/remove/replace/test) mit JSON-Pointern (RFC 6901)
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[Dict[str, Any]]) -> None:
+    if old == new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+            else:
+                _diff(old[key], value, f"{path}/{_escape(key)}", ops)
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        # gemeinsamen Anfang/Ende abschneiden, damit Einfügen/Löschen
+        # einzelner Elemente (z.B. ein Control) nur einen Op erzeugt
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix
+            and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+        ):
+            suffix += 1
+        old_mid = old[prefix:len(old) - suffix]
+        new_mid = new[prefix:len(new) - suffix]
+
+        common = min(len(old_mid), len(new_mid))
+        for i in range(common):
+            _diff(old_mid[i], new_mid[i], f"{path}/{prefix + i}", ops)
+        for i in range(common, len(new_mid)):
+            ops.append({"op": "add", "path": f"{path}/{prefix + i}", "value": new_mid[i]})
+        for _ in range(common, len(old_mid)):
+            ops.append({"op": "remove", "path": f"{path}/{prefix + common}"})
+        return
+
+    ops.append({"op": "replace", "path": path, "value": new})
+
+
+def make_patch(old: Any, new: Any) -> List[Dict[str, Any]]:
+    """
+    JSON-Patch, der `old` in `new` überführt. Unveränderte Teilbäume werden
+    per Gleichheitsvergleich übersprungen; die Werte im Patch sind Referenzen
+    in `new` (nicht kopiert).
+    """
+    ops: List[Dict[str, Any]] = []
+    _diff(old, new, "", ops)
+    return ops
+
+
+def _tokens(path: str) -> List[str]:
+    return [_unescape(t) for t in path.split("/")[1:]]
+
+
+def _child(container: Any, token: str) -> Any:
+    return container[int(token)] if isinstance(container, list) else container[token]
+
+
+def _parent(doc: Any, path: str):
+    tokens = _tokens(path)
+    target = doc
+    for token in tokens[:-1]:
+        target = _child(target, token)
+    return target, tokens[-1]
+
+
+def get_value(doc: Any, path: str) -> Any:
+    """Wert an einem JSON-Pointer (KeyError/IndexError, wenn nicht vorhanden)."""
+    target = doc
+    for token in _tokens(path):
+        target = _child(target, token)
+    return target
+
+
+def _apply_op(parent: Any, key: str, op: Dict[str, Any]) -> None:
+    kind = op.get("op")
+    if isinstance(parent, list):
+        index = len(parent) if key == "-" else int(key)
+        if kind == "add":
+            if index > len(parent):
+                raise IndexError(index)
+            parent.insert(index, op["value"])
+        elif kind == "remove":
+            del parent[index]
+        elif kind == "replace":
+            parent[index] = op["value"]
+        elif kind == "test":
+            if parent[index] != op["value"]:
+                raise ValueError(f"Test failed at {op.get('path')}")
+        else:
+            raise ValueError(f"Unsupported operation: {kind}")
+    else:
+        if kind == "add":
+            parent[key] = op["value"]
+        elif kind == "replace":
+            if key not in parent:
+                raise KeyError(key)
+            parent[key] = op["value"]
+        elif kind == "remove":
+            del parent[key]
+        elif kind == "test":
+            if parent[key] != op["value"]:
+                raise ValueError(f"Test failed at {op.get('path')}")
+        else:
+            raise ValueError(f"Unsupported operation: {kind}")
+
+
+def _apply_root(doc: Any, op: Dict[str, Any]) -> Any:
+    kind = op.get("op")
+    if kind == "replace":
+        return op["value"]
+    if kind == "test":
+        if doc != op["value"]:
+            raise ValueError("Test failed at root")
+        return doc
+    raise ValueError(f"Unsupported root operation: {kind}")
+
+
+def apply_patch(doc: Any, ops: List[Dict[str, Any]]) -> Any:
+    """
+    Wendet einen Patch (in place) an und gibt das Ergebnis zurück – bei
+    "replace" auf der Wurzel ist das ein neues Objekt. Fehlerhafte Pfade und
+    fehlgeschlagene "test"-Ops lösen ValueError aus.
+    """
+    for op in ops:
+        path = op.get("path", "")
+        if path == "":
+            doc = _apply_root(doc, op)
+            continue
+        try:
+            parent, key = _parent(doc, path)
+            _apply_op(parent, key, op)
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Cannot apply {op.get('op')} at {path}: {e}") from e
+    return doc
+
+
+def apply_patch_copy(doc: Any, ops: List[Dict[str, Any]]) -> Any:
+    """
+    Wie apply_patch, verändert `doc` aber nicht: nur die Container entlang der
+    betroffenen Pfade werden (flach) kopiert, alle übrigen Teilbäume werden
+    mit `doc` geteilt. Aufwand ~ Größe der Änderung statt Größe des Dokuments.
+    """
+    holder = [doc]
+    copied: Set[int] = set()
+
+    def writable(container: Any, key: Any) -> Any:
+        child = container[key]
+        if id(child) not in copied:
+            if isinstance(child, dict):
+                child = dict(child)
+            elif isinstance(child, list):
+                child = list(child)
+            else:
+                raise TypeError(f"not a container: {type(child).__name__}")
+            container[key] = child
+            copied.add(id(child))
+        return child
+
+    for op in ops:
+        path = op.get("path", "")
+        if path == "":
+            holder[0] = _apply_root(holder[0], op)
+            continue
+        try:
+            if op.get("op") == "test":
+                parent, key = _parent(holder[0], path)
+                _apply_op(parent, key, op)
+                continue
+            tokens = _tokens(path)
+            container, key = holder, 0
+            for token in tokens[:-1]:
+                container = writable(container, key)
+                key = int(token) if isinstance(container, list) else token
+            _apply_op(writable(container, key), tokens[-1], op)
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Cannot apply {op.get('op')} at {path}: {e}") from e
+    return holder[0]
+
+
+def guard_patch(doc: Any, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ergänzt einen für `doc` berechneten Patch um "test"-Ops vor jedem
+    remove/replace (erwarteter Wert = Zustand nach den vorherigen Ops).
+    Wird der Patch später auf einen inzwischen geänderten Stand angewendet,
+    schlägt er damit sauber fehl, statt fremde Änderungen zu überschreiben.
+    """
+    guarded: List[Dict[str, Any]] = []
+    current = doc
+    for op in ops:
+        if op.get("op") in ("remove", "replace"):
+            guarded.append({"op": "test", "path": op["path"], "value": get_value(current, op["path"])})
+        guarded.append(op)
+        current = apply_patch_copy(current, [op])
+    return guarded
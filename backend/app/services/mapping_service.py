@@ -1,15 +1,21 @@
 import json
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 
-from ..models import SdmSecurityMapping, SecurityControlRef, MappingStandards
+from .catalog_registry import registry
+from .catalog_utils import iter_catalog_controls
+from .file_service import on_validate
+from ..models import SdmSecurityMapping, SecurityControlRef, MappingStandards, trusted
+from ..config import settings
 
 
 class MappingService:
     def __init__(self, raw_json: dict):
         # erwartet Struktur: { "mappings": [ { ... }, ... ] }
+        # raw_json kann der geteilte Stand der Registry sein: Änderungen
+        # ersetzen self.raw durch eine neue Wurzel (Copy-on-Write)
         self.raw = raw_json
-        if "mappings" not in self.raw or not isinstance(self.raw["mappings"], list):
-            self.raw["mappings"] = []
+        if not isinstance(self.raw.get("mappings"), list):
+            self.raw = {**self.raw, "mappings": []}
 
     @classmethod
     def from_json_str(cls, content: str) -> "MappingService":
@@ -22,17 +28,20 @@ class MappingService:
     def _from_raw_mapping(raw: Dict[str, Any]) -> SdmSecurityMapping:
         standards_raw = raw.get("standards", {}) or {}
 
-        return SdmSecurityMapping(
+        return trusted(
+            SdmSecurityMapping,
             sdmControlId=raw.get("sdm_control_id", ""),
             sdmTitle=raw.get("sdm_title", ""),
             securityControls=[
-                SecurityControlRef(
+                trusted(
+                    SecurityControlRef,
                     catalogId=sc.get("catalog_id", ""),
                     controlId=sc.get("control_id", "")
                 )
                 for sc in raw.get("security_controls", [])
             ],
-            standards=MappingStandards(
+            standards=trusted(
+                MappingStandards,
                 bsi=standards_raw.get("bsi"),
                 iso27001=standards_raw.get("iso27001"),
                 iso27701=standards_raw.get("iso27701"),
@@ -84,7 +93,7 @@ class MappingService:
         """
         Fügt ein Mapping hinzu oder ersetzt es, wenn sdm_control_id bereits existiert.
         """
-        raw_list = self.raw.setdefault("mappings", [])
+        raw_list = list(self.raw["mappings"])
         new_raw = self._to_raw_mapping(mapping)
 
         for idx, raw in enumerate(raw_list):
@@ -94,13 +103,47 @@ class MappingService:
         else:
             raw_list.append(new_raw)
 
+        self.raw = {**self.raw, "mappings": raw_list}
         return mapping
 
     def delete_mapping(self, sdm_control_id: str) -> None:
         raw_list = self.raw.get("mappings", [])
-        self.raw["mappings"] = [
-            raw for raw in raw_list if raw.get("sdm_control_id") != sdm_control_id
-        ]
+        self.raw = {
+            **self.raw,
+            "mappings": [raw for raw in raw_list if raw.get("sdm_control_id") != sdm_control_id],
+        }
 
     def to_json_str(self) -> str:
         return json.dumps(self.raw, ensure_ascii=False, indent=2)
+
+
+def _unknown_control_ids(mapping_doc: Dict, catalog_doc: Dict) -> Set[str]:
+    known = {ctrl.get("id") for _, _, ctrl in iter_catalog_controls(catalog_doc)}
+    return {
+        raw.get("sdm_control_id")
+        for raw in mapping_doc.get("mappings", []) or []
+        if raw.get("sdm_control_id") not in known
+    }
+
+
+@on_validate
+def validate_mapping_targets(old: Dict[str, Dict], new: Dict[str, Dict]) -> List[str]:
+    """
+    Transaktionen über Mapping und/oder SDM-Katalog: Mappings dürfen nur auf
+    vorhandene SDM-Controls zeigen. Gemeldet werden nur Verstöße, die die
+    Transaktion neu einführt (Altlasten blockieren keine Edits).
+    """
+    mapping_name = settings.SDM_MAPPING_NAME
+    catalog_name = settings.SDM_PRIVACY_CATALOG_NAME
+    if mapping_name not in new and catalog_name not in new:
+        return []
+
+    def state(states: Dict[str, Dict], name: str) -> Dict:
+        return states[name] if name in states else registry.get(name)
+
+    before = _unknown_control_ids(state(old, mapping_name), state(old, catalog_name))
+    after = _unknown_control_ids(state(new, mapping_name), state(new, catalog_name))
+    return [
+        f"Mapping references unknown SDM control '{control_id}'"
+        for control_id in sorted(after - before, key=str)
+    ]
@@ -1,8 +1,12 @@
-import json
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
+from . import diff_service
+from .catalog_registry import registry
+from .catalog_resolution import CatalogResolutionIndex, iter_parts
+from .document_editor import DocumentEditor, find_control_path
+from .edit_journal import serialize_document
 from .file_service import FileService
-from ..models import PrivacyControlSummary, PrivacyControlDetail, PrivacyGroupSummary, PrivacyGroupDetail
+from ..models import PrivacyControlSummary, PrivacyControlDetail, PrivacyGroupSummary, PrivacyGroupDetail, trusted
 from ..config import settings
 
 class PrivacyCatalogService:
@@ -70,16 +74,26 @@ class PrivacyCatalogService:
 
     # ------------------------ interne Helfer ------------------------
 
-    def _load_catalog(self) -> Tuple[str, Dict]:
-        raw = self.fs.read_text(self.catalog_name)
-        data = json.loads(raw)
-        return raw, data
+    def _get_catalog(self) -> Dict:
+        """Gecachtes Dokument aus der Registry – nur lesen, nicht verändern."""
+        return self.fs.load_json(self.catalog_name)
 
-    def _save_catalog(self, original_raw: str, catalog_dict: Dict) -> Dict:
-        new_raw = json.dumps(catalog_dict, indent=2, ensure_ascii=False)
-        diff = self.fs.diff(original_raw, new_raw)
-        self.fs.write_text(self.catalog_name, new_raw)
-        return {"content": new_raw, "diff": diff}
+    def _resolution(self) -> CatalogResolutionIndex:
+        """Params/back-matter-Index, pro Katalog-Revision gecacht."""
+        return registry.get_index(self.catalog_name, "resolution", CatalogResolutionIndex)
+
+    def _save_catalog(self, editor: DocumentEditor) -> Dict:
+        """Neuen Stand serialisieren (geschrieben wird beim Verlassen von editing())."""
+        editor.content = serialize_document(editor.root)
+        return {"content": editor.content, "diff": diff_service.diff_json(editor.base, editor.root, self.catalog_name)}
+
+    @staticmethod
+    def _writable_groups(editor: DocumentEditor) -> List[Dict]:
+        """Eigene Kopie der Gruppenliste (Gruppen selbst bleiben geteilt)."""
+        data = editor.writable()
+        catalog = data["catalog"] = dict(data.get("catalog") or {})
+        groups = catalog["groups"] = list(catalog.get("groups") or [])
+        return groups
 
     def _iter_controls(self, catalog_dict: Dict):
         catalog = catalog_dict.get("catalog") or {}
@@ -130,7 +144,7 @@ class PrivacyCatalogService:
         Liefert alle Gruppen inkl. Anzahl der Controls.
         Eignet sich super für eine Baum-/Akkordeon-Navigation im Frontend.
         """
-        _, data = self._load_catalog()
+        data = self._get_catalog()
         catalog = data.get("catalog") or {}
         result: List[PrivacyGroupDetail] = []
 
@@ -157,28 +171,27 @@ class PrivacyCatalogService:
         Legt eine neue Gruppe an (ohne Controls).
         Wir prüfen, dass es keine Gruppe mit gleicher ID gibt.
         """
-        original_raw, data = self._load_catalog()
-        catalog = data.setdefault("catalog", {})
-        groups = catalog.setdefault("groups", [])
-
-        # Duplikatscheck
-        for g in groups:
-            if g.get("id") == group_id:
-                raise ValueError(f"Group with id '{group_id}' already exists")
-
-        new_group: Dict = {
-            "id": group_id,
-            "title": title,
-            "controls": [],
-        }
-        if description:
-            # z.B. als "remarks" ablegen – OSCAL kennt kein Pflichtfeld "description" bei groups
-            new_group["remarks"] = description
+        with self.fs.editing(self.catalog_name) as editor:
+            groups = self._writable_groups(editor)
+
+            # Duplikatscheck
+            for g in groups:
+                if g.get("id") == group_id:
+                    raise ValueError(f"Group with id '{group_id}' already exists")
 
-        groups.append(new_group)
+            new_group: Dict = {
+                "id": group_id,
+                "title": title,
+                "controls": [],
+            }
+            if description:
+                # z.B. als "remarks" ablegen – OSCAL kennt kein Pflichtfeld "description" bei groups
+                new_group["remarks"] = description
 
-        # speichern
-        self._save_catalog(original_raw, data)
+            groups.append(new_group)
+
+            # speichern
+            self._save_catalog(editor)
 
         return PrivacyGroupDetail(
             id=group_id,
@@ -203,50 +216,50 @@ class PrivacyCatalogService:
             * Sonst, wenn allow_delete_non_empty=False → Fehler.
             * Sonst → Gruppe mitsamt Controls entfernen.
         """
-        original_raw, data = self._load_catalog()
-        catalog = data.get("catalog") or {}
-        groups = catalog.get("groups", []) or []
+        with self.fs.editing(self.catalog_name) as editor:
+            groups = self._writable_groups(editor)
 
-        target_group: Optional[Dict] = None
-        target_index: Optional[int] = None
+            target_group: Optional[Dict] = None
+            target_index: Optional[int] = None
 
-        for idx, g in enumerate(groups):
-            if g.get("id") == group_id:
-                target_group = g
-                target_index = idx
-                break
+            for idx, g in enumerate(groups):
+                if g.get("id") == group_id:
+                    target_group = g
+                    target_index = idx
+                    break
 
-        if target_group is None or target_index is None:
-            raise ValueError(f"Group '{group_id}' not found")
+            if target_group is None or target_index is None:
+                raise ValueError(f"Group '{group_id}' not found")
 
-        controls = target_group.get("controls", []) or []
+            controls = target_group.get("controls", []) or []
 
-        # Fall 1: Controls vorhanden & reassign_to
-        if controls and reassign_to:
-            dest_group: Optional[Dict] = None
-            for g in groups:
-                if g.get("id") == reassign_to:
-                    dest_group = g
-                    break
+            # Fall 1: Controls vorhanden & reassign_to
+            if controls and reassign_to:
+                dest_index: Optional[int] = None
+                for idx, g in enumerate(groups):
+                    if g.get("id") == reassign_to:
+                        dest_index = idx
+                        break
 
-            if dest_group is None:
-                raise ValueError(f"Destination group '{reassign_to}' not found")
+                if dest_index is None:
+                    raise ValueError(f"Destination group '{reassign_to}' not found")
 
-            dest_controls = dest_group.setdefault("controls", [])
-            dest_controls.extend(controls)
+                # Zielgruppe als eigene Kopie, Controls werden nur umgehängt
+                dest_group = groups[dest_index] = dict(groups[dest_index])
+                dest_group["controls"] = list(dest_group.get("controls") or []) + controls
 
-        # Fall 2: Controls vorhanden, kein reassign_to, aber Löschung nicht erlaubt
-        elif controls and not allow_delete_non_empty:
-            raise ValueError(
-                f"Group '{group_id}' is not empty; "
-                f"use reassign_to or set allow_delete_non_empty=True"
-            )
+            # Fall 2: Controls vorhanden, kein reassign_to, aber Löschung nicht erlaubt
+            elif controls and not allow_delete_non_empty:
+                raise ValueError(
+                    f"Group '{group_id}' is not empty; "
+                    f"use reassign_to or set allow_delete_non_empty=True"
+                )
 
-        # Gruppe entfernen
-        del groups[target_index]
+            # Gruppe entfernen
+            del groups[target_index]
 
-        # speichern
-        self._save_catalog(original_raw, data)
+            # speichern
+            self._save_catalog(editor)
 
         return {
             "deleted": group_id,
@@ -258,7 +271,7 @@ class PrivacyCatalogService:
     # ------------------------ öffentliche API ------------------------
 
     def list_controls(self) -> List[PrivacyControlSummary]:
-        _, data = self._load_catalog()
+        data = self._get_catalog()
         items: List[PrivacyControlSummary] = []
 
         for group_id, ctrl in self._iter_controls(data):
@@ -271,7 +284,8 @@ class PrivacyCatalogService:
                     break
 
             items.append(
-                PrivacyControlSummary(
+                trusted(
+                    PrivacyControlSummary,
                     id=ctrl.get("id"),
                     title=ctrl.get("title", ""),
                     group_id=group_id,
@@ -285,8 +299,13 @@ class PrivacyCatalogService:
         items.sort(key=lambda c: (c.tom_id or "", c.id))
         return items
 
-    def get_control(self, control_id: str) -> Optional[PrivacyControlDetail]:
-        _, data = self._load_catalog()
+    def get_control(self, control_id: str, resolve: bool = False) -> Optional[PrivacyControlDetail]:
+        """
+        Detailansicht eines Controls inkl. aufgelöster Links und verwendeter
+        Params. Mit resolve=True werden Param-Einfügemarken in der Prosa durch
+        ihre Werte ersetzt (nur zur Anzeige – nicht zurückspeichern).
+        """
+        data = self._get_catalog()
 
         for group_id, ctrl in self._iter_controls(data):
             if ctrl.get("id") != control_id:
@@ -327,33 +346,54 @@ class PrivacyCatalogService:
                     if prose:
                         assessment_questions.append(prose)
 
-            return PrivacyControlDetail(
+            links, params, rendered = self._resolution().resolve_control(ctrl)
+            # Position je Part dieses Aufrufs (rendered ist nach Position geschlüsselt)
+            part_paths = {id(part): path for path, part in iter_parts(ctrl)} if resolve else {}
+
+            def prose(part: Optional[Dict]) -> Optional[str]:
+                if not part:
+                    return None
+                text = part.get("prose")
+                if resolve:
+                    text = rendered.get(part_paths.get(id(part)), text)
+                return text
+
+            if resolve:
+                typical_measures = [
+                    prose(p) for p in (typical_measures_part or {}).get("parts", []) if p.get("prose")
+                ]
+                assessment_questions = [
+                    prose(p) for p in (assessment_questions_part or {}).get("parts", []) if p.get("prose")
+                ]
+
+            return trusted(
+                PrivacyControlDetail,
                 id=ctrl.get("id"),
                 title=ctrl.get("title", ""),
                 group_id=group_id,
                 tom_id=tom_id,
                 dsgvo_articles=dsgvo,
                 dp_goals=dp_goals,
-                statement=(statement_part or {}).get("prose"),
-                maturity_level_1=(maturity_1 or {}).get("prose"),
-                maturity_level_3=(maturity_3 or {}).get("prose"),
-                maturity_level_5=(maturity_5 or {}).get("prose"),
+                statement=prose(statement_part),
+                maturity_level_1=prose(maturity_1),
+                maturity_level_3=prose(maturity_3),
+                maturity_level_5=prose(maturity_5),
                 typical_measures=typical_measures,
                 assessment_questions=assessment_questions,
-                risk_hint=(risk_hint_part or {}).get("prose"),
+                risk_hint=prose(risk_hint_part),
+                links=links,
+                params=params,
             )
 
         return None
 
     def update_control(self, control_id: str, data: PrivacyControlDetail) -> Dict:
-        original_raw, catalog = self._load_catalog()
-
-        found = False
-        for _, ctrl in self._iter_controls(catalog):
-            if ctrl.get("id") != control_id:
-                continue
-
-            found = True
+        with self.fs.editing(self.catalog_name) as editor:
+            path = find_control_path(editor.base, control_id)
+            if path is None:
+                raise ValueError(f"Control {control_id} not found in privacy catalog")
+            # nur dieses Control wird kopiert, der Rest bleibt geteilt
+            ctrl = editor.own(path)
 
             # Titel
             ctrl["title"] = data.title
@@ -404,13 +444,9 @@ class PrivacyCatalogService:
             rh = self._ensure_part(ctrl, "risk-hint")
             rh["prose"] = data.risk_hint or ""
 
-            break
-
-        if not found:
-            raise ValueError(f"Control {control_id} not found in privacy catalog")
+            # speichern + diff
+            result = self._save_catalog(editor)
 
-        # speichern + diff
-        result = self._save_catalog(original_raw, catalog)
         # Ergebnis inklusive aktualisierter Detailansicht zurückgeben
         updated = self.get_control(control_id)
         return {
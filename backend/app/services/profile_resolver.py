@@ -0,0 +1,436 @@
+import copy
+import fnmatch
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+
+
+class ProfileResolutionError(ValueError):
+    pass
+
+
+def _fingerprint(obj: Any) -> str:
+    """Kanonischer Inhalts-Hash (sortierte Keys) – Basis für Memoisierung."""
+    data = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# ------------------------ Auswahl (include/exclude) ------------------------
+
+class _Selector:
+    """Übersetzt include-controls/exclude-controls in eine Prüfung pro Control."""
+
+    def __init__(self, specs: List[Dict]) -> None:
+        self.ids: Set[str] = set()
+        self.ids_with_children: Set[str] = set()
+        self.patterns: List[str] = []
+        for spec in specs or []:
+            with_children = spec.get("with-child-controls") == "yes"
+            for ctrl_id in spec.get("with-ids", []) or []:
+                (self.ids_with_children if with_children else self.ids).add(ctrl_id)
+            for matching in spec.get("matching", []) or []:
+                if matching.get("pattern"):
+                    self.patterns.append(matching["pattern"])
+
+    def matches(self, ctrl_id: str, ancestors: Tuple[str, ...]) -> bool:
+        if ctrl_id in self.ids or ctrl_id in self.ids_with_children:
+            return True
+        if any(a in self.ids_with_children for a in ancestors):
+            return True
+        return any(fnmatch.fnmatchcase(ctrl_id, p) for p in self.patterns)
+
+
+def _select_ids(catalog: Dict, import_spec: Dict) -> Set[str]:
+    include_all = "include-all" in import_spec
+    include = _Selector(import_spec.get("include-controls", []))
+    exclude = _Selector(import_spec.get("exclude-controls", []))
+    selected: Set[str] = set()
+
+    def walk(controls: List[Dict], ancestors: Tuple[str, ...]) -> None:
+        for ctrl in controls or []:
+            ctrl_id = ctrl.get("id", "")
+            if (include_all or include.matches(ctrl_id, ancestors)) and not exclude.matches(ctrl_id, ancestors):
+                selected.add(ctrl_id)
+            walk(ctrl.get("controls", []), ancestors + (ctrl_id,))
+
+    def walk_groups(groups: List[Dict]) -> None:
+        for group in groups or []:
+            walk(group.get("controls", []), ())
+            walk_groups(group.get("groups", []))
+
+    body = catalog.get("catalog") or {}
+    walk(body.get("controls", []), ())
+    walk_groups(body.get("groups", []))
+    return selected
+
+
+# ------------------------ Modify (alters) ------------------------
+
+_REMOVE_CHECKS = (("by-name", "name"), ("by-class", "class"), ("by-id", "id"), ("by-ns", "ns"))
+
+
+def _remove_matches(key: str, item: Dict, remove: Dict) -> bool:
+    # by-item-name adressiert den Elementtyp ("prop", "link", "part", "param")
+    item_name = remove.get("by-item-name")
+    if item_name is not None and key[:-1] != item_name:
+        return False
+    relevant = [(rk, ik) for rk, ik in _REMOVE_CHECKS if rk in remove]
+    if not relevant:
+        return item_name is not None
+    return all(item.get(ik) == remove[rk] for rk, ik in relevant)
+
+
+def _apply_removes(node: Dict, removes: List[Dict]) -> None:
+    """Entfernt passende props/links/parts/params – auch in verschachtelten Parts."""
+    for key in ("props", "links", "parts", "params"):
+        items = node.get(key)
+        if items:
+            node[key] = [
+                item for item in items
+                if not any(_remove_matches(key, item, remove) for remove in removes)
+            ]
+    for part in node.get("parts", []) or []:
+        _apply_removes(part, removes)
+
+
+def _find_by_id(node: Dict, target_id: str) -> Optional[Dict]:
+    if node.get("id") == target_id:
+        return node
+    for part in node.get("parts", []) or []:
+        found = _find_by_id(part, target_id)
+        if found is not None:
+            return found
+    return None
+
+
+def _apply_add(control: Dict, add: Dict) -> None:
+    position = add.get("position", "ending")
+    by_id = add.get("by-id")
+    target = control
+
+    if by_id and by_id != control.get("id"):
+        target = _find_by_id(control, by_id)
+        if target is None:
+            raise ProfileResolutionError(f"alter add: by-id '{by_id}' not found in {control.get('id')}")
+
+    if "title" in add:
+        target["title"] = add["title"]
+
+    if position in ("before", "after") and target is not control:
+        # Geschwister des Ziel-Parts einfügen
+        parent = _find_parent(control, target)
+        siblings = parent.setdefault("parts", [])
+        idx = siblings.index(target) + (1 if position == "after" else 0)
+        siblings[idx:idx] = copy.deepcopy(add.get("parts", []) or [])
+        for key in ("props", "links", "params"):
+            if add.get(key):
+                parent.setdefault(key, []).extend(copy.deepcopy(add[key]))
+        return
+
+    for key in ("params", "props", "links", "parts"):
+        items = copy.deepcopy(add.get(key) or [])
+        if not items:
+            continue
+        existing = target.setdefault(key, [])
+        if position == "starting":
+            target[key] = items + existing
+        else:
+            existing.extend(items)
+
+
+def _find_parent(node: Dict, child: Dict) -> Dict:
+    for part in node.get("parts", []) or []:
+        if part is child:
+            return node
+        found = _find_parent(part, child)
+        if found is not None:
+            return found
+    return None  # type: ignore[return-value]
+
+
+def _apply_set_parameter(param: Dict, setting: Dict) -> None:
+    for key, value in setting.items():
+        if key == "param-id":
+            continue
+        param[key] = copy.deepcopy(value)
+
+
+# ------------------------ Resolver ------------------------
+
+class ProfileResolver:
+    """
+    Löst OSCAL-Profile (imports → merge → modify) zu Katalogen auf.
+
+    Memoisierung auf zwei Ebenen:
+    - ganzes Ergebnis je (Profil-Revision, Revisionen aller importierten Dokumente);
+    - je verändertem Control nach (Inhalts-Hash des Quell-Controls, Hash der
+      darauf wirkenden Alters/Parameter). Ändert sich ein einzelnes
+      Quell-Control, wird nur dieses neu verändert; alle übrigen kommen aus dem
+      Memo bzw. werden unverändert (geteilt) übernommen.
+    """
+
+    def __init__(self, catalog_registry: CatalogRegistry, max_memo_controls: int = 10000) -> None:
+        self.registry = catalog_registry
+        self.max_memo_controls = max_memo_controls
+        self._results: Dict[str, Tuple[Tuple[Tuple[str, str], ...], Dict]] = {}
+        self._control_memo: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- Import-Auflösung ----------
+
+    def _resolve_href(self, profile_name: str, profile: Dict, href: str) -> str:
+        if href.startswith("#"):
+            resource_uuid = href[1:]
+            resources = (profile.get("back-matter") or {}).get("resources", []) or []
+            for res in resources:
+                if res.get("uuid") == resource_uuid:
+                    rlinks = res.get("rlinks") or []
+                    if not rlinks:
+                        break
+                    href = rlinks[0].get("href", "")
+                    break
+            else:
+                raise ProfileResolutionError(f"{profile_name}: back-matter resource {resource_uuid} not found")
+
+        name = PurePosixPath(href.split("#", 1)[0]).stem or href
+        if name not in self.registry.names():
+            raise ProfileResolutionError(f"{profile_name}: imported document '{href}' not found in registry")
+        return name
+
+    def _import_revisions(self, name: str, seen: Tuple[str, ...] = ()) -> Tuple[Tuple[str, str], ...]:
+        """(Name, Revision) des Profils und aller transitiv importierten Dokumente."""
+        if name in seen:
+            raise ProfileResolutionError(f"Import cycle: {' → '.join(seen + (name,))}")
+        revisions = [(name, self.registry.revision(name))]
+        if self.registry.doc_type(name) == "profile":
+            profile = self.registry.get(name).get("profile") or {}
+            for imp in profile.get("imports", []) or []:
+                source = self._resolve_href(name, profile, imp.get("href", ""))
+                revisions.extend(self._import_revisions(source, seen + (name,)))
+        return tuple(revisions)
+
+    def _source_catalog(self, name: str) -> Dict:
+        doc_type = self.registry.doc_type(name)
+        if doc_type == "catalog":
+            if self.registry.is_large(name):
+                raise ProfileResolutionError(f"{name} is too large to be imported by a profile")
+            return self.registry.get(name)
+        if doc_type == "profile":
+            return self.resolve(name)
+        raise ProfileResolutionError(f"{name} is neither a catalog nor a profile ({doc_type})")
+
+    # ---------- öffentliche API ----------
+
+    def resolution_key(self, name: str) -> str:
+        """Token für Cache-Keys: ändert sich, sobald Profil oder ein Import sich ändert."""
+        return _fingerprint(self._import_revisions(name))
+
+    def resolve(self, name: str) -> Dict:
+        if self.registry.doc_type(name) != "profile":
+            raise ProfileResolutionError(f"{name} is not an OSCAL profile")
+
+        revisions = self._import_revisions(name)
+        cached = self._results.get(name)
+        if cached is not None and cached[0] == revisions:
+            return cached[1]
+
+        resolved = self._resolve(name, self.registry.get(name).get("profile") or {})
+        with self._lock:
+            self._results[name] = (revisions, resolved)
+        return resolved
+
+    # ---------- Auflösung ----------
+
+    def _resolve(self, name: str, profile: Dict) -> Dict:
+        merge = profile.get("merge") or {}
+        as_is = bool(merge.get("as-is"))
+        modify = profile.get("modify") or {}
+
+        set_params = {sp["param-id"]: sp for sp in modify.get("set-parameters", []) or [] if sp.get("param-id")}
+        alters: Dict[str, List[Dict]] = {}
+        for alter in modify.get("alters", []) or []:
+            if alter.get("control-id"):
+                alters.setdefault(alter["control-id"], []).append(alter)
+
+        seen_ids: Set[str] = set()   # combine: use-first
+        params: List[Dict] = []
+        groups: List[Dict] = []
+        controls: List[Dict] = []
+        resources: List[Dict] = []
+
+        for imp in profile.get("imports", []) or []:
+            source_name = self._resolve_href(name, profile, imp.get("href", ""))
+            source = self._source_catalog(source_name)
+            body = source.get("catalog") or {}
+            selected = _select_ids(source, imp) - seen_ids
+
+            build = _ControlBuilder(selected, alters, set_params, self._memo_get, self._memo_put)
+
+            if as_is:
+                groups.extend(build.groups(body.get("groups", [])))
+                controls.extend(build.controls(body.get("controls", [])))
+            else:
+                controls.extend(build.flat(body))
+
+            seen_ids |= build.emitted
+            for param in body.get("params", []) or []:
+                setting = set_params.get(param.get("id"))
+                if setting is not None:
+                    param = copy.deepcopy(param)
+                    _apply_set_parameter(param, setting)
+                params.append(param)
+            resources.extend((body.get("back-matter") or {}).get("resources", []) or [])
+
+        metadata = dict(profile.get("metadata") or {})
+        metadata["props"] = list(metadata.get("props", []) or []) + [
+            {"name": "resolution-tool", "value": "opengov-oscal-workbench"},
+            {"name": "source-profile-uuid", "value": profile.get("uuid", "")},
+        ]
+
+        catalog: Dict[str, Any] = {
+            "uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, f"resolved:{name}:{self.resolution_key(name)}")),
+            "metadata": metadata,
+        }
+        if params:
+            catalog["params"] = params
+        if controls:
+            catalog["controls"] = controls
+        if groups:
+            catalog["groups"] = groups
+        if resources:
+            catalog["back-matter"] = {"resources": resources}
+        return {"catalog": catalog}
+
+    def _memo_get(self, key: Tuple[str, str]) -> Optional[Dict]:
+        with self._lock:
+            value = self._control_memo.get(key)
+            if value is not None:
+                self._control_memo.move_to_end(key)
+            return value
+
+    def _memo_put(self, key: Tuple[str, str], value: Dict) -> None:
+        with self._lock:
+            self._control_memo[key] = value
+            while len(self._control_memo) > self.max_memo_controls:
+                self._control_memo.popitem(last=False)
+
+
+class _ControlBuilder:
+    """Baut die Controls eines Imports; unveränderte Controls werden geteilt."""
+
+    def __init__(self, selected, alters, set_params, memo_get, memo_put) -> None:
+        self.selected: Set[str] = selected
+        self.alters: Dict[str, List[Dict]] = alters
+        self.set_params: Dict[str, Dict] = set_params
+        self.memo_get = memo_get
+        self.memo_put = memo_put
+        self.emitted: Set[str] = set()
+
+    def _modifications(self, ctrl: Dict) -> Optional[Dict]:
+        mods: Dict[str, Any] = {}
+        ctrl_alters = self.alters.get(ctrl.get("id", ""))
+        if ctrl_alters:
+            mods["alters"] = ctrl_alters
+        param_ids = [p.get("id") for p in ctrl.get("params", []) or []]
+        settings = [self.set_params[pid] for pid in param_ids if pid in self.set_params]
+        if settings:
+            mods["set-parameters"] = settings
+        return mods or None
+
+    def _modified(self, ctrl: Dict, mods: Dict) -> Dict:
+        without_children = {k: v for k, v in ctrl.items() if k != "controls"}
+        key = (_fingerprint(without_children), _fingerprint(mods))
+        cached = self.memo_get(key)
+        if cached is not None:
+            return cached
+
+        result = copy.deepcopy(without_children)
+        for alter in mods.get("alters", []):
+            _apply_removes(result, alter.get("removes", []) or [])
+            for add in alter.get("adds", []) or []:
+                _apply_add(result, add)
+        for setting in mods.get("set-parameters", []):
+            for param in result.get("params", []) or []:
+                if param.get("id") == setting.get("param-id"):
+                    _apply_set_parameter(param, setting)
+
+        self.memo_put(key, result)
+        return result
+
+    def _control(self, ctrl: Dict) -> List[Dict]:
+        """
+        Liefert das aufgelöste Control (Liste mit 0..1 Element) bzw. – wenn es
+        selbst nicht gewählt ist – seine gewählten Unter-Controls.
+        """
+        children: List[Dict] = []
+        for child in ctrl.get("controls", []) or []:
+            children.extend(self._control(child))
+
+        ctrl_id = ctrl.get("id", "")
+        if ctrl_id not in self.selected:
+            return children
+
+        self.emitted.add(ctrl_id)
+        mods = self._modifications(ctrl)
+        source_children = ctrl.get("controls", []) or []
+        unchanged_children = len(children) == len(source_children) and all(
+            a is b for a, b in zip(children, source_children)
+        )
+
+        if mods is None and unchanged_children:
+            return [ctrl]
+
+        base = self._modified(ctrl, mods) if mods is not None else ctrl
+        result = {k: v for k, v in base.items() if k != "controls"}
+        if children:
+            result["controls"] = children
+        return [result]
+
+    def controls(self, controls: List[Dict]) -> List[Dict]:
+        out: List[Dict] = []
+        for ctrl in controls or []:
+            out.extend(self._control(ctrl))
+        return out
+
+    def groups(self, groups: List[Dict]) -> List[Dict]:
+        out: List[Dict] = []
+        for group in groups or []:
+            sub_groups = self.groups(group.get("groups", []))
+            controls = self.controls(group.get("controls", []))
+            if not sub_groups and not controls:
+                continue
+            resolved = {k: v for k, v in group.items() if k not in ("groups", "controls")}
+            if controls:
+                resolved["controls"] = controls
+            if sub_groups:
+                resolved["groups"] = sub_groups
+            out.append(resolved)
+        return out
+
+    def flat(self, body: Dict) -> List[Dict]:
+        """merge: flat – alle gewählten Controls ohne Gruppen, Unter-Controls eigenständig."""
+        out: List[Dict] = []
+
+        def flatten(controls: List[Dict]) -> None:
+            for ctrl in controls or []:
+                resolved = self._control({k: v for k, v in ctrl.items() if k != "controls"})
+                out.extend(resolved)
+                flatten(ctrl.get("controls", []))
+
+        def walk_groups(groups: List[Dict]) -> None:
+            for group in groups or []:
+                flatten(group.get("controls", []))
+                walk_groups(group.get("groups", []))
+
+        flatten(body.get("controls", []))
+        walk_groups(body.get("groups", []))
+        return out
+
+
+profile_resolver = ProfileResolver(registry)
@@ -0,0 +1,358 @@
+import json
+import os
+import re
+import uuid
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from .catalog_registry import CatalogRegistry, registry, stat_revision
+from ..models import (
+    ReferenceControlDetail,
+    ReferenceControlSummary,
+    ReferenceGroupSummary,
+    ReferencePart,
+    ReferenceProp,
+)
+from ..config import settings
+
+try:  # optional: ohne ijson wird der Katalog einmal komplett geparst
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    ijson = None
+    ObjectBuilder = None
+
+
+_TOKEN = re.compile(r"\w{2,}", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+@dataclass(frozen=True)
+class ProseRef:
+    """Verweis auf Prosa in der Prosa-Datei (statt Text im Speicher)."""
+
+    part_id: Optional[str]
+    name: str
+    offset: int
+    length: int
+
+
+@dataclass(frozen=True)
+class ReferenceControl:
+    id: str
+    title: str
+    group_id: Optional[str]
+    parent_id: Optional[str]
+    class_: Optional[str]
+    props: Tuple[Tuple[str, str], ...]
+    parts: Tuple[ProseRef, ...]
+
+
+class ProseWriter:
+    """Append-only Schreiber für die Prosa-Datei eines Imports."""
+
+    def __init__(self, fh: IO[bytes]) -> None:
+        self.fh = fh
+        self.offset = 0
+
+    def write(self, text: str) -> Tuple[int, int]:
+        data = text.encode("utf-8")
+        start = self.offset
+        self.fh.write(data)
+        self.offset += len(data)
+        return start, len(data)
+
+
+class ReferenceCatalogIndex:
+    """
+    Kompakter, read-only Index eines (großen) Referenzkatalogs:
+    Control-Stammdaten + Props im Speicher, Prosa ausgelagert in eine Datei,
+    dazu invertierte Postings (Token → Control-Ordinalzahlen) für die Suche
+    und die sortierte Token-Liste für Präfixabfragen per bisect.
+    """
+
+    def __init__(self, name: str, revision: str, prose_path: Path) -> None:
+        self.name = name
+        self.revision = revision
+        self.prose_path = prose_path
+        self.controls: Dict[str, ReferenceControl] = {}
+        self.order: List[str] = []
+        self.groups: Dict[str, ReferenceGroupSummary] = {}
+        self.postings: Dict[str, array] = {}
+        self.tokens: List[str] = []     # sortiert; von finish() gesetzt
+
+    # ---------- Aufbau ----------
+
+    def _post(self, ordinal: int, text: str) -> None:
+        for token in tokenize(text):
+            posting = self.postings.get(token)
+            if posting is None:
+                self.postings[token] = array("I", [ordinal])
+            elif posting[-1] != ordinal:
+                posting.append(ordinal)
+
+    def _collect_parts(self, parts: List[Dict], writer: ProseWriter, ordinal: int, out: List[ProseRef]) -> None:
+        for part in parts or []:
+            prose = part.get("prose")
+            if prose:
+                offset, length = writer.write(prose)
+                out.append(ProseRef(part.get("id"), part.get("name", ""), offset, length))
+                self._post(ordinal, prose)
+            self._collect_parts(part.get("parts", []), writer, ordinal, out)
+
+    def add_control(self, control: Dict, group_id: Optional[str], parent_id: Optional[str], writer: ProseWriter) -> None:
+        children = control.pop("controls", None) or []
+        ctrl_id = control.get("id")
+        if ctrl_id and ctrl_id not in self.controls:
+            ordinal = len(self.order)
+            title = control.get("title", "")
+            props = tuple(
+                (str(p.get("name")), str(p.get("value")))
+                for p in control.get("props", [])
+                if p.get("name") and p.get("value") is not None
+            )
+            self._post(ordinal, ctrl_id)
+            self._post(ordinal, title)
+            for _, value in props:
+                self._post(ordinal, value)
+
+            parts: List[ProseRef] = []
+            self._collect_parts(control.get("parts", []), writer, ordinal, parts)
+
+            self.controls[ctrl_id] = ReferenceControl(
+                id=ctrl_id,
+                title=title,
+                group_id=group_id,
+                parent_id=parent_id,
+                class_=control.get("class"),
+                props=props,
+                parts=tuple(parts),
+            )
+            self.order.append(ctrl_id)
+            if group_id in self.groups:
+                self.groups[group_id].controlCount += 1
+
+        for child in children:
+            self.add_control(child, group_id, ctrl_id, writer)
+
+    def finish(self) -> None:
+        """Nach dem Import: sortierte Token-Liste für die Präfixsuche."""
+        self.tokens = sorted(self.postings)
+
+    def add_group(self, group_id: Optional[str], title: Optional[str]) -> None:
+        if group_id and group_id not in self.groups:
+            self.groups[group_id] = ReferenceGroupSummary(id=group_id, title=title or group_id, controlCount=0)
+
+    # ---------- Abfragen ----------
+
+    def read_prose(self, ref: ProseRef) -> str:
+        with self.prose_path.open("rb") as fh:
+            fh.seek(ref.offset)
+            return fh.read(ref.length).decode("utf-8")
+
+    def search(self, query: str, limit: int) -> List[ReferenceControl]:
+        """UND-Verknüpfung aller Query-Tokens; das letzte Token matcht auch als Präfix."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        candidate_sets = []
+        for token in tokens[:-1]:
+            candidate_sets.append(set(self.postings.get(token, ())))
+        last = tokens[-1]
+        last_hits = set()
+        pos = bisect_left(self.tokens, last)
+        while pos < len(self.tokens) and self.tokens[pos].startswith(last):
+            last_hits.update(self.postings[self.tokens[pos]])
+            pos += 1
+        candidate_sets.append(last_hits)
+
+        candidate_sets.sort(key=len)
+        hits = candidate_sets[0]
+        for other in candidate_sets[1:]:
+            hits = hits & other
+            if not hits:
+                return []
+
+        return [self.controls[self.order[i]] for i in sorted(hits)[:limit]]
+
+
+# ------------------------ Import ------------------------
+
+def _iter_streaming(fh: IO[bytes]) -> Iterator[Tuple[str, Optional[str], Optional[str], Optional[Dict]]]:
+    """
+    Ereignisbasiertes Lesen mit ijson: es wird immer nur ein Control (inkl.
+    Unter-Controls) materialisiert. Liefert ("group", id, title, None) bzw.
+    ("control", group_id, None, control_dict).
+    """
+    group_stack: List[Tuple[str, Dict[str, Optional[str]]]] = []
+    builder = None
+    depth = 0
+
+    for prefix, event, value in ijson.parse(fh, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    group_id = group_stack[-1][1]["id"] if group_stack else None
+                    yield "control", group_id, None, builder.value
+                    builder = None
+            continue
+
+        if event == "start_map" and prefix.endswith("controls.item"):
+            builder = ObjectBuilder()
+            builder.event(event, value)
+            depth = 1
+        elif event == "start_map" and prefix.endswith("groups.item"):
+            group_stack.append((prefix, {"id": None, "title": None}))
+        elif event == "end_map" and group_stack and prefix == group_stack[-1][0]:
+            _, info = group_stack.pop()
+            yield "group", info["id"], info["title"], None
+        elif event == "string" and group_stack:
+            group_prefix, info = group_stack[-1]
+            if prefix == group_prefix + ".id":
+                info["id"] = value
+                # Gruppe vor ihren Controls bekannt machen
+                yield "group", value, None, None
+            elif prefix == group_prefix + ".title":
+                info["title"] = value
+
+
+def _iter_parsed(fh: IO[bytes]) -> Iterator[Tuple[str, Optional[str], Optional[str], Optional[Dict]]]:
+    """Fallback ohne ijson: gleiches Ereignisformat, aber mit vollständigem Parse."""
+    data = json.load(fh)
+
+    def walk_groups(groups: List[Dict]):
+        for group in groups or []:
+            yield "group", group.get("id"), None, None
+            for ctrl in group.get("controls", []) or []:
+                yield "control", group.get("id"), None, ctrl
+            yield from walk_groups(group.get("groups", []))
+            yield "group", group.get("id"), group.get("title"), None
+
+    catalog = data.get("catalog") or {}
+    for ctrl in catalog.get("controls", []) or []:
+        yield "control", None, None, ctrl
+    yield from walk_groups(catalog.get("groups", []))
+
+
+def import_catalog(name: str, path: Path, store_dir: Path) -> ReferenceCatalogIndex:
+    """
+    Baut den Index eines Katalogs inkrementell aus der Datei und schreibt die
+    Prosa in `store_dir/<name>-<revision>.prose`. Alte Prosa-Dateien desselben
+    Katalogs werden danach entfernt – nur, solange die importierte Revision
+    noch aktuell ist (ein verspäteter Import eines älteren Stands löscht so
+    nicht die Datei eines parallel importierten neueren).
+    """
+    store_dir.mkdir(parents=True, exist_ok=True)
+    revision = stat_revision(path)
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    prose_path = store_dir / f"{safe_name}-{revision}.prose"
+    # eindeutig je Import: parallele Importe (Threads, Worker) schreiben nie
+    # in dieselbe Temp-Datei
+    tmp_path = prose_path.with_name(f".{prose_path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+
+    index = ReferenceCatalogIndex(name, revision, prose_path)
+    events = _iter_streaming if ijson is not None else _iter_parsed
+
+    try:
+        with path.open("rb") as fh, tmp_path.open("wb") as prose_out:
+            writer = ProseWriter(prose_out)
+            for kind, group_id, title, control in events(fh):
+                if kind == "group":
+                    index.add_group(group_id, title)
+                    if title and group_id in index.groups:
+                        index.groups[group_id].title = title
+                else:
+                    index.add_control(control, group_id, None, writer)
+        os.replace(tmp_path, prose_path)
+        index.finish()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if stat_revision(path) == revision:
+        for stale in store_dir.glob(f"{safe_name}-*.prose"):
+            if stale != prose_path:
+                stale.unlink(missing_ok=True)
+    return index
+
+
+# ------------------------ Service ------------------------
+
+class ReferenceCatalogService:
+    """
+    Read-only Zugriff auf große Referenzkataloge (z.B. NIST SP 800-53,
+    BSI-Kompendium) über den Streaming-Index statt über das geparste Dokument.
+    """
+
+    INDEX_KEY = "reference"
+
+    def __init__(self, name: str, catalog_registry: Optional[CatalogRegistry] = None) -> None:
+        self.name = name
+        self.registry = catalog_registry or registry
+        if self.registry.doc_type(name) != "catalog":
+            raise ValueError(f"{name} is not an OSCAL catalog")
+
+    def index(self) -> ReferenceCatalogIndex:
+        return self.registry.get_file_index(
+            self.name,
+            self.INDEX_KEY,
+            lambda path: import_catalog(self.name, path, settings.REFERENCE_STORE_PATH),
+        )
+
+    @staticmethod
+    def _summary(ctrl: ReferenceControl) -> ReferenceControlSummary:
+        return ReferenceControlSummary(
+            id=ctrl.id,
+            title=ctrl.title,
+            groupId=ctrl.group_id,
+            parentId=ctrl.parent_id,
+            class_=ctrl.class_,
+        )
+
+    def list_groups(self) -> List[ReferenceGroupSummary]:
+        return list(self.index().groups.values())
+
+    def list_controls(
+        self,
+        offset: int = 0,
+        limit: int = 100,
+        group_id: Optional[str] = None,
+    ) -> Tuple[int, List[ReferenceControlSummary]]:
+        index = self.index()
+        ids = index.order
+        if group_id is not None:
+            ids = [i for i in ids if index.controls[i].group_id == group_id]
+        page = ids[offset:offset + limit]
+        return len(ids), [self._summary(index.controls[i]) for i in page]
+
+    def get_control(self, control_id: str) -> Optional[ReferenceControlDetail]:
+        index = self.index()
+        ctrl = index.controls.get(control_id)
+        if ctrl is None:
+            return None
+        return ReferenceControlDetail(
+            id=ctrl.id,
+            title=ctrl.title,
+            groupId=ctrl.group_id,
+            parentId=ctrl.parent_id,
+            class_=ctrl.class_,
+            props=[ReferenceProp(name=n, value=v) for n, v in ctrl.props],
+            parts=[
+                ReferencePart(id=ref.part_id, name=ref.name, prose=index.read_prose(ref))
+                for ref in ctrl.parts
+            ],
+        )
+
+    def search(self, query: str, limit: int = 50) -> List[ReferenceControlSummary]:
+        return [self._summary(ctrl) for ctrl in self.index().search(query, limit)]
@@ -0,0 +1,207 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .catalog_registry import CatalogRegistry, registry
+from .file_service import FileService
+from ..models import RenameOccurrence, RenameResult, trusted
+
+
+# ID-artige Tokens in Freitext (Prosa, Notizen): mindestens ein Trenner
+# und eine Ziffer, z.B. "SDM-TOM-LC-01-03" oder "TOM-02"
+_MENTION = re.compile(r"(?<![\w.-])[A-Za-z0-9]+(?:[-_.][A-Za-z0-9]+)+")
+
+_Path = Tuple[Union[str, int], ...]
+
+# Versuche, wenn sich Dokumente zwischen Analyse und Sperren ändern
+_MAX_ATTEMPTS = 3
+
+
+class Reference(NamedTuple):
+    path: _Path
+    kind: str       # id | value | link | part-id | mention
+
+
+class RenameConflict(ValueError):
+    """Umbenennen nicht möglich (Ziel-ID vergeben oder Quell-ID mehrdeutig)."""
+
+
+def _pointer(path: _Path) -> str:
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in path)
+
+
+def _mention_pattern(control_id: str) -> "re.Pattern[str]":
+    return re.compile(r"(?<![\w.-])" + re.escape(control_id) + r"(?![\w-]|[._][A-Za-z0-9])")
+
+
+class ReferenceIndex:
+    """
+    Rückwärts-Index eines Dokuments: ID → alle Stellen, an denen sie
+    vorkommt (als id, als Wert z.B. in Mappings/Props, als "#id"-Link, als
+    Präfix abgeleiteter Part-IDs des Controls oder als Erwähnung in Text).
+    Gebaut in einem Durchlauf je Dokument-Revision (registry.get_index);
+    Abfragen kosten danach nur die Anzahl der Treffer.
+    """
+
+    def __init__(self, document: Dict) -> None:
+        self.document = document
+        refs: Dict[str, List[Reference]] = defaultdict(list)
+        self._walk(document, (), None, refs)
+        self.refs: Dict[str, List[Reference]] = dict(refs)
+
+    def _walk(self, node: Any, path: _Path, owner: Optional[str], refs: Dict[str, List[Reference]]) -> None:
+        if isinstance(node, list):
+            for i, child in enumerate(node):
+                self._walk(child, path + (i,), owner, refs)
+            return
+        if not isinstance(node, dict):
+            return
+
+        node_id = node.get("id")
+        in_controls = len(path) >= 2 and path[-2] == "controls"
+        if in_controls and isinstance(node_id, str):
+            owner = node_id
+        for key, value in node.items():
+            child_path = path + (key,)
+            if not isinstance(value, str):
+                self._walk(value, child_path, owner, refs)
+            elif key == "id" and not in_controls and owner and path[-2:-1] == ("parts",):
+                # abgeleitete Part-IDs: "<control-id>-stmt", "<control-id>_gdn", …
+                for prefix in (owner, owner.lower()):
+                    if value.startswith(prefix) and value[len(prefix):len(prefix) + 1] in ("-", "_"):
+                        refs[owner].append(Reference(child_path, "part-id"))
+                        break
+                refs[value].append(Reference(child_path, "id"))
+            elif key == "id":
+                refs[value].append(Reference(child_path, "id"))
+            elif key == "href" and value.startswith("#"):
+                refs[value[1:]].append(Reference(child_path, "link"))
+            elif value and not any(c.isspace() for c in value):
+                refs[value].append(Reference(child_path, "value"))
+            else:
+                for token in set(_MENTION.findall(value)):
+                    if any(c.isdigit() for c in token):
+                        refs[token].append(Reference(child_path, "mention"))
+
+    def lookup(self, control_id: str) -> List[Reference]:
+        return self.refs.get(control_id, [])
+
+
+def _rewrite(value: str, kind: str, old_id: str, new_id: str) -> str:
+    if kind == "link":
+        return "#" + new_id
+    if kind == "part-id":
+        if value.startswith(old_id):
+            return new_id + value[len(old_id):]
+        return new_id.lower() + value[len(old_id):]
+    if kind == "mention":
+        return _mention_pattern(old_id).sub(new_id, value)
+    return new_id
+
+
+class RenameService:
+    """
+    Control-ID umbenennen, samt aller Verweise in den Kerndokumenten
+    (Mappings, related-mapping-Props, Part-IDs, Links, Text).
+
+    Die Fundstellen kommen aus dem gecachten ReferenceIndex je Dokument
+    (Kerndokumente sind gepinnt, ihre Indexe werden nicht verdrängt).
+    Geschrieben wird in einer Transaktion nur über die Dokumente mit
+    Fundstellen; unter deren Locks wird geprüft, dass kein Dokument seit
+    der Analyse geändert wurde – sonst wird neu analysiert.
+    """
+
+    def __init__(self, catalog_registry: Optional[CatalogRegistry] = None, file_service: Optional[FileService] = None) -> None:
+        self.registry = catalog_registry or registry
+        self.fs = file_service or FileService()
+
+    def documents(self) -> List[str]:
+        # nur Kerndokumente sind schreibbar; sehr große werden nicht indexiert
+        return [name for name in self.registry.pinned_names() if not self.registry.is_large(name)]
+
+    def _scan(self) -> Tuple[Dict[str, str], Dict[str, ReferenceIndex]]:
+        """Revisionen (vor dem Index gelesen) und gecachte Indexe aller Dokumente."""
+        names = self.documents()
+        revisions = {name: self.registry.revision(name) for name in names}
+        indexes = {name: self.registry.get_index(name, "references", ReferenceIndex) for name in names}
+        return revisions, indexes
+
+    def _impact(
+        self, indexes: Dict[str, ReferenceIndex], old_id: str, new_id: str
+    ) -> List[Tuple[_Path, RenameOccurrence]]:
+        owners = [
+            name for name, index in indexes.items()
+            if any(ref.kind == "id" and ref.path[-3:-2] == ("controls",) for ref in index.lookup(old_id))
+        ]
+        if not owners:
+            raise ValueError(f"Control {old_id} not found")
+        if len(owners) > 1:
+            raise RenameConflict(f"Control {old_id} is defined in several documents: {', '.join(owners)}")
+
+        occurrences: List[Tuple[_Path, RenameOccurrence]] = []
+        for name, index in indexes.items():
+            if any(ref.kind == "id" for ref in index.lookup(new_id)):
+                raise RenameConflict(f"ID {new_id} already exists in {name}")
+            document = index.document
+            for ref in sorted(index.lookup(old_id), key=lambda r: _pointer(r.path)):
+                value = document
+                for token in ref.path:
+                    value = value[token]
+                occurrences.append((ref.path, trusted(
+                    RenameOccurrence,
+                    document=name,
+                    path=_pointer(ref.path),
+                    kind=ref.kind,
+                    old=value,
+                    new=_rewrite(value, ref.kind, old_id, new_id),
+                )))
+        return occurrences
+
+    def rename(self, old_id: str, new_id: str, preview_only: bool = True) -> RenameResult:
+        """
+        Benennt `old_id` in `new_id` um. Mit preview_only nur die vollständige
+        Liste der betroffenen Stellen (nichts wird geschrieben).
+        """
+        if old_id == new_id:
+            raise RenameConflict("Old and new ID are identical")
+
+        if preview_only:
+            _, indexes = self._scan()
+            occurrences = [o for _, o in self._impact(indexes, old_id, new_id)]
+            return trusted(
+                RenameResult,
+                oldId=old_id,
+                newId=new_id,
+                mode="preview",
+                documents=sorted({o.document for o in occurrences}),
+                occurrences=occurrences,
+            )
+
+        for _ in range(_MAX_ATTEMPTS):
+            revisions, indexes = self._scan()
+            impact = self._impact(indexes, old_id, new_id)
+            affected = sorted({occurrence.document for _, occurrence in impact})
+            with self.fs.transaction(affected, op="rename_control") as tx:
+                # unter den Locks: analysierte Stände noch aktuell?
+                current = all(
+                    tx.editor(name).base is indexes[name].document
+                    if name in tx.editors else self.registry.revision(name) == revision
+                    for name, revision in revisions.items()
+                )
+                if current:
+                    for ref_path, occurrence in impact:
+                        tx.editor(occurrence.document).writable(ref_path[:-1])[ref_path[-1]] = occurrence.new
+            if current:
+                break
+        else:
+            raise RenameConflict("Documents were changed during the rename, please retry")
+
+        return trusted(
+            RenameResult,
+            oldId=old_id,
+            newId=new_id,
+            mode="renamed",
+            documents=tx.committed,
+            occurrences=[o for _, o in impact],
+            transactionId=tx.id,
+        )
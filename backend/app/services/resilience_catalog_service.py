@@ -1,7 +1,8 @@
 import json
 from typing import List, Optional, Dict, Any
 
-from ..models import SecurityControl
+from .document_editor import DocumentEditor, find_control_path
+from ..models import SecurityControl, trusted
 
 
 class ResilienceCatalogService:
@@ -73,7 +74,8 @@ class ResilienceCatalogService:
             props = self._extract_props(control)
 
             items.append(
-                SecurityControl(
+                trusted(
+                    SecurityControl,
                     id=ctrl_id,
                     title=title,
                     class_=control.get("class"),
@@ -90,7 +92,8 @@ class ResilienceCatalogService:
         for _group_id, control in self._iter_controls():
             if control.get("id") == control_id:
                 props = self._extract_props(control)
-                return SecurityControl(
+                return trusted(
+                    SecurityControl,
                     id=control_id,
                     title=control.get("title", ""),
                     class_=control.get("class"),
@@ -103,19 +106,18 @@ class ResilienceCatalogService:
     def update_control(self, control_id: str, updates: dict) -> SecurityControl:
         """
         Aktualisiert Titel, Domain, Objective und Beschreibung für ein SEC-Control.
-        """
-        catalog = self.raw.get("catalog", {})
-        target_control: Optional[dict] = None
-
-        for group in catalog.get("groups", []):
-            for control in group.get("controls", []):
-                if control.get("id") == control_id:
-                    target_control = control
-                    break
 
-        if target_control is None:
+        self.raw wird dabei nicht verändert, sondern per Copy-on-Write durch
+        eine neue Wurzel ersetzt (nur das Control wird kopiert).
+        """
+        path = find_control_path(self.raw, control_id)
+        if path is None:
             raise ValueError(f"Security control {control_id} not found")
 
+        editor = DocumentEditor(self.raw)
+        target_control = editor.own(path)
+        self.raw = editor.root
+
         # Titel
         if "title" in updates and updates["title"] is not None:
             target_control["title"] = updates["title"]
@@ -159,7 +161,8 @@ class ResilienceCatalogService:
 
         # aktualisierte Werte extrahieren
         props = self._extract_props(target_control)
-        return SecurityControl(
+        return trusted(
+            SecurityControl,
             id=control_id,
             title=target_control.get("title", ""),
             class_=target_control.get("class"),
@@ -0,0 +1,297 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from .catalog_registry import registry
+from .content_hashes import content_hashes
+from .file_service import FileService, on_write
+from ..config import settings
+
+try:  # optional: Brotli nur, wenn das Paket installiert ist
+    import brotli
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    brotli = None
+
+
+@dataclass
+class CachedBody:
+    """Fertig kodierte Antwort, optional zusätzlich vorkomprimiert."""
+
+    identity: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+    media_type: str = "application/json"
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding == "br" and self.br is not None:
+            return self.br
+        if encoding == "gzip" and self.gzip is not None:
+            return self.gzip
+        return self.identity
+
+    def available(self) -> List[str]:
+        encodings = []
+        if self.br is not None:
+            encodings.append("br")
+        if self.gzip is not None:
+            encodings.append("gzip")
+        encodings.append("identity")
+        return encodings
+
+
+class ResponseCache:
+    """
+    LRU-Cache für serialisierte JSON-Antworten.
+
+    Schlüssel: (Dokument, Route, Query, Revision); hängt eine Antwort von
+    mehreren Dokumenten ab, ist der erste Teil ein frozenset ihrer Namen.
+    Da die Revision Teil des Schlüssels ist, können veraltete Einträge nie
+    ausgeliefert werden; beim Schreiben eines Dokuments werden seine
+    Einträge trotzdem sofort entfernt, damit sie keinen Platz im LRU belegen.
+    """
+
+    def __init__(self, max_entries: int, min_compress_bytes: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self._entries: "OrderedDict[Tuple[Hashable, ...], CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[CachedBody]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[Hashable, ...], body: CachedBody) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, document: str) -> None:
+        with self._lock:
+            stale = [
+                k for k in self._entries
+                if k[0] == document or (isinstance(k[0], frozenset) and document in k[0])
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def encode(self, payload: Any) -> CachedBody:
+        return self.body(encode_json(payload))
+
+    def body(self, identity: bytes, media_type: str = "application/json") -> CachedBody:
+        """Fertig kodierter Body, ab min_compress_bytes zusätzlich vorkomprimiert."""
+        body = CachedBody(identity=identity, media_type=media_type)
+        if len(identity) >= self.min_compress_bytes:
+            body.gzip = gzip.compress(identity, compresslevel=6)
+            if brotli is not None:
+                body.br = brotli.compress(identity, quality=5)
+        return body
+
+
+def encode_json(payload: Any) -> bytes:
+    """Kompaktes JSON (UTF-8) eines Payloads aus Modellen/Dicts/Listen."""
+    if settings.VALIDATE_MODELS:
+        # Debug: gleiche Serialisierung wie FastAPIs JSONResponse
+        return json.dumps(
+            jsonable_encoder(payload),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+    # Modelle/Dicts/Listen direkt in pydantic-core serialisieren –
+    # ohne den Umweg über jsonable_encoder (gleiches JSON, kompakt)
+    return to_json(payload, inf_nan_mode="null")
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[token] = q
+    return result
+
+
+def negotiate_encoding(header: Optional[str], available: List[str]) -> str:
+    """Wählt die beste verfügbare Kodierung laut Accept-Encoding (br > gzip > identity)."""
+    if not header:
+        return "identity"
+    accepted = _parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+    for encoding in available:
+        if encoding == "identity":
+            break
+        q = accepted.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > 0:
+            return encoding
+    return "identity"
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    min_compress_bytes=settings.RESPONSE_CACHE_MIN_COMPRESS_BYTES,
+)
+
+on_write(response_cache.invalidate)
+
+
+_ADAPTERS: Dict[Any, TypeAdapter] = {}
+
+
+def validate_payload(request: Request, payload: Any) -> None:
+    """
+    Debug-Prüfung (settings.VALIDATE_MODELS): jedes per model_construct gebaute
+    Modell im Payload wird nachvalidiert, der Payload zusätzlich gegen das
+    response_model der Route. Fehler werden als ValidationError geworfen.
+    """
+    stack = [payload]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, BaseModel):
+            type(current).model_validate(current.model_dump())
+        elif isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+
+    route = request.scope.get("route")
+    response_model = getattr(route, "response_model", None)
+    if response_model is None or response_model is dict:
+        return
+    adapter = _ADAPTERS.get(response_model)
+    if adapter is None:
+        adapter = _ADAPTERS[response_model] = TypeAdapter(response_model)
+    adapter.validate_python(jsonable_encoder(payload))
+
+
+def _encode(request: Request, payload: Any) -> CachedBody:
+    if settings.VALIDATE_MODELS:
+        validate_payload(request, payload)
+    return response_cache.encode(payload)
+
+
+def _build_response(request: Request, body: CachedBody) -> Response:
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), body.available())
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=body.encoded(encoding),
+        media_type=body.media_type,
+        headers=headers,
+    )
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # schwache Vergleichsfunktion (RFC 9110 §8.8.3.2): W/-Präfix ignorieren
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def item_etag(request: Request, document: str, item_id: str, resolved: bool = False) -> Optional[str]:
+    """
+    ETag der Detailansicht eines Controls/Mappings aus dessen Inhalts-Hash
+    (Route + Query + Item, siehe ContentHashes.etag); None, wenn es das
+    Dokument oder Item nicht gibt.
+    """
+    try:
+        hashes = content_hashes.hashes(document, registry.get(document))
+    except (FileNotFoundError, ValueError):
+        return None
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return hashes.etag(item_id, f"{request.url.path}?{query}", resolved=resolved)
+
+
+def cached_json_response(
+    request: Request,
+    document: str,
+    build: Callable[[], Any],
+    file_service: Optional[FileService] = None,
+    revision: Optional[str] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """
+    Liefert die JSON-Antwort für (Route, Query, Revision von `document`) aus dem
+    Cache oder baut sie über `build()` und legt sie ab.
+
+    Hängt die Antwort von mehreren Dokumenten ab, kann der Aufrufer einen
+    eigenen `revision`-Token übergeben.
+
+    Mit `etag` (z.B. Inhalts-Hash eines einzelnen Controls) wird ein schwacher
+    ETag gesetzt und bei passendem If-None-Match direkt 304 geliefert – auch
+    wenn sich andere Teile des Dokuments geändert haben.
+
+    Fehler aus `build()` (z.B. HTTPException 404) werden nicht gecacht.
+    """
+    if etag is not None:
+        tag = f'W/"{etag}"'
+        if _etag_matches(request.headers.get("if-none-match"), tag):
+            return Response(status_code=304, headers={"ETag": tag, "Vary": "Accept-Encoding"})
+        response = cached_json_response(request, document, build, file_service, revision)
+        response.headers["ETag"] = tag
+        return response
+
+    if revision is None:
+        fs = file_service or FileService()
+        try:
+            revision = fs.revision(document)
+        except (FileNotFoundError, ValueError):
+            # ohne Revision kein Cache – build() liefert die passende Fehlermeldung
+            return _build_response(request, _encode(request, build()))
+
+    query = tuple(sorted(request.query_params.multi_items()))
+    key = (document, request.url.path, query, revision)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = _encode(request, build())
+        response_cache.put(key, body)
+    return _build_response(request, body)
+
+
+def cached_body_response(
+    request: Request,
+    key: Tuple[Hashable, ...],
+    build: Callable[[], CachedBody],
+) -> Response:
+    """
+    Wie cached_json_response, aber für Antworten, die der Aufrufer selbst
+    kodiert (z.B. aus vorkodierten Fragmenten zusammengesetzt); `key` muss
+    den Revisions-Token aller beteiligten Dokumente enthalten und beginnt
+    mit dem Dokumentnamen bzw. dem frozenset der Namen (für invalidate).
+    """
+    body = response_cache.get(key)
+    if body is None:
+        body = build()
+        response_cache.put(key, body)
+    return _build_response(request, body)
@@ -1,196 +1,327 @@
-import json
-from typing import List, Optional, Dict, Any
-
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import diff_service
+from .catalog_registry import registry
+from .catalog_utils import get_prop_values, iter_catalog_controls
+from .document_editor import find_control_path
+from .edit_journal import serialize_document
+from .file_service import FileService
+from .mapping_service import MappingService
 from ..models import (
     SdmControlSummary,
     SdmControlSummaryProps,
     SdmControlDetail,
     SdmControlDetailProps,
+    SdmTomControlSummary,
+    SdmTomControlDetail,
     RelatedMapping,
+    SdmSecurityMapping,
+    trusted,
 )
+from ..config import settings
 
 
-class SdmCatalogService:
-    def __init__(self, raw_json: dict):
-        self.raw = raw_json
+# Standards im Mapping-File, die als related-mapping-Props (class) am
+# Control gespiegelt werden
+_MAPPING_SCHEMES = ("bsi", "iso27001", "iso27701")
 
-    @classmethod
-    def from_json_str(cls, content: str) -> "SdmCatalogService":
-        data = json.loads(content)
-        return cls(data)
+# Props, die über die Props-Ansicht als Einzelwert bearbeitet werden
+_SINGLE_PROPS = {
+    "implementationLevel": "implementation-level",
+    "dpRiskImpact": "dp-risk-impact",
+}
 
-    # ---------- interne Helfer ----------
 
-    def _iter_controls(self):
-        """
-        Generator über alle Controls im Catalog (inkl. Gruppenzugehörigkeit).
-        Gibt Tupel (group_id, control_dict) zurück.
-        """
-        catalog = self.raw.get("catalog", {})
-        for group in catalog.get("groups", []):
-            group_id = group.get("id")
-            for control in group.get("controls", []):
-                yield group_id, control
+def _first_prop(control: Dict, name: str) -> Optional[str]:
+    values = get_prop_values(control, name)
+    return values[0] if values else None
 
-    @staticmethod
-    def _extract_summary_props(control: Dict[str, Any]) -> SdmControlSummaryProps:
-        sdm_module: Optional[str] = None
-        sdm_goals: List[str] = []
-        dsgvo_articles: List[str] = []
-
-        for prop in control.get("props", []):
-            name = prop.get("name")
-            value = prop.get("value", "")
-
-            if name == "sdm-module":
-                sdm_module = value
-
-            elif name == "sdm-goal":
-                if value and value not in sdm_goals:
-                    sdm_goals.append(value)
-
-            # hier ggf. an deine realen Prop-Namen anpassen
-            elif name in ("dsgvo-article", "legal-basis"):
-                if value and value not in dsgvo_articles:
-                    dsgvo_articles.append(value)
-
-        return SdmControlSummaryProps(
-            sdmModule=sdm_module,
-            sdmGoals=sdm_goals,
-            dsgvoArticles=dsgvo_articles,
-        )
-
-    @staticmethod
-    def _extract_detail_props(control: Dict[str, Any]) -> SdmControlDetailProps:
-        summary = SdmCatalogService._extract_summary_props(control)
 
-        implementation_level: Optional[str] = None
-        dp_risk_impact: Optional[str] = None
-        related_mappings: List[RelatedMapping] = []
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(v for v in values if v))
 
-        for prop in control.get("props", []):
-            name = prop.get("name")
-            value = prop.get("value", "")
-            clazz = prop.get("class")
 
-            if name == "implementation-level":
-                implementation_level = value
+def _find_part(control: Dict, name: str) -> Optional[Dict]:
+    for part in control.get("parts", []) or []:
+        if part.get("name") == name:
+            return part
+    return None
 
-            elif name == "dp-risk-impact":
-                dp_risk_impact = value
 
-            elif name == "related-mapping":
-                # scheme leiten wir aus class ab (bsi / iso27001 / iso27701 / security / …)
-                scheme = clazz or "other"
-                rm = RelatedMapping(
-                    scheme=scheme,
-                    value=value,
-                    remarks=prop.get("remarks")
-                )
-                related_mappings.append(rm)
-
-        return SdmControlDetailProps(
-            sdmModule=summary.sdmModule,
-            sdmGoals=summary.sdmGoals,
-            dsgvoArticles=summary.dsgvoArticles,
-            implementationLevel=implementation_level,
-            dpRiskImpact=dp_risk_impact,
-            relatedMappings=related_mappings,
-        )
+def _ensure_part(control: Dict, name: str) -> Dict:
+    part = _find_part(control, name)
+    if part is None:
+        part = {"id": f"{control['id']}-{name}", "name": name}
+        control.setdefault("parts", []).append(part)
+    return part
 
-    # ---------- öffentliche Methoden für API ----------
 
-    def list_controls(self) -> List[SdmControlSummary]:
-        """Gibt alle Controls als Summary für die Tabellen-Ansicht zurück."""
-        items: List[SdmControlSummary] = []
+class SdmCatalogIndex:
+    """
+    Index über sdm_privacy_catalog.json (pro Revision gebaut): Control-ID →
+    (Gruppe, Eltern-Control, Control) inkl. verschachtelter Controls.
 
-        for group_id, control in self._iter_controls():
-            ctrl_id = control.get("id")
-            title = control.get("title", "")
+    Beide Sichten werden daraus abgeleitet und je Control memoisiert:
+    - Props-Sicht (SdmControlSummary/-Detail): Modul, Ziele, DSGVO-Artikel,
+      Umsetzungsgrad, Risiko, related-mappings,
+    - Prosa-Sicht (SdmTomControlSummary/-Detail): Beschreibung und
+      Umsetzungshinweise.
+    """
 
-            if not ctrl_id:
+    def __init__(self, document: Dict) -> None:
+        self.entries: Dict[str, Tuple[Optional[str], Optional[str], Dict]] = {}
+        self.order: List[str] = []
+        for group_id, parent_id, ctrl in iter_catalog_controls(document):
+            ctrl_id = ctrl.get("id")
+            if not ctrl_id or ctrl_id in self.entries:
                 continue
+            self.entries[ctrl_id] = (group_id, parent_id, ctrl)
+            self.order.append(ctrl_id)
+        self._memo: Dict[Tuple[str, str], Any] = {}
 
-            props = self._extract_summary_props(control)
+    def ids(self, include_nested: bool = False) -> List[str]:
+        if include_nested:
+            return list(self.order)
+        return [i for i in self.order if self.entries[i][1] is None]
 
-            items.append(
-                SdmControlSummary(
-                    id=ctrl_id,
-                    title=title,
-                    groupId=group_id,
-                    props=props,
-                )
-            )
+    def _cached(self, view: str, control_id: str, build: Callable[[], Any]) -> Any:
+        key = (view, control_id)
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = build()
+        return value
 
-        # optional sortieren nach ID
+    # ------------------------ Props-Sicht ------------------------
+
+    @staticmethod
+    def summary_props(control: Dict) -> SdmControlSummaryProps:
+        return trusted(
+            SdmControlSummaryProps,
+            sdmModule=_first_prop(control, "sdm-module"),
+            sdmGoals=_unique(get_prop_values(control, "sdm-goal")),
+            dsgvoArticles=_unique(
+                get_prop_values(control, "dsgvo-article") + get_prop_values(control, "legal-basis")
+            ),
+        )
+
+    @classmethod
+    def detail_props(cls, control: Dict) -> SdmControlDetailProps:
+        summary = cls.summary_props(control)
+        return trusted(
+            SdmControlDetailProps,
+            sdmModule=summary.sdmModule,
+            sdmGoals=summary.sdmGoals,
+            dsgvoArticles=summary.dsgvoArticles,
+            implementationLevel=_first_prop(control, "implementation-level"),
+            dpRiskImpact=_first_prop(control, "dp-risk-impact"),
+            relatedMappings=[
+                # scheme leiten wir aus class ab (bsi / iso27001 / iso27701 / security / …)
+                trusted(RelatedMapping, scheme=p.get("class") or "other", value=p.get("value", ""), remarks=p.get("remarks"))
+                for p in control.get("props", []) or []
+                if p.get("name") == "related-mapping"
+            ],
+        )
+
+    def summary(self, control_id: str) -> SdmControlSummary:
+        group_id, parent_id, ctrl = self.entries[control_id]
+        return self._cached("summary", control_id, lambda: trusted(
+            SdmControlSummary,
+            id=control_id,
+            title=ctrl.get("title", ""),
+            groupId=group_id,
+            parentId=parent_id,
+            props=self.summary_props(ctrl),
+        ))
+
+    def detail(self, control_id: str) -> SdmControlDetail:
+        group_id, parent_id, ctrl = self.entries[control_id]
+        return self._cached("detail", control_id, lambda: trusted(
+            SdmControlDetail,
+            id=control_id,
+            title=ctrl.get("title", ""),
+            class_=ctrl.get("class"),
+            groupId=group_id,
+            parentId=parent_id,
+            props=self.detail_props(ctrl),
+        ))
+
+    # ------------------------ Prosa-Sicht ------------------------
+
+    def prose_summary(self, control_id: str) -> SdmTomControlSummary:
+        _, _, ctrl = self.entries[control_id]
+        return self._cached("prose-summary", control_id, lambda: trusted(
+            SdmTomControlSummary,
+            id=control_id,
+            title=ctrl.get("title", ""),
+            sdm_module=_first_prop(ctrl, "sdm-module"),
+            sdm_goals=get_prop_values(ctrl, "sdm-goal"),
+            dsgvo_articles=get_prop_values(ctrl, "dsgvo-article"),
+        ))
+
+    def prose_detail(self, control_id: str) -> SdmTomControlDetail:
+        _, _, ctrl = self.entries[control_id]
+        return self._cached("prose-detail", control_id, lambda: trusted(
+            SdmTomControlDetail,
+            id=control_id,
+            title=ctrl.get("title", ""),
+            sdm_module=_first_prop(ctrl, "sdm-module"),
+            sdm_goals=get_prop_values(ctrl, "sdm-goal"),
+            dsgvo_articles=get_prop_values(ctrl, "dsgvo-article"),
+            description=(_find_part(ctrl, "description") or {}).get("prose"),
+            implementation_hints=(_find_part(ctrl, "implementation-hints") or {}).get("prose"),
+        ))
+
+
+class SdmCatalogService:
+    """
+    Lesen/Bearbeiten von sdm_privacy_catalog.json – eine Engine für die
+    Props-Sicht (/api/sdm/controls) und die Prosa-Sicht (/api/sdm/prose/controls).
+
+    Gelesen wird über den pro Revision gecachten SdmCatalogIndex; alle
+    Änderungen laufen über _update(), das Lesen-Ändern-Schreiben unter dem
+    Dokument-Lock ausführt (keine verlorenen Updates bei parallelen Edits)
+    und dabei nur das geänderte Control samt Pfad kopiert.
+    """
+
+    def __init__(
+        self,
+        file_service: Optional[FileService] = None,
+        catalog_name: Optional[str] = None,
+    ) -> None:
+        self.fs = file_service or FileService()
+        self.catalog_name = catalog_name or settings.SDM_PRIVACY_CATALOG_NAME
+
+    # ------------------------ interne Helfer ------------------------
+
+    def _index(self) -> SdmCatalogIndex:
+        return registry.get_index(self.catalog_name, "sdm-controls", SdmCatalogIndex)
+
+    def _update(self, control_id: str, mutate: Callable[[Dict], None]) -> Dict:
+        """
+        Gemeinsamer Schreibpfad: Control als eigene Kopie ändern, neuen Stand
+        per Copy-on-Write bauen und speichern (der geteilte Stand bleibt
+        unverändert). Liefert {"content", "diff"} des geschriebenen Stands.
+        """
+        with self.fs.editing(self.catalog_name) as editor:
+            path = find_control_path(editor.base, control_id)
+            if path is None:
+                raise ValueError(f"Control {control_id} not found in {self.catalog_name}")
+            mutate(editor.own(path))
+            editor.content = serialize_document(editor.root)
+        return {"content": editor.content, "diff": diff_service.diff_json(editor.base, editor.root, self.catalog_name)}
+
+    # ------------------------ Props-Sicht ------------------------
+
+    def list_controls(self, include_nested: bool = False) -> List[SdmControlSummary]:
+        """Alle Controls als Summary für die Tabellen-Ansicht (sortiert nach ID)."""
+        index = self._index()
+        items = [index.summary(i) for i in index.ids(include_nested)]
         items.sort(key=lambda c: c.id)
         return items
 
     def get_control(self, control_id: str) -> Optional[SdmControlDetail]:
-        """Detailansicht für ein Control (inkl. Mappings etc.)."""
-        for group_id, control in self._iter_controls():
-            if control.get("id") == control_id:
-                props = self._extract_detail_props(control)
-                return SdmControlDetail(
-                    id=control_id,
-                    title=control.get("title", ""),
-                    class_=control.get("class"),
-                    groupId=group_id,
-                    props=props,
-                )
-        return None
+        index = self._index()
+        if control_id not in index.entries:
+            return None
+        return index.detail(control_id)
 
     def update_control_props(self, control_id: str, props_update: dict) -> SdmControlDetail:
         """
-        Aktualisiert bestimmte Props eines Controls in self.raw.
-        Erwartet z.B. {"relatedMappings": [...]} aus dem API-Request.
+        Aktualisiert Props eines Controls, z.B. {"relatedMappings": [...]} oder
+        {"implementationLevel": "3"} (None entfernt den Prop).
+        """
+        def mutate(ctrl: Dict) -> None:
+            props_list = ctrl.setdefault("props", [])
+
+            for field, prop_name in _SINGLE_PROPS.items():
+                if field not in props_update:
+                    continue
+                value = props_update[field]
+                props_list = [p for p in props_list if p.get("name") != prop_name]
+                if value is not None:
+                    props_list.append({"name": prop_name, "value": str(value)})
+
+            if "relatedMappings" in props_update:
+                props_list = [p for p in props_list if p.get("name") != "related-mapping"]
+                for rm in props_update["relatedMappings"] or []:
+                    props_list.append(
+                        {
+                            "name": "related-mapping",
+                            "class": rm["scheme"],
+                            "value": rm["value"],
+                            **({"remarks": rm["remarks"]} if rm.get("remarks") else {}),
+                        }
+                    )
+
+            ctrl["props"] = props_list
+
+        self._update(control_id, mutate)
+        return self._index().detail(control_id)
+
+    def update_mapping(self, control_id: str, mapping: SdmSecurityMapping) -> Dict:
+        """
+        Mapping eines Controls ersetzen und die related-mapping-Props
+        (bsi/iso27001/iso27701) des Controls daraus nachziehen – beide
+        Dateien in einer Transaktion, also gemeinsam oder gar nicht.
+        Bemerkungen bleiben an unveränderten Werten erhalten.
         """
-        catalog = self.raw.get("catalog", {})
-        target_control: Optional[dict] = None
-        target_group_id: Optional[str] = None
-
-        for group in catalog.get("groups", []):
-            for control in group.get("controls", []):
-                if control.get("id") == control_id:
-                    target_control = control
-                    target_group_id = group.get("id")
-                    break
-
-        if target_control is None:
-            raise ValueError(f"Control {control_id} not found")
-
-        # Falls keine props-Liste existiert, anlegen
-        props_list = target_control.setdefault("props", [])
-
-        # Mapping-Update: relatedMappings → Props-Objekte
-        if "relatedMappings" in props_update:
-            # Entferne alle bisherigen related-mapping-Props
+        mapping_name = settings.SDM_MAPPING_NAME
+        with self.fs.transaction([self.catalog_name, mapping_name], op="update_mapping") as tx:
+            catalog = tx.editor(self.catalog_name)
+            path = find_control_path(catalog.base, control_id)
+            if path is None:
+                raise ValueError(f"Control {control_id} not found in {self.catalog_name}")
+
+            mappings = MappingService(tx.editor(mapping_name).base)
+            mappings.upsert_mapping(mapping)
+            tx.stage(mapping_name, mappings.raw)
+
+            ctrl = catalog.own(path)
+            existing = [p for p in ctrl.get("props", []) if p.get("name") == "related-mapping"]
             props_list = [
-                p for p in props_list if p.get("name") != "related-mapping"
+                p for p in ctrl.get("props", [])
+                if p.get("name") != "related-mapping" or p.get("class") not in _MAPPING_SCHEMES
             ]
-
-            for rm in props_update["relatedMappings"]:
-                props_list.append(
-                    {
+            for scheme in _MAPPING_SCHEMES:
+                remarks = {p.get("value"): p.get("remarks") for p in existing if p.get("class") == scheme}
+                for value in _unique(getattr(mapping.standards, scheme) or []):
+                    props_list.append({
                         "name": "related-mapping",
-                        "class": rm["scheme"],
-                        "value": rm["value"],
-                        **({"remarks": rm["remarks"]} if rm.get("remarks") else {}),
-                    }
-                )
-
-            target_control["props"] = props_list
-
-        # TODO: weitere Felder aus props_update analog behandeln (implementation-level, dp-risk-impact, ...)
-
-        detail_props = self._extract_detail_props(target_control)
-        return SdmControlDetail(
-            id=control_id,
-            title=target_control.get("title", ""),
-            class_=target_control.get("class"),
-            groupId=target_group_id,
-            props=detail_props,
-        )
+                        "class": scheme,
+                        "value": value,
+                        **({"remarks": remarks[value]} if remarks.get(value) else {}),
+                    })
+            ctrl["props"] = props_list
+            catalog.content = serialize_document(catalog.root)
+
+        return {
+            "mapping": MappingService(self.fs.load_json(mapping_name)).get_mapping(mapping.sdmControlId),
+            "control": self._index().detail(control_id),
+        }
+
+    # ------------------------ Prosa-Sicht ------------------------
+
+    def list_prose_controls(self, include_nested: bool = False) -> List[SdmTomControlSummary]:
+        index = self._index()
+        items = [index.prose_summary(i) for i in index.ids(include_nested)]
+        items.sort(key=lambda c: (c.sdm_module or "", c.id))
+        return items
 
-    def to_json_str(self) -> str:
-        return json.dumps(self.raw, ensure_ascii=False, indent=2)
+    def get_prose_control(self, control_id: str) -> Optional[SdmTomControlDetail]:
+        index = self._index()
+        if control_id not in index.entries:
+            return None
+        return index.prose_detail(control_id)
+
+    def update_prose_control(self, control_id: str, data: SdmTomControlDetail) -> Dict:
+        """Titel, Beschreibung und Umsetzungshinweise eines Controls ersetzen."""
+        def mutate(ctrl: Dict) -> None:
+            ctrl["title"] = data.title
+            _ensure_part(ctrl, "description")["prose"] = data.description or ""
+            _ensure_part(ctrl, "implementation-hints")["prose"] = data.implementation_hints or ""
+
+        result = self._update(control_id, mutate)
+        return {
+            "updated": self.get_prose_control(control_id),
+            "file": result,
+        }
@@ -0,0 +1,274 @@
+import heapq
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_utils import iter_catalog_controls
+from .file_service import FileService
+from .suggest_service import normalize
+from ..config import settings
+from ..models import MappingSuggestion, MappingSuggestionList
+
+
+# Hashing-Trick: Features landen in 2^18 Buckets, Vokabular muss nicht gepflegt werden
+_DIM_BITS = 18
+_DIM_MASK = (1 << _DIM_BITS) - 1
+
+_WORD = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+_NGRAM = 4              # Zeichen-n-Gramme für Wortstämme ("loesch", "protokoll"/"protocol")
+_NGRAM_WEIGHT = 0.5
+
+_STOPWORDS = frozenset(
+    "und oder der die das den dem des ein eine einer eines einem einen mit von fuer auf aus bei "
+    "ist sind wird werden wurde nach ueber unter sowie auch dass als wie zur zum durch nicht "
+    "the and for with from that this are was were has have its into such which their other "
+    "all any can may must shall should".split()
+)
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & _DIM_MASK
+
+
+def features(text: str) -> Dict[int, float]:
+    """Termfrequenzen (gehasht) aus Wörtern und Zeichen-4-Grammen der Wörter."""
+    counts: Dict[int, float] = {}
+    for word in _WORD.findall(normalize(text)):
+        if word in _STOPWORDS:
+            continue
+        bucket = _bucket(word)
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+        if len(word) > _NGRAM:
+            for i in range(len(word) - _NGRAM + 1):
+                bucket = _bucket("#" + word[i:i + _NGRAM])
+                counts[bucket] = counts.get(bucket, 0.0) + _NGRAM_WEIGHT
+    return counts
+
+
+def control_text(ctrl: Dict) -> str:
+    """Titel, Prosa aller (Unter-)Parts und die objective-Props eines Controls."""
+    chunks = [ctrl.get("title", "")]
+    chunks.extend(
+        str(p.get("value", "")) for p in ctrl.get("props", []) or [] if p.get("name") == "objective"
+    )
+    stack = list(ctrl.get("parts", []) or [])
+    while stack:
+        part = stack.pop()
+        if part.get("prose"):
+            chunks.append(part["prose"])
+        stack.extend(part.get("parts", []) or [])
+    return "\n".join(c for c in chunks if c)
+
+
+class SimilarityIndex:
+    """
+    TF-IDF-Vektoren (gehasht, dünn besetzt) über Control-Prosa mehrerer Quellen.
+
+    - Zeilen (Termfrequenzen je Control) werden pro Text gecacht; update()
+      rechnet nur Controls neu, deren Text sich geändert hat, und pflegt die
+      Dokumentfrequenzen inkrementell.
+    - IDF-Gewichte, normierte Vektoren und der invertierte Index je Ziel-Quelle
+      werden pro Generation (= nach Änderungen) einmal abgeleitet, O(Nicht-Nullen).
+    - top_k() berechnet Kosinus-Ähnlichkeiten für einen Stapel von Anfragen
+      als dünnes Matrix-Vektor-Produkt über den invertierten Index.
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[str, Dict[str, Tuple[str, Dict[int, float]]]] = {}
+        self._df: Counter = Counter()
+        self._count = 0
+        self.revisions: Dict[str, str] = {}
+        self.generation = 0
+        self._derived_generation = -1
+        self._vectors: Dict[Tuple[str, str], Dict[int, float]] = {}
+        self._postings: Dict[str, Dict[int, List[Tuple[str, float]]]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def has(self, source: str, row_id: str) -> bool:
+        return row_id in self._rows.get(source, {})
+
+    def update(self, source: str, texts: Dict[str, str], revision: Optional[str] = None) -> int:
+        """Gleicht die Zeilen einer Quelle ab; liefert die Zahl geänderter Zeilen."""
+        rows = self._rows.setdefault(source, {})
+        changes = 0
+        for row_id in [r for r in rows if r not in texts]:
+            self._df.subtract(rows.pop(row_id)[1].keys())
+            self._count -= 1
+            changes += 1
+        for row_id, text in texts.items():
+            old = rows.get(row_id)
+            if old is not None and old[0] == text:
+                continue
+            if old is not None:
+                self._df.subtract(old[1].keys())
+            else:
+                self._count += 1
+            tf = features(text)
+            self._df.update(tf.keys())
+            rows[row_id] = (text, tf)
+            changes += 1
+        if changes:
+            self._df += Counter()   # Null-Einträge entfernen
+            self.generation += 1
+        if revision is not None:
+            self.revisions[source] = revision
+        return changes
+
+    # ------------------------ Ableitung ------------------------
+
+    def _weigh(self, tf: Dict[int, float]) -> Dict[int, float]:
+        n = self._count
+        vector = {
+            bucket: (1.0 + math.log(freq)) * (math.log((1 + n) / (1 + self._df.get(bucket, 0))) + 1.0)
+            for bucket, freq in tf.items() if freq > 0
+        }
+        norm = math.sqrt(math.fsum(w * w for w in vector.values()))
+        if not norm:
+            return {}
+        return {bucket: w / norm for bucket, w in vector.items()}
+
+    def _derive(self) -> None:
+        if self._derived_generation == self.generation:
+            return
+        self._vectors = {
+            (source, row_id): self._weigh(tf)
+            for source, rows in self._rows.items()
+            for row_id, (_, tf) in rows.items()
+        }
+        self._postings = {}
+        for (source, row_id), vector in self._vectors.items():
+            postings = self._postings.setdefault(source, {})
+            for bucket, weight in vector.items():
+                postings.setdefault(bucket, []).append((row_id, weight))
+        self._derived_generation = self.generation
+
+    # ------------------------ Abfrage ------------------------
+
+    def top_k(
+        self,
+        queries: Iterable[Tuple[str, str]],
+        target: str,
+        k: int = 5,
+        exclude: Optional[Dict[Tuple[str, str], Set[str]]] = None,
+    ) -> Dict[Tuple[str, str], List[Tuple[str, float]]]:
+        """Für jede Anfrage (Quelle, ID) die k ähnlichsten Zeilen der Ziel-Quelle."""
+        self._derive()
+        postings = self._postings.get(target, {})
+        results: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+        for query in queries:
+            vector = self._vectors.get(query)
+            if vector is None:
+                continue
+            scores: Dict[str, float] = {}
+            for bucket, weight in vector.items():
+                for row_id, other in postings.get(bucket, ()):
+                    scores[row_id] = scores.get(row_id, 0.0) + weight * other
+            skip = (exclude or {}).get(query, set())
+            candidates = ((s, r) for r, s in scores.items() if r not in skip and s > 0.0)
+            results[query] = [(r, s) for s, r in heapq.nlargest(k, candidates)]
+        return results
+
+
+class MappingSuggestionService:
+    """
+    Vorschläge für Security-Controls zu SDM- bzw. Privacy-Controls anhand der
+    Prosa-Ähnlichkeit; bereits gemappte Controls werden ausgelassen.
+    """
+
+    _index = SimilarityIndex()
+    _lock = threading.Lock()
+
+    SOURCES: Dict[str, str] = {
+        settings.SDM_PRIVACY_CATALOG_NAME: "sdm",
+        settings.PRIVACY_CATALOG_NAME: "privacy",
+        settings.RESILIENCE_CATALOG_NAME: "security",
+    }
+    QUERY_SOURCES: Tuple[str, ...] = ("sdm", "privacy")
+    TARGET = "security"
+
+    def __init__(self, file_service: Optional[FileService] = None) -> None:
+        self.fs = file_service or FileService()
+
+    def _refresh(self) -> None:
+        """Zieht Kataloge mit neuer Revision nach (Aufruf unter Lock)."""
+        for name, source in self.SOURCES.items():
+            revision = self.fs.revision(name)
+            if self._index.revisions.get(source) != revision:
+                texts = {
+                    ctrl["id"]: control_text(ctrl)
+                    for _, _, ctrl in iter_catalog_controls(self.fs.load_json(name))
+                    if ctrl.get("id")
+                }
+                self._index.update(source, texts, revision)
+
+    def _security_titles(self) -> Dict[str, str]:
+        return {
+            ctrl["id"]: ctrl.get("title", "")
+            for _, _, ctrl in iter_catalog_controls(self.fs.load_json(settings.RESILIENCE_CATALOG_NAME))
+            if ctrl.get("id")
+        }
+
+    def _mapped(self) -> Dict[str, Set[str]]:
+        mapped: Dict[str, Set[str]] = {}
+        for mapping in self.fs.load_json(settings.SDM_MAPPING_NAME).get("mappings", []) or []:
+            refs = mapped.setdefault(mapping.get("sdm_control_id", ""), set())
+            refs.update(
+                sc.get("control_id", "") for sc in mapping.get("security_controls", []) or []
+            )
+        return mapped
+
+    def _query_key(self, control_id: str) -> Optional[Tuple[str, str]]:
+        for source in self.QUERY_SOURCES:
+            if self._index.has(source, control_id):
+                return (source, control_id)
+        return None
+
+    def suggest(
+        self,
+        control_ids: Optional[List[str]] = None,
+        k: int = 5,
+        include_mapped: bool = False,
+    ) -> List[MappingSuggestionList]:
+        """
+        Vorschläge für die angegebenen Controls (Standard: alle SDM-Controls);
+        unbekannte IDs lösen ValueError aus.
+        """
+        with self._lock:
+            self._refresh()
+            if control_ids is None:
+                keys = [("sdm", row_id) for row_id in sorted(self._index._rows.get("sdm", {}))]
+            else:
+                keys = []
+                for control_id in control_ids:
+                    key = self._query_key(control_id)
+                    if key is None:
+                        raise ValueError(f"Unknown control: {control_id}")
+                    keys.append(key)
+
+            mapped = self._mapped()
+            exclude = {} if include_mapped else {key: mapped.get(key[1], set()) for key in keys}
+            results = self._index.top_k(keys, self.TARGET, k, exclude)
+
+        titles = self._security_titles()
+        return [
+            MappingSuggestionList(
+                controlId=key[1],
+                source=key[0],
+                alreadyMapped=sorted(mapped.get(key[1], set())),
+                suggestions=[
+                    MappingSuggestion(
+                        catalogId=settings.RESILIENCE_CATALOG_ID,
+                        controlId=row_id,
+                        title=titles.get(row_id),
+                        score=round(score, 4),
+                    )
+                    for row_id, score in results.get(key, [])
+                ],
+            )
+            for key in keys
+        ]
@@ -0,0 +1,81 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Request-Coalescing: gleichzeitige Aufrufe mit demselben Schlüssel teilen
+    sich eine laufende Ausführung. Der erste Aufrufer führt `fn` aus, alle
+    weiteren warten auf dessen Ergebnis (bzw. bekommen dieselbe Exception).
+
+    Schlüssel sind Tupel, deren erstes Element die Art angibt (z.B.
+    "document", "index"); danach werden die Metriken aufgeschlüsselt.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[Hashable, ...], _Call] = {}
+        self._executions: Dict[str, int] = defaultdict(int)
+        self._shared: Dict[str, int] = defaultdict(int)
+        self._max_waiters: Dict[str, int] = defaultdict(int)
+
+    def do(self, key: Tuple[Hashable, ...], fn: Callable[[], Any]) -> Any:
+        kind = str(key[0])
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions[kind] += 1
+            else:
+                call.waiters += 1
+                self._shared[kind] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.waiters > self._max_waiters[kind]:
+                    self._max_waiters[kind] = call.waiters
+            call.done.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = sorted(set(self._executions) | set(self._shared))
+            in_flight: Dict[str, int] = defaultdict(int)
+            waiting: Dict[str, int] = defaultdict(int)
+            for key, call in self._calls.items():
+                in_flight[str(key[0])] += 1
+                waiting[str(key[0])] += call.waiters
+            return {
+                kind: {
+                    "executions": self._executions[kind],
+                    "shared": self._shared[kind],
+                    "inFlight": in_flight[kind],
+                    "waiting": waiting[kind],
+                    "maxWaiters": self._max_waiters[kind],
+                }
+                for kind in kinds
+            }
@@ -0,0 +1,394 @@
+import hashlib
+import json
+import logging
+import marshal
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .catalog_registry import CatalogRegistry, registry, stat_revision
+from .file_service import on_change
+from ..config import settings
+
+try:  # prozessübergreifendes Sperren nur auf POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - abhängig von der Plattform
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OGSNAP\x00\x01"
+FORMAT_VERSION = 1
+# Magic, Format-Version, marshal-Version, Länge des Headers
+_PREFIX = struct.Struct("<8sHHI")
+_PYTHON = f"{sys.version_info[0]}.{sys.version_info[1]}"
+_SAFE_NAME = re.compile(r"[^\w.\-]+")
+
+# Abgeleiteter Zustand für save_all(): (Zustand, Quelle → Revision, aus der er gebaut wurde)
+StateProvider = Callable[[], Optional[Tuple[Any, Dict[str, str]]]]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def share_strings(obj: Any, memo: Optional[Dict[str, str]] = None, max_len: int = 64) -> Any:
+    """
+    Kopie einer JSON-Struktur, in der gleiche kurze Strings (Prop-Namen und
+    -Werte, Klassen, IDs …) ein einziges Objekt sind. json.loads legt jeden
+    Wert neu an; marshal erhält die Teilung beim Schreiben und Laden, das
+    spart je Worker gut ein Fünftel des Speichers eines Katalogs.
+    """
+    memo = {} if memo is None else memo
+    if isinstance(obj, dict):
+        return {memo.setdefault(k, k): share_strings(v, memo, max_len) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [share_strings(v, memo, max_len) for v in obj]
+    if isinstance(obj, str) and len(obj) <= max_len:
+        return memo.setdefault(obj, obj)
+    return obj
+
+
+class GenerationCounter:
+    """
+    Zähler in einer Datei, die alle Worker-Prozesse per mmap (MAP_SHARED)
+    einblenden: Lesen ist ein Speicherzugriff ohne Syscall, Erhöhen läuft
+    unter flock und ist sofort in allen Prozessen sichtbar.
+    """
+
+    _MAGIC = b"OGGEN\x00\x00\x01"
+    _FORMAT = struct.Struct("<8sQ")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._mapped: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def _map(self) -> mmap.mmap:
+        with self._lock:
+            if self._mapped is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                with self._exclusive(fd):
+                    if os.fstat(fd).st_size < self._FORMAT.size:
+                        os.ftruncate(fd, self._FORMAT.size)
+                        os.pwrite(fd, self._FORMAT.pack(self._MAGIC, 0), 0)
+                self._mapped = mmap.mmap(fd, self._FORMAT.size)
+                self._fd = fd
+            return self._mapped
+
+    @staticmethod
+    @contextmanager
+    def _exclusive(fd: int) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _read(self, mapped: mmap.mmap) -> int:
+        magic, value = self._FORMAT.unpack_from(mapped)
+        return value if magic == self._MAGIC else 0
+
+    def value(self) -> int:
+        return self._read(self._map())
+
+    def bump(self) -> int:
+        mapped = self._map()
+        with self._lock, self._exclusive(self._fd):
+            value = self._read(mapped) + 1
+            self._FORMAT.pack_into(mapped, 0, self._MAGIC, value)
+        return value
+
+
+class SnapshotStore:
+    """
+    Binäre Snapshots geparster Dokumente und abgeleiteter Indexe für einen
+    schnellen Kaltstart der Worker (statt JSON-Parse und Index-Aufbau).
+
+    Dateiformat (<key>.snap): Präfix (Magic, Format- und marshal-Version,
+    Header-Länge), JSON-Header mit SHA-256 und Stat-Revision jeder Quelldatei,
+    danach der Payload im marshal-Format. Die Datei wird per mmap gelesen und
+    der Payload direkt aus dem Mapping geladen.
+
+    Gültig ist ein Snapshot nur für dieselbe Python-Version und solange jede
+    Quelldatei denselben Inhalt hat: bei unveränderter Stat-Revision (mtime +
+    Größe) ohne Lesen der Datei, sonst über den SHA-256 (z.B. nach einem
+    Git-Checkout mit gleichem Inhalt). Veraltete oder beschädigte Snapshots
+    werden ignoriert und beim nächsten Parse überschrieben.
+
+    Mehrere Worker (uvicorn --workers N) teilen sich das Verzeichnis: wer
+    eine Änderung auf die Platte bringt oder einen Index neu aufbaut,
+    veröffentlicht den Snapshot sofort (publish/publish_state) und erhöht den
+    gemeinsamen Generationszähler. Die anderen Worker laden den neuen Stand
+    dann aus dem Snapshot, statt selbst zu parsen bzw. aufzubauen; Snapshots
+    werden per Rename ersetzt, ein Leser sieht also immer einen vollständigen.
+    """
+
+    def __init__(self, directory: Path, catalog_registry: CatalogRegistry, enabled: bool = True) -> None:
+        self.directory = directory
+        self.registry = catalog_registry
+        self.enabled = enabled
+        self._providers: Dict[str, Tuple[List[str], StateProvider]] = {}
+        self._digests: Dict[Path, Tuple[str, str]] = {}     # Pfad → (Stat-Revision, SHA-256)
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "stale": 0, "missing": 0, "errors": 0, "written": 0, "published": 0}
+        self._generation = GenerationCounter(directory / "generation")
+
+    def generation(self) -> int:
+        """Gemeinsamer Zähler veröffentlichter Snapshots (0 ohne Snapshots)."""
+        return self._generation.value() if self.enabled else 0
+
+    # ------------------------ Dateiformat ------------------------
+
+    def _file(self, key: str) -> Path:
+        return self.directory / f"{_SAFE_NAME.sub('_', key)}.snap"
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def source_digest(self, path: Path) -> str:
+        """SHA-256 einer Quelldatei, gecacht pro Stat-Revision."""
+        revision = stat_revision(path)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        digest = _digest(path.read_bytes())
+        if stat_revision(path) == revision:
+            with self._lock:
+                self._digests[path] = (revision, digest)
+        return digest
+
+    def write(self, key: str, sources: Dict[str, Dict[str, str]], payload: Any) -> None:
+        """
+        Schreibt einen Snapshot; `sources` bildet Quellname → {"sha256",
+        "revision"} des Stands ab, aus dem `payload` gebaut wurde.
+        """
+        header = json.dumps({
+            "key": key,
+            "python": _PYTHON,
+            "created": time.time(),
+            "sources": sources,
+        }).encode("utf-8")
+        data = marshal.dumps(payload)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._file(key)
+        # Cache, kein Journal: ohne fsync – halbe Dateien fallen bei der Prüfung durch
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("wb") as fh:
+            fh.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, marshal.version, len(header)))
+            fh.write(header)
+            fh.write(data)
+        os.replace(tmp, path)
+        self._count("written")
+
+    def _valid(self, header: Dict, sources: Dict[str, Path]) -> bool:
+        recorded = header.get("sources") or {}
+        if header.get("python") != _PYTHON or set(recorded) != set(sources):
+            return False
+        for name, path in sources.items():
+            expected = recorded[name]
+            if expected.get("revision") == stat_revision(path):
+                continue
+            if expected.get("sha256") != self.source_digest(path):
+                return False
+        return True
+
+    def read(self, key: str, sources: Dict[str, Path]) -> Optional[Any]:
+        """Payload des Snapshots oder None (fehlt, veraltet, beschädigt)."""
+        path = self._file(key)
+        try:
+            with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, version, marshal_version, header_len = _PREFIX.unpack_from(mapped)
+                if magic != MAGIC or version != FORMAT_VERSION or marshal_version != marshal.version:
+                    self._count("stale")
+                    return None
+                start = _PREFIX.size + header_len
+                header = json.loads(mapped[_PREFIX.size:start].decode("utf-8"))
+                if not self._valid(header, sources):
+                    self._count("stale")
+                    return None
+                with memoryview(mapped)[start:] as view:
+                    payload = marshal.loads(view)
+        except FileNotFoundError:
+            self._count("missing")
+            return None
+        except (OSError, ValueError, EOFError, TypeError, struct.error) as e:
+            logger.warning("Ignoring unreadable snapshot %s: %s", path, e)
+            self._count("errors")
+            return None
+        self._count("hits")
+        return payload
+
+    # ------------------------ Dokumente ------------------------
+
+    def load_document(self, name: str, path: Path) -> Dict:
+        """
+        Ladepfad der Registry: Dokument aus dem Snapshot, sonst JSON parsen
+        und den Snapshot (neu) schreiben.
+        """
+        if not self.enabled:
+            return json.loads(path.read_text(encoding="utf-8"))
+        document = self.read(f"document-{name}", {name: path})
+        if document is not None:
+            return document
+
+        revision = stat_revision(path)
+        raw = path.read_bytes()
+        document = share_strings(json.loads(raw.decode("utf-8")))
+        # nur mit Stat-Revision ablegen, wenn die Datei beim Lesen stabil war
+        source = {"sha256": _digest(raw), "revision": revision if stat_revision(path) == revision else None}
+        try:
+            self.write(f"document-{name}", {name: source}, document)
+        except OSError as e:
+            logger.warning("Could not write snapshot for %s: %s", name, e)
+        return document
+
+    def publish(self, name: str, document: Dict) -> bool:
+        """
+        Veröffentlicht den gerade geschriebenen Stand eines Dokuments für die
+        anderen Worker; False, wenn die Datei (noch) nicht diesem Stand entspricht.
+        """
+        if not self.enabled:
+            return False
+        try:
+            info = self._source_info(name)
+            if info is None:
+                return False
+            self.write(f"document-{name}", {name: info}, share_strings(document))
+        except OSError as e:
+            logger.warning("Could not publish snapshot for %s: %s", name, e)
+            return False
+        self._count("published")
+        self._generation.bump()
+        return True
+
+    def record(self, name: str, old: Dict, new: Dict, patch: List[Dict[str, Any]], op: str) -> None:
+        # ohne Write-Behind steht der neue Stand jetzt in der Datei; mit
+        # Write-Behind veröffentlicht mark_clean() nach dem Flush
+        if not self.registry.is_dirty(name):
+            self.publish(name, new)
+
+    # ------------------------ abgeleitete Indexe ------------------------
+
+    def register(self, key: str, sources: List[str], provider: StateProvider) -> None:
+        """Meldet einen abgeleiteten Zustand an, den save_all() mitschreibt."""
+        self._providers[key] = (list(sources), provider)
+
+    def read_state(self, key: str, sources: List[str]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self.read(f"index-{key}", {name: self.registry.path(name) for name in sources})
+
+    def publish_state(self, key: str, sources: List[str], state: Any, revisions: Dict[str, str]) -> bool:
+        """Veröffentlicht einen neu aufgebauten Index (gebaut aus `revisions` der Quellen)."""
+        if not self.enabled:
+            return False
+        try:
+            infos = {name: self._source_info(name, revisions.get(name)) for name in sources}
+            if not all(infos.values()):
+                return False
+            self.write(f"index-{key}", infos, state)
+        except OSError as e:
+            logger.warning("Could not publish snapshot %s: %s", key, e)
+            return False
+        self._count("published")
+        self._generation.bump()
+        return True
+
+    def _source_info(self, name: str, revision: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """SHA-256/Revision der Datei – None, wenn sie nicht (mehr) dem Stand `revision` entspricht."""
+        path = self.registry.path(name)
+        current = self.registry.revision(name)
+        if self.registry.is_dirty(name) or (revision is not None and revision != current):
+            return None     # Write-Behind-Stand noch nicht geschrieben bzw. Zustand veraltet
+        return {"sha256": self.source_digest(path), "revision": stat_revision(path)}
+
+    def save_all(self) -> List[str]:
+        """
+        Schreibt Snapshots aller geladenen Dokumente und angemeldeten Zustände,
+        die dem Stand auf der Platte entsprechen (z.B. beim Herunterfahren).
+        """
+        if not self.enabled:
+            return []
+        written: List[str] = []
+        for name, document in self.registry.loaded_documents():
+            info = self._source_info(name)
+            if info is not None:
+                self.write(f"document-{name}", {name: info}, share_strings(document))
+                written.append(f"document-{name}")
+
+        for key, (sources, provider) in self._providers.items():
+            result = provider()
+            if result is None:
+                continue
+            state, revisions = result
+            infos = {name: self._source_info(name, revisions.get(name)) for name in sources}
+            if all(infos.values()):
+                self.write(f"index-{key}", infos, state)
+                written.append(f"index-{key}")
+        return written
+
+    def preload(self, names: Optional[List[str]] = None) -> List[str]:
+        """Lädt (angepinnte) Dokumente vorab – aus Snapshots fast ohne Parse-Aufwand."""
+        if not self.enabled:
+            return []
+        loaded = []
+        for name in names if names is not None else self.registry.pinned_names():
+            try:
+                self.registry.get(name)
+            except (OSError, ValueError) as e:
+                logger.warning("Preload of %s failed: %s", name, e)
+                continue
+            loaded.append(name)
+        return loaded
+
+    # ------------------------ Reporting ------------------------
+
+    def status(self) -> Dict[str, Any]:
+        items = []
+        if self.directory.exists():
+            for path in sorted(self.directory.glob("*.snap")):
+                try:
+                    with path.open("rb") as fh:
+                        prefix = fh.read(_PREFIX.size)
+                        _, version, _, header_len = _PREFIX.unpack(prefix)
+                        header = json.loads(fh.read(header_len).decode("utf-8"))
+                except (OSError, ValueError, struct.error):
+                    header, version = {}, None
+                items.append({
+                    "key": header.get("key", path.stem),
+                    "bytes": path.stat().st_size,
+                    "formatVersion": version,
+                    "python": header.get("python"),
+                    "created": header.get("created"),
+                    "sources": sorted(header.get("sources") or {}),
+                })
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {
+            "enabled": self.enabled,
+            "path": str(self.directory),
+            "generation": self.generation(),
+            "items": items,
+            "metrics": metrics,
+        }
+
+
+snapshot_store = SnapshotStore(settings.SNAPSHOT_PATH, registry, enabled=settings.SNAPSHOT_ENABLED)
+registry.attach_snapshots(snapshot_store)
+on_change(snapshot_store.record)
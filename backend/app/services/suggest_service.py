@@ -0,0 +1,415 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .catalog_utils import iter_catalog_controls
+from .catalog_registry import registry
+from .file_service import FileService
+from .snapshot_store import snapshot_store
+from ..config import settings
+
+
+# (Art, Wert) – z.B. ("bsi", "CON.2"), ("security", "SEC-LOGGING-01")
+SuggestKey = Tuple[str, str]
+
+KINDS: Tuple[str, ...] = ("sdm", "privacy", "security", "bsi", "iso27001", "iso27701")
+STANDARD_KINDS: Tuple[str, ...] = ("bsi", "iso27001", "iso27701")
+
+_WORD = re.compile(r"[\w.\-/]+", re.UNICODE)
+_MIN_WORD = 2
+_PREFIX_SCAN_FACTOR = 50    # max. gescannte Präfix-Treffer je gewünschtem Ergebnis
+_TRIGRAM_SCAN_FACTOR = 200  # max. Trigramm-Kandidaten je gewünschtem Ergebnis
+_BULK_CHANGES = 256         # ab so vielen Änderungen: Präfix-Liste einmal sortieren statt insort
+
+
+# "lösch" und "loesch" sollen gleich treffen
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().translate(_FOLD).split())
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in _WORD.findall(normalize(text)) if len(w) >= _MIN_WORD]
+
+
+def trigrams(text: str) -> Set[str]:
+    text = normalize(text)
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def split_standard_code(value: str) -> Tuple[str, str]:
+    """"CON.2 Datenschutz" → ("CON.2", "Datenschutz")."""
+    code, _, label = value.strip().partition(" ")
+    return code, label.strip()
+
+
+@dataclass
+class _Entry:
+    kind: str
+    value: str
+    label: str = ""
+    labels: Dict[str, str] = field(default_factory=dict)    # Quelle → Label
+
+
+class SuggestIndex:
+    """
+    Typeahead-Index über IDs, Titel und Standard-Codes.
+
+    - Präfix-Index: sortierte Liste (Token, Art-des-Tokens, Entry-ID) – ein
+      flach abgelegter Trie, Präfixabfragen per bisect. Token sind der
+      vollständige Wert (Control-ID/Code) und die einzelnen Wörter des Labels.
+    - Trigramm-Index: Trigramm → Entry-IDs, für Treffer mitten im Wert/Titel
+      und Tippfehler-Toleranz.
+
+    Die Einträge werden je Quelldokument gezählt; update_document() gleicht
+    nur die Differenz zum vorherigen Stand des Dokuments ab (inkrementell).
+    """
+
+    VALUE_TOKEN = 0
+    WORD_TOKEN = 1
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, _Entry] = {}
+        self._ids: Dict[SuggestKey, int] = {}
+        self._next_id = 0
+        self._prefix: List[Tuple[str, int, int]] = []
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._contributions: Dict[str, Dict[SuggestKey, str]] = {}
+        self._priority: Dict[str, int] = {}     # Quelle → Rang für das angezeigte Label
+        self.revisions: Dict[str, str] = {}
+        # Bulk-Modus (update_document mit vielen Änderungen): Token sammeln,
+        # am Ende einmal filtern/sortieren
+        self._bulk = False
+        self._bulk_removed: Set[Tuple[str, int, int]] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------ Pflege ------------------------
+
+    def _tokens(self, entry: _Entry) -> List[Tuple[str, int]]:
+        tokens = [(normalize(entry.value), self.VALUE_TOKEN)]
+        tokens.extend((w, self.WORD_TOKEN) for w in set(_words(entry.label)))
+        return tokens
+
+    def _grams(self, entry: _Entry) -> Set[str]:
+        return trigrams(entry.value) | trigrams(entry.label)
+
+    def _index(self, entry_id: int, entry: _Entry) -> None:
+        for token, kind in self._tokens(entry):
+            if self._bulk:
+                item = (token, kind, entry_id)
+                if item in self._bulk_removed:
+                    self._bulk_removed.discard(item)
+                else:
+                    self._prefix.append(item)
+            else:
+                insort(self._prefix, (token, kind, entry_id))
+        for gram in self._grams(entry):
+            self._trigrams.setdefault(gram, set()).add(entry_id)
+
+    def _unindex(self, entry_id: int, entry: _Entry) -> None:
+        for token, kind in self._tokens(entry):
+            if self._bulk:
+                self._bulk_removed.add((token, kind, entry_id))
+                continue
+            pos = bisect_left(self._prefix, (token, kind, entry_id))
+            if pos < len(self._prefix) and self._prefix[pos] == (token, kind, entry_id):
+                del self._prefix[pos]
+        for gram in self._grams(entry):
+            posting = self._trigrams.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._trigrams[gram]
+
+    def _relabel(self, entry_id: int, entry: _Entry) -> None:
+        """Label = erstes nicht-leeres Label nach Rang der Quelle; bei Änderung neu indexieren."""
+        ranked = sorted(entry.labels.items(), key=lambda item: self._priority.get(item[0], 0))
+        label = next((l for _, l in ranked if l), "")
+        if label != entry.label:
+            self._unindex(entry_id, entry)
+            entry.label = label
+            self._index(entry_id, entry)
+
+    def _acquire(self, key: SuggestKey, label: str, source: str) -> None:
+        entry_id = self._ids.get(key)
+        if entry_id is None:
+            entry_id = self._ids[key] = self._next_id
+            self._next_id += 1
+            entry = self._entries[entry_id] = _Entry(kind=key[0], value=key[1])
+            self._index(entry_id, entry)
+        else:
+            entry = self._entries[entry_id]
+        entry.labels[source] = label
+        self._relabel(entry_id, entry)
+
+    def _release(self, key: SuggestKey, source: str) -> None:
+        entry_id = self._ids.get(key)
+        if entry_id is None:
+            return
+        entry = self._entries[entry_id]
+        entry.labels.pop(source, None)
+        if not entry.labels:
+            self._unindex(entry_id, entry)
+            del self._entries[entry_id]
+            del self._ids[key]
+        else:
+            self._relabel(entry_id, entry)
+
+    def update_document(self, source: str, entries: Dict[SuggestKey, str], revision: Optional[str] = None) -> int:
+        """
+        Gleicht die Einträge eines Quelldokuments ab; liefert die Zahl der
+        Änderungen. Quellen, die zuerst gemeldet wurden, liefern bevorzugt das Label.
+        """
+        self._priority.setdefault(source, len(self._priority))
+        old = self._contributions.get(source, {})
+        removed = [key for key in old if key not in entries]
+        changed = [key for key, label in entries.items() if old.get(key) != label]
+
+        self._bulk = len(removed) + len(changed) >= _BULK_CHANGES
+        try:
+            for key in removed:
+                self._release(key, source)
+            for key in changed:
+                self._acquire(key, entries[key], source)
+        finally:
+            if self._bulk:
+                if self._bulk_removed:
+                    self._prefix = [item for item in self._prefix if item not in self._bulk_removed]
+                    self._bulk_removed = set()
+                self._prefix.sort()
+                self._bulk = False
+        changes = len(removed) + len(changed)
+        self._contributions[source] = dict(entries)
+        if revision is not None:
+            self.revisions[source] = revision
+        return changes
+
+    # ------------------------ Snapshot ------------------------
+
+    def to_state(self) -> Dict:
+        """Kopie des kompletten Index als reine Daten (marshal-fähig, für snapshot_store)."""
+        return {
+            "entries": {i: (e.kind, e.value, e.label, dict(e.labels)) for i, e in self._entries.items()},
+            "nextId": self._next_id,
+            "prefix": list(self._prefix),
+            "trigrams": {gram: set(posting) for gram, posting in self._trigrams.items()},
+            "contributions": {source: dict(entries) for source, entries in self._contributions.items()},
+            "priority": dict(self._priority),
+            "revisions": dict(self.revisions),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "SuggestIndex":
+        index = cls()
+        index._entries = {
+            i: _Entry(kind=kind, value=value, label=label, labels=labels)
+            for i, (kind, value, label, labels) in state["entries"].items()
+        }
+        index._ids = {(e.kind, e.value): i for i, e in index._entries.items()}
+        index._next_id = state["nextId"]
+        index._prefix = state["prefix"]
+        index._trigrams = state["trigrams"]
+        index._contributions = state["contributions"]
+        index._priority = state["priority"]
+        index.revisions = state["revisions"]
+        return index
+
+    # ------------------------ Suche ------------------------
+
+    def _prefix_matches(self, prefix: str, cap: int) -> Dict[int, int]:
+        """Entry-ID → beste Token-Art (VALUE vor WORD) für Token mit diesem Präfix."""
+        found: Dict[int, int] = {}
+        pos = bisect_left(self._prefix, (prefix,))
+        end = len(self._prefix)
+        while pos < end and len(found) < cap:
+            token, kind, entry_id = self._prefix[pos]
+            if not token.startswith(prefix):
+                break
+            if kind < found.get(entry_id, self.WORD_TOKEN + 1):
+                found[entry_id] = kind
+            pos += 1
+        return found
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 10) -> List[Dict]:
+        q = normalize(query)
+        if not q:
+            return []
+        allowed = set(kinds) if kinds else None
+        cap = max(limit, 1) * _PREFIX_SCAN_FACTOR
+        scores: Dict[int, float] = {}
+
+        def offer(entry_id: int, score: float) -> None:
+            if allowed is not None and self._entries[entry_id].kind not in allowed:
+                return
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+
+        # 1) ganzer Query als Präfix des Werts (ID/Code) bzw. exakter Treffer
+        for entry_id, kind in self._prefix_matches(q, cap).items():
+            if kind == self.VALUE_TOKEN:
+                offer(entry_id, 100.0 if normalize(self._entries[entry_id].value) == q else 80.0)
+
+        # 2) jedes Query-Wort als Wort-Präfix (UND-verknüpft)
+        words = q.split()
+        word_hits: Optional[Dict[int, int]] = None
+        for word in words:
+            hits = self._prefix_matches(word, cap)
+            word_hits = hits if word_hits is None else {
+                i: min(k, word_hits[i]) for i, k in hits.items() if i in word_hits
+            }
+            if not word_hits:
+                break
+        for entry_id, kind in (word_hits or {}).items():
+            offer(entry_id, 60.0 if kind == self.VALUE_TOKEN else 50.0)
+
+        # 3) Trigramm-Ähnlichkeit für Infix-Treffer/Tippfehler – nur nötig, wenn
+        #    die Präfix-Treffer (Score ≥ 50 > max. 40) das Limit nicht füllen
+        grams = trigrams(q)
+        if grams and len(scores) < limit:
+            postings = sorted((self._trigrams.get(g, set()) for g in grams), key=len)
+            needed = max(1, (len(grams) + 1) // 2)
+            # wer `needed` Trigramme teilt, steckt in mind. einer der
+            # (n - needed + 1) seltensten Postings; bei sehr häufigen
+            # Trigrammen wird die Kandidatenmenge gedeckelt (best effort)
+            candidates: Set[int] = set()
+            budget = max(limit, 1) * _TRIGRAM_SCAN_FACTOR
+            for posting in postings[:len(postings) - needed + 1]:
+                if len(candidates) + len(posting) > budget:
+                    candidates.update(islice(posting, max(budget - len(candidates), 0)))
+                    break
+                candidates.update(posting)
+            for entry_id in candidates:
+                shared = sum(1 for posting in postings if entry_id in posting)
+                if shared >= needed:
+                    offer(entry_id, 40.0 * shared / len(grams))
+
+        ranked = []
+        for entry_id, score in scores.items():
+            entry = self._entries[entry_id]
+            ranked.append((-score, len(entry.value), entry.value, entry_id))
+        ranked.sort()
+
+        return [
+            {
+                "value": self._entries[entry_id].value,
+                "kind": self._entries[entry_id].kind,
+                "label": self._entries[entry_id].label or None,
+                "score": round(-neg_score, 2),
+                "sources": sorted(self._entries[entry_id].labels),
+            }
+            for neg_score, _, _, entry_id in ranked[:limit]
+        ]
+
+
+# ------------------------ Quellen ------------------------
+
+def _catalog_entries(kind: str, with_related_mappings: bool = False) -> Callable[[Dict], Dict[SuggestKey, str]]:
+    def extract(document: Dict) -> Dict[SuggestKey, str]:
+        entries: Dict[SuggestKey, str] = {}
+        for _, _, ctrl in iter_catalog_controls(document):
+            if ctrl.get("id"):
+                entries[(kind, ctrl["id"])] = ctrl.get("title", "")
+            if not with_related_mappings:
+                continue
+            for prop in ctrl.get("props", []) or []:
+                if prop.get("name") == "related-mapping" and prop.get("class") in STANDARD_KINDS and prop.get("value"):
+                    key = (prop["class"], str(prop["value"]))
+                    entries.setdefault(key, "")
+        return entries
+    return extract
+
+
+def _mapping_entries(document: Dict) -> Dict[SuggestKey, str]:
+    entries: Dict[SuggestKey, str] = {}
+    for mapping in document.get("mappings", []) or []:
+        for ref in mapping.get("security_controls", []) or []:
+            if ref.get("control_id"):
+                key = ("security", ref["control_id"])
+                if not entries.get(key):
+                    entries[key] = ref.get("control_title") or ""
+        for scheme, values in (mapping.get("standards") or {}).items():
+            if scheme not in STANDARD_KINDS:
+                continue
+            for value in values or []:
+                code, label = split_standard_code(str(value))
+                if code and not entries.get((scheme, code)):
+                    entries[(scheme, code)] = label
+    return entries
+
+
+class SuggestService:
+    """
+    Typeahead über die Kern-Dokumente der Workbench (ein gemeinsamer Index).
+
+    Der Index wird über snapshot_store mit den anderen Worker-Prozessen
+    geteilt: nach jedem Nachziehen wird er veröffentlicht, und ein Worker mit
+    veraltetem Index übernimmt zuerst einen passenden veröffentlichten Stand
+    (neue Generation), bevor er selbst nachzieht.
+    """
+
+    _index = SuggestIndex()
+    _lock = threading.Lock()
+    _generation: Optional[int] = None   # zuletzt geprüfte Snapshot-Generation
+
+    SOURCES: Dict[str, Callable[[Dict], Dict[SuggestKey, str]]] = {
+        settings.SDM_PRIVACY_CATALOG_NAME: _catalog_entries("sdm", with_related_mappings=True),
+        settings.PRIVACY_CATALOG_NAME: _catalog_entries("privacy"),
+        settings.RESILIENCE_CATALOG_NAME: _catalog_entries("security"),
+        settings.SDM_MAPPING_NAME: _mapping_entries,
+    }
+
+    def __init__(self, file_service: Optional[FileService] = None) -> None:
+        self.fs = file_service or FileService()
+
+    def _restore(self, revisions: Dict[str, str]) -> None:
+        """Veröffentlichten Stand übernehmen, wenn er zum Inhalt der Dateien passt."""
+        state = snapshot_store.read_state("suggest", list(self.SOURCES))
+        if state is None:
+            return
+        index = SuggestIndex.from_state(state)
+        # Snapshot gilt für den Dateiinhalt; noch nicht geschriebene
+        # Write-Behind-Stände werden danach inkrementell nachgezogen
+        index.revisions = {name: rev for name, rev in revisions.items() if not registry.is_dirty(name)}
+        SuggestService._index = index
+
+    @classmethod
+    def snapshot_state(cls) -> Optional[Tuple[Dict, Dict[str, str]]]:
+        with cls._lock:
+            if not cls._index.revisions:
+                return None
+            return cls._index.to_state(), dict(cls._index.revisions)
+
+    def _refresh(self) -> None:
+        """Zieht Dokumente mit neuer Revision inkrementell nach (Aufruf unter Lock)."""
+        revisions = {name: self.fs.revision(name) for name in self.SOURCES}
+        if self._index.revisions == revisions:
+            return
+
+        generation = snapshot_store.generation()
+        if generation != SuggestService._generation:
+            SuggestService._generation = generation
+            self._restore(revisions)
+
+        changes = 0
+        for name, extract in self.SOURCES.items():
+            if self._index.revisions.get(name) != revisions[name]:
+                changes += self._index.update_document(name, extract(self.fs.load_json(name)), revisions[name])
+        if changes and snapshot_store.publish_state(
+            "suggest", list(self.SOURCES), self._index.to_state(), dict(self._index.revisions)
+        ):
+            SuggestService._generation = snapshot_store.generation()
+
+    def suggest(self, query: str, kinds: Optional[List[str]] = None, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return self._index.search(query, kinds, limit)
+
+
+snapshot_store.register("suggest", list(SuggestService.SOURCES), SuggestService.snapshot_state)
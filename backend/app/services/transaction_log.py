@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .catalog_registry import CatalogRegistry, registry
+from .edit_journal import atomic_write
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class TransactionLog:
+    """
+    Alles-oder-nichts-Schreiben mehrerer Dateien (FileService.transaction).
+
+    Ablauf von commit():
+
+    1. Ein Record `<dir>/<id>.json` mit je Datei Hash des alten Stands
+       ("base"), Hash und vollständigem Text des neuen Stands wird atomar
+       geschrieben (fsync) – das ist der Commit-Punkt.
+    2. Alle neuen Stände werden als Temp-Dateien neben den Zieldateien
+       geschrieben (fsync); schlägt das fehl, wird alles verworfen.
+    3. Die Temp-Dateien werden per os.replace eingesetzt, danach wird der
+       Record gelöscht.
+
+    Ein nach einem Absturz noch vorhandener Record wird beim Start (recover)
+    vorwärts abgeschlossen: Dateien mit dem alten Hash bekommen den neuen
+    Stand, Dateien mit dem neuen Hash sind fertig. Passt eine Datei zu
+    keinem von beiden (extern geändert), wird der Record beiseite gelegt.
+    """
+
+    def __init__(self, directory: Path, catalog_registry: CatalogRegistry) -> None:
+        self.directory = directory
+        self.registry = catalog_registry
+        self.recovered: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _tmp(path: Path, tx_id: str) -> Path:
+        return path.with_name(f".{path.name}.{tx_id}.tmp")
+
+    def commit(self, op: str, documents: List[Tuple[str, str]]) -> str:
+        """Schreibt [(name, Dateitext)] gemeinsam; liefert die Transaktions-ID."""
+        tx_id = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+        files: List[Tuple[str, Path, bytes]] = [
+            (name, self.registry.path(name), content.encode("utf-8")) for name, content in documents
+        ]
+        record = {
+            "id": tx_id,
+            "op": op,
+            "ts": time.time(),
+            "documents": [
+                {
+                    "name": name,
+                    "base": _digest(path.read_bytes()) if path.exists() else None,
+                    "hash": _digest(data),
+                    "content": data.decode("utf-8"),
+                }
+                for name, path, data in files
+            ],
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        record_file = self.directory / f"{tx_id}.json"
+        atomic_write(record_file, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+        written: List[Path] = []
+        try:
+            for _, path, data in files:
+                tmp = self._tmp(path, tx_id)
+                written.append(tmp)
+                with tmp.open("wb") as fh:
+                    fh.write(data)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+        except BaseException:
+            # vor dem ersten Rename: nichts ist passiert
+            for tmp in written:
+                tmp.unlink(missing_ok=True)
+            record_file.unlink(missing_ok=True)
+            raise
+
+        for _, path, _ in files:
+            os.replace(self._tmp(path, tx_id), path)
+        record_file.unlink(missing_ok=True)
+        return tx_id
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """Schließt beim Start unterbrochene Transaktionen ab."""
+        report: List[Dict[str, Any]] = []
+        if not self.directory.exists():
+            return report
+
+        for record_file in sorted(self.directory.glob("*.json")):
+            try:
+                record = json.loads(record_file.read_text(encoding="utf-8"))
+            except ValueError:
+                # atomar geschrieben: unlesbar heißt, der Commit-Punkt wurde nie erreicht
+                record_file.unlink()
+                continue
+
+            statuses: Dict[str, str] = {}
+            for doc in record.get("documents", []):
+                name = doc["name"]
+                try:
+                    path = self.registry.path(name)
+                except ValueError:
+                    statuses[name] = "unknown"
+                    continue
+                self._tmp(path, record["id"]).unlink(missing_ok=True)
+                current = _digest(path.read_bytes()) if path.exists() else None
+                if current == doc["hash"]:
+                    statuses[name] = "done"
+                elif current == doc["base"]:
+                    atomic_write(path, doc["content"].encode("utf-8"))
+                    self.registry.invalidate(name)
+                    statuses[name] = "replayed"
+                else:
+                    statuses[name] = "conflict"
+
+            if any(s in ("conflict", "unknown") for s in statuses.values()):
+                logger.warning("Transaction %s could not be completed (%s), moved aside", record_file, statuses)
+                record_file.rename(record_file.with_suffix(f".conflict-{int(time.time())}"))
+                status = "conflict"
+            else:
+                if "replayed" in statuses.values():
+                    logger.info("Completed interrupted transaction %s (%s)", record.get("id"), record.get("op"))
+                record_file.unlink()
+                status = "replayed" if "replayed" in statuses.values() else "clean"
+            report.append({"id": record.get("id"), "op": record.get("op"), "status": status, "documents": statuses})
+
+        self.recovered = report
+        return report
+
+
+transaction_log = TransactionLog(settings.TRANSACTION_PATH, registry)
@@ -0,0 +1,153 @@
+"""
+Benchmark: Listen-Antworten mit voller Pydantic-Validierung + jsonable_encoder
+(settings.VALIDATE_MODELS, Debug-Modus) gegen den internen Schnellpfad
+(model_construct + Serialisierung direkt in pydantic-core).
+
+Gemessen wird Aufbau der Antwort-Modelle im Service plus Kodierung zu JSON
+(wie beim ersten Aufruf einer gecachten Route) auf synthetischen Katalogen.
+
+Aus backend/:
+
+    python tools/bench_models.py --controls 5000 --repeat 5
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.config import settings  # noqa: E402
+from app.services.mapping_service import MappingService  # noqa: E402
+from app.services.privacy_catalog_service import PrivacyCatalogService  # noqa: E402
+from app.services.resilience_catalog_service import ResilienceCatalogService  # noqa: E402
+from app.services.response_cache import response_cache  # noqa: E402
+from app.services.sdm_catalog_service import SdmCatalogIndex  # noqa: E402
+
+
+def _catalog(controls: List[Dict], per_group: int = 50) -> Dict:
+    groups = [
+        {"id": f"g-{i // per_group}", "title": f"Gruppe {i // per_group}", "controls": controls[i:i + per_group]}
+        for i in range(0, len(controls), per_group)
+    ]
+    return {"catalog": {"uuid": "bench", "metadata": {"title": "bench"}, "groups": groups}}
+
+
+def sdm_catalog(n: int) -> Dict:
+    return _catalog([
+        {
+            "id": f"SDM-TOM-B-{i:05d}",
+            "title": f"Maßnahme {i} zur Zugriffskontrolle",
+            "props": [
+                {"name": "sdm-module", "value": f"SDM-{i % 11}"},
+                {"name": "sdm-goal", "value": "VERTRAULICHKEIT"},
+                {"name": "sdm-goal", "value": "INTEGRITÄT"},
+                {"name": "dsgvo-article", "value": "Art. 32 DSGVO"},
+                {"name": "dsgvo-article", "value": "Art. 25 DSGVO"},
+                {"name": "related-mapping", "class": "bsi", "value": "ORP.4"},
+                {"name": "implementation-level", "value": "standard"},
+            ],
+            "parts": [{"id": f"sdm-{i}-desc", "name": "description", "prose": "Beschreibung " * 20}],
+        }
+        for i in range(n)
+    ])
+
+
+def privacy_catalog(n: int) -> Dict:
+    return _catalog([
+        {
+            "id": f"TOM-{i:05d}",
+            "title": f"Datenschutzmaßnahme {i}",
+            "props": [
+                {"name": "tom-id", "value": f"T-{i}"},
+                {"name": "dsgvo-article", "value": "32"},
+                {"name": "dp-goal", "value": "integrity"},
+                {"name": "dp-goal", "value": "confidentiality"},
+            ],
+            "parts": [{"name": "statement", "prose": "Aussage " * 20}],
+        }
+        for i in range(n)
+    ])
+
+
+def resilience_catalog(n: int) -> Dict:
+    return _catalog([
+        {
+            "id": f"SEC-B-{i:05d}",
+            "title": f"Security control {i}",
+            "class": "technical",
+            "props": [{"name": "domain", "value": "backup-recovery"}, {"name": "objective", "value": "restore in time"}],
+            "parts": [{"id": f"sec-{i}-desc", "name": "description", "prose": "Description " * 20}],
+        }
+        for i in range(n)
+    ])
+
+
+def mapping_document(n: int) -> Dict:
+    return {"mappings": [
+        {
+            "sdm_control_id": f"SDM-TOM-B-{i:05d}",
+            "sdm_title": f"Maßnahme {i}",
+            "security_controls": [
+                {"catalog_id": "opengov-resilience-baseline", "control_id": f"SEC-B-{i:05d}"},
+                {"catalog_id": "opengov-resilience-baseline", "control_id": f"SEC-B-{(i + 1) % n:05d}"},
+            ],
+            "standards": {"bsi": ["CON.2", "OPS.1.1.5"], "iso27001": ["8.10"]},
+            "notes": "Notiz",
+        }
+        for i in range(n)
+    ]}
+
+
+def scenarios(n: int) -> Dict[str, Callable[[], object]]:
+    sdm = sdm_catalog(n)
+    privacy = privacy_catalog(n)
+    resilience = resilience_catalog(n)
+    mapping = mapping_document(n)
+
+    def sdm_list():
+        index = SdmCatalogIndex(sdm)
+        return {"items": [index.summary(i) for i in index.ids()]}
+
+    def privacy_list():
+        svc = PrivacyCatalogService()
+        svc._get_catalog = lambda: privacy
+        return {"items": svc.list_controls()}
+
+    return {
+        "SdmControlSummary": sdm_list,
+        "PrivacyControlSummary": privacy_list,
+        "SecurityControl": lambda: {"items": ResilienceCatalogService(resilience).list_controls()},
+        "SdmSecurityMapping": lambda: {"items": MappingService(mapping).list_mappings()},
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response_cache.encode(fn())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--controls", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.controls} Einträge je Liste, Median aus {args.repeat} Läufen (Aufbau + JSON-Kodierung)")
+    print(f"{'Modell':<24} {'validiert ms':>13} {'Schnellpfad ms':>15} {'Faktor':>7}")
+    for name, fn in scenarios(args.controls).items():
+        settings.VALIDATE_MODELS = True
+        validated = measure(fn, args.repeat)
+        settings.VALIDATE_MODELS = False
+        fast = measure(fn, args.repeat)
+        print(f"{name:<24} {validated:>13.1f} {fast:>15.1f} {validated / fast:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
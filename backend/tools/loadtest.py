@@ -0,0 +1,373 @@
+"""
+Lastgenerator für die Workbench-API: simuliert gleichzeitige Leser und
+Bearbeiter und prüft am Ende, ob bestätigte Änderungen verloren gingen.
+
+Gegen einen lokal laufenden Server (aus backend/):
+
+    uvicorn app.main:app --port 8000
+    python tools/loadtest.py --base-url http://127.0.0.1:8000 --readers 8 --editors 4 --duration 30
+
+oder ohne Server direkt gegen die App im selben Prozess (--in-process).
+
+Szenarien:
+  browse       Listen (SDM, Privacy, Resilience, Mapping)
+  detail       Detailansichten zufälliger Controls
+  sdm-edit     related-mappings eines SDM-Controls setzen (PUT /api/sdm/controls/{id})
+  mapping      Mapping anlegen/überschreiben (PUT /api/mapping/{id})
+  raw-save     Mapping-Datei lesen, ändern und komplett speichern (POST /api/save)
+
+Jeder Bearbeiter schreibt nur "seine" Marker (eigenes SDM-Control, eigene
+Mapping-IDs) mit laufender Sequenznummer. Nach dem Lauf wird das Journal
+geflusht und der Dateistand geprüft: Für jeden Marker muss die zuletzt
+bestätigte (2xx) Sequenznummer in der Datei stehen, sonst ist das ein
+Lost Update. Anschließend werden die Originaldateien zurückgeschrieben
+(--keep lässt den Endstand stehen).
+
+Exit-Code 1 bei Lost Updates oder einer Fehlerquote über --max-error-rate.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+
+SDM_CATALOG = "sdm_privacy_catalog"
+MAPPING_FILE = "sdm_privacy_to_security"
+MARKER_SCHEME = "loadtest"
+
+READ_SCENARIOS = ("browse", "detail")
+EDIT_SCENARIOS = ("sdm-edit", "mapping", "raw-save")
+
+LIST_PATHS = (
+    "/api/sdm/controls",
+    "/api/privacy/controls",
+    "/api/resilience/controls",
+    "/api/mapping",
+)
+
+
+@dataclass
+class Stats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    def record(self, seconds: float, status: Optional[int]) -> None:
+        self.latencies.append(seconds)
+        if status is None:
+            self.errors += 1
+            return
+        self.statuses[status] += 1
+        if status >= 400:
+            self.errors += 1
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self.client = client
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:6]
+        self.stats: Dict[str, Stats] = defaultdict(Stats)
+        self.sdm_ids: List[str] = []
+        self.privacy_ids: List[str] = []
+        self.security_ids: List[str] = []
+        # Marker → zuletzt bestätigte Sequenznummer
+        self.acked_sdm: Dict[str, int] = {}
+        self.acked_mapping: Dict[str, int] = {}
+        self.originals: Dict[str, str] = {}
+        self.deadline = 0.0
+
+    # ------------------------ HTTP ------------------------
+
+    async def call(self, scenario: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            self.stats[scenario].record(time.perf_counter() - start, None)
+            return None
+        self.stats[scenario].record(time.perf_counter() - start, response.status_code)
+        return response
+
+    async def ids(self, path: str) -> List[str]:
+        response = await self.client.get(path)
+        response.raise_for_status()
+        return [item["id"] for item in response.json()["items"]]
+
+    async def setup(self) -> None:
+        self.sdm_ids = await self.ids("/api/sdm/controls")
+        self.privacy_ids = await self.ids("/api/privacy/controls")
+        self.security_ids = await self.ids("/api/resilience/controls")
+        for name in (SDM_CATALOG, MAPPING_FILE):
+            response = await self.client.get(f"/api/files/{name}")
+            response.raise_for_status()
+            self.originals[name] = response.json()["content"]
+        if self.args.editors > len(self.sdm_ids):
+            raise SystemExit(f"at most {len(self.sdm_ids)} editors (one SDM control each)")
+
+    # ------------------------ Leser ------------------------
+
+    async def reader(self, worker: int) -> None:
+        rng = random.Random(worker)
+        while time.perf_counter() < self.deadline:
+            if rng.random() < 0.5:
+                await self.call("browse", "GET", rng.choice(LIST_PATHS))
+            else:
+                kind = rng.randrange(3)
+                if kind == 0:
+                    path = f"/api/sdm/controls/{rng.choice(self.sdm_ids)}"
+                elif kind == 1:
+                    path = f"/api/privacy/controls/{rng.choice(self.privacy_ids)}"
+                else:
+                    path = f"/api/resilience/controls/{rng.choice(self.security_ids)}"
+                await self.call("detail", "GET", path)
+            await self.think(rng)
+
+    # ------------------------ Bearbeiter ------------------------
+
+    def mapping_id(self, worker: int, raw: bool) -> str:
+        return f"LOADTEST-{self.run_id}-{'RAW' if raw else 'API'}-{worker}"
+
+    async def sdm_edit(self, worker: int, seq: int) -> None:
+        control_id = self.sdm_ids[worker]
+        response = await self.call(
+            "sdm-edit", "PUT", f"/api/sdm/controls/{control_id}",
+            json={"props": {"relatedMappings": [{"scheme": MARKER_SCHEME, "value": f"{self.run_id}-{worker}-{seq}"}]}},
+        )
+        if response is not None and response.is_success:
+            self.acked_sdm[control_id] = seq
+
+    async def mapping_upsert(self, worker: int, seq: int) -> None:
+        mapping_id = self.mapping_id(worker, raw=False)
+        response = await self.call(
+            "mapping", "PUT", f"/api/mapping/{mapping_id}",
+            json={
+                "sdmTitle": "Lasttest",
+                "securityControls": [{"catalogId": "loadtest", "controlId": self.security_ids[0]}],
+                "notes": f"seq {seq}",
+            },
+        )
+        if response is not None and response.is_success:
+            self.acked_mapping[mapping_id] = seq
+
+    async def raw_save(self, worker: int, seq: int) -> None:
+        # bewusst Read-Modify-Write über die ganze Datei, wie ein Editor im Frontend
+        response = await self.call("raw-save", "GET", f"/api/files/{MAPPING_FILE}")
+        if response is None or not response.is_success:
+            return
+        document = json.loads(response.json()["content"])
+        mapping_id = self.mapping_id(worker, raw=True)
+        mappings = [m for m in document.get("mappings", []) if m.get("sdm_control_id") != mapping_id]
+        mappings.append({
+            "sdm_control_id": mapping_id,
+            "sdm_title": "Lasttest (raw)",
+            "security_controls": [],
+            "standards": {},
+            "notes": f"seq {seq}",
+        })
+        document["mappings"] = mappings
+        response = await self.call(
+            "raw-save", "POST", "/api/save",
+            json={"name": MAPPING_FILE, "content": json.dumps(document, ensure_ascii=False, indent=2), "previewOnly": False},
+        )
+        if response is not None and response.is_success:
+            self.acked_mapping[mapping_id] = seq
+
+    async def editor(self, worker: int) -> None:
+        rng = random.Random(1000 + worker)
+        actions = {"sdm-edit": self.sdm_edit, "mapping": self.mapping_upsert, "raw-save": self.raw_save}
+        scenarios = [s for s in self.args.scenarios if s in actions]
+        seq = 0
+        while scenarios and time.perf_counter() < self.deadline:
+            seq += 1
+            await actions[rng.choice(scenarios)](worker, seq)
+            await self.think(rng)
+
+    async def think(self, rng: random.Random) -> None:
+        if self.args.think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * self.args.think_ms) / 1000.0)
+        else:
+            await asyncio.sleep(0)
+
+    # ------------------------ Prüfung ------------------------
+
+    async def final_document(self, name: str) -> Dict:
+        response = await self.client.get(f"/api/files/{name}")
+        response.raise_for_status()
+        return json.loads(response.json()["content"])
+
+    async def verify(self) -> List[str]:
+        flush = await self.client.post("/api/journal/flush")
+        if flush.status_code not in (200, 404):
+            flush.raise_for_status()
+
+        lost: List[str] = []
+        catalog = await self.final_document(SDM_CATALOG)
+        found: Dict[str, Optional[str]] = {}
+        stack = list(catalog.get("catalog", {}).get("groups", []) or []) + list(catalog.get("catalog", {}).get("controls", []) or [])
+        while stack:
+            node = stack.pop()
+            stack.extend(node.get("groups", []) or [])
+            stack.extend(node.get("controls", []) or [])
+            for prop in node.get("props", []) or []:
+                if prop.get("name") == "related-mapping" and prop.get("class") == MARKER_SCHEME:
+                    found[node.get("id", "")] = prop.get("value")
+        for control_id, seq in self.acked_sdm.items():
+            expected = f"{self.run_id}-{self.sdm_ids.index(control_id)}-{seq}"
+            if found.get(control_id) != expected:
+                lost.append(f"sdm {control_id}: expected {expected}, file has {found.get(control_id)}")
+
+        mapping = await self.final_document(MAPPING_FILE)
+        notes = {m.get("sdm_control_id"): m.get("notes") for m in mapping.get("mappings", [])}
+        for mapping_id, seq in self.acked_mapping.items():
+            if notes.get(mapping_id) != f"seq {seq}":
+                lost.append(f"mapping {mapping_id}: expected seq {seq}, file has {notes.get(mapping_id)}")
+        return lost
+
+    async def restore(self) -> None:
+        for name, content in self.originals.items():
+            response = await self.client.post(
+                "/api/save", json={"name": name, "content": content, "previewOnly": False}
+            )
+            response.raise_for_status()
+        await self.client.post("/api/journal/flush")
+
+    # ------------------------ Lauf ------------------------
+
+    async def run(self) -> Tuple[float, List[str]]:
+        await self.setup()
+        started = time.perf_counter()
+        self.deadline = started + self.args.duration
+        try:
+            await asyncio.gather(
+                *(self.reader(w) for w in range(self.args.readers)),
+                *(self.editor(w) for w in range(self.args.editors)),
+            )
+            elapsed = time.perf_counter() - started
+            lost = await self.verify()
+        finally:
+            if not self.args.keep:
+                await self.restore()
+        return elapsed, lost
+
+
+def report(test: LoadTest, elapsed: float, lost: List[str]) -> Dict:
+    scenarios = {}
+    total_requests = total_errors = 0
+    for scenario in READ_SCENARIOS + EDIT_SCENARIOS:
+        stats = test.stats.get(scenario)
+        if stats is None or not stats.latencies:
+            continue
+        values = sorted(stats.latencies)
+        total_requests += len(values)
+        total_errors += stats.errors
+        scenarios[scenario] = {
+            "requests": len(values),
+            "throughput": round(len(values) / elapsed, 1),
+            "errorRate": round(stats.errors / len(values), 4),
+            "statuses": dict(sorted(stats.statuses.items())),
+            "latencyMs": {
+                "p50": round(percentile(values, 0.50) * 1000, 1),
+                "p90": round(percentile(values, 0.90) * 1000, 1),
+                "p99": round(percentile(values, 0.99) * 1000, 1),
+                "max": round(values[-1] * 1000, 1),
+            },
+        }
+    return {
+        "runId": test.run_id,
+        "durationS": round(elapsed, 2),
+        "requests": total_requests,
+        "throughput": round(total_requests / elapsed, 1) if elapsed else 0.0,
+        "errorRate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "scenarios": scenarios,
+        "ackedEdits": len(test.acked_sdm) + len(test.acked_mapping),
+        "lostUpdates": lost,
+    }
+
+
+def print_report(result: Dict) -> None:
+    print(
+        f"run {result['runId']}: {result['requests']} requests in {result['durationS']} s "
+        f"({result['throughput']} req/s), error rate {result['errorRate']:.2%}"
+    )
+    print(f"{'scenario':<10} {'req':>7} {'req/s':>8} {'err':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, s in result["scenarios"].items():
+        lat = s["latencyMs"]
+        print(
+            f"{name:<10} {s['requests']:>7} {s['throughput']:>8} {s['errorRate']:>7.2%} "
+            f"{lat['p50']:>8} {lat['p90']:>8} {lat['p99']:>8} {lat['max']:>8}"
+        )
+    if result["lostUpdates"]:
+        print(f"\nLOST UPDATES ({len(result['lostUpdates'])} of {result['ackedEdits']} markers):")
+        for line in result["lostUpdates"]:
+            print(f"  {line}")
+    else:
+        print(f"\nno lost updates ({result['ackedEdits']} markers verified)")
+
+
+def build_client(args: argparse.Namespace) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(args.timeout)
+    if args.in_process:
+        sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+        from app.main import app  # noqa: E402 – nur im In-Process-Modus
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://workbench", timeout=timeout)
+    limits = httpx.Limits(max_connections=args.readers + args.editors)
+    return httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits)
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    async with build_client(args) as client:
+        test = LoadTest(client, args)
+        elapsed, lost = await test.run()
+    result = report(test, elapsed, lost)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result)
+    return 1 if lost or result["errorRate"] > args.max_error_rate else 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Lasttest für die OSCAL Workbench API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--in-process", action="store_true", help="App im selben Prozess (ohne uvicorn)")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--editors", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="Sekunden")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mittlere Pause zwischen Requests")
+    parser.add_argument(
+        "--scenarios", default=",".join(EDIT_SCENARIOS),
+        help=f"Bearbeiter-Szenarien, kommagetrennt aus {', '.join(EDIT_SCENARIOS)}",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--keep", action="store_true", help="Endstand nicht zurücksetzen")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in EDIT_SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main_async(parse_args())))